@@ -0,0 +1,109 @@
+"""
+Commandes d'administration
+
+Usage :
+    python -m app.cli backfill-summaries [--child-id ID]
+    python -m app.cli apply-retention
+    python -m app.cli import-gps FICHIER [--format csv|ndjson] [--chunk-size N]
+    python -m app.cli create-partitions [--months N]
+"""
+import argparse
+import sys
+
+from app.core.database import SessionLocal, init_db
+
+
+def backfill_summaries(args: argparse.Namespace) -> None:
+    from app.services.summary_service import rebuild_daily_summaries
+
+    db = SessionLocal()
+    try:
+        written = rebuild_daily_summaries(db, args.child_id)
+    finally:
+        db.close()
+    print(f"{written} daily summaries written")
+
+
+def apply_retention(args: argparse.Namespace) -> None:
+    from app.services.retention_service import apply_retention as run_retention
+
+    db = SessionLocal()
+    try:
+        stats = run_retention(db)
+    finally:
+        db.close()
+    print(
+        f"{stats['rolled_up_days']} days rolled up, {stats['archived_days']} days archived, "
+        f"{stats['deleted_points']} points deleted, {len(stats['dropped_partitions'])} partitions dropped"
+    )
+
+
+def import_gps(args: argparse.Namespace) -> None:
+    from app.services.import_service import import_gps_history, read_fixes
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    db = SessionLocal()
+    try:
+        stats = import_gps_history(db, read_fixes(stream, fmt), chunk_size=args.chunk_size)
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+    print(
+        f"{stats['rows']} fixes read, {stats['inserted']} inserted, {stats['skipped']} skipped, "
+        f"{stats['children']} children in {stats['seconds']:.1f}s ({stats['rows_per_second']} rows/s)"
+    )
+
+
+def create_partitions(args: argparse.Namespace) -> None:
+    from app.core.database import engine
+    from app.core.partitioning import create_upcoming_partitions
+
+    months = create_upcoming_partitions(engine, args.months)
+    if not months:
+        print("gps_history partitioning disabled")
+        return
+    print(f"gps_history partitions ready up to {months[-1][0]}-{months[-1][1]:02d}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser(
+        "backfill-summaries",
+        help="Reconstruit gps_daily_summary depuis gps_history"
+    )
+    backfill.add_argument("--child-id", type=int, default=None)
+    backfill.set_defaults(handler=backfill_summaries)
+
+    retention = commands.add_parser(
+        "apply-retention",
+        help="Fait passer l'historique expiré en trace simplifiée puis en archive"
+    )
+    retention.set_defaults(handler=apply_retention)
+
+    importer = commands.add_parser(
+        "import-gps",
+        help="Importe un historique GPS (CSV ou NDJSON, '-' pour stdin) dans gps_history"
+    )
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    importer.add_argument("--chunk-size", type=int, default=50000)
+    importer.set_defaults(handler=import_gps)
+
+    partitions = commands.add_parser(
+        "create-partitions",
+        help="Crée à l'avance les partitions mensuelles de gps_history"
+    )
+    partitions.add_argument("--months", type=int, default=None)
+    partitions.set_defaults(handler=create_partitions)
+
+    args = parser.parse_args(argv)
+    init_db()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
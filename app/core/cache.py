@@ -0,0 +1,116 @@
+"""
+Cache clé/valeur à expiration (TTL) avec backend interchangeable
+- MemoryCache : dictionnaire du processus (défaut)
+- RedisCache : tout client au protocole Redis (get / set ex= / delete),
+  valeurs sérialisées en JSON
+
+update(key, fn, ttl) : lecture-modification-écriture, fn(valeur courante)
+rend la nouvelle valeur ou None pour garder l'actuelle.
+"""
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class MemoryCache:
+    """Cache en mémoire du processus, entrées expirées à la lecture"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Optional[Any]], ttl_seconds: float) -> None:
+        """Atomique dans le processus (sous le verrou)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            current = entry[1] if entry is not None and entry[0] > time.monotonic() else None
+            value = fn(current)
+            if value is not None:
+                self._entries[key] = (time.monotonic() + ttl_seconds, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """
+    Cache partagé entre processus via un client au protocole Redis
+
+    Args:
+        client: Objet exposant get(key), set(key, value, ex=secondes) et
+            delete(key) (redis.Redis, ou un bouchon local en test)
+        prefix: Préfixe des clés (plusieurs applis sur la même instance)
+    """
+
+    def __init__(self, client, prefix: str = "wimc:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        # Redis n'accepte qu'un nombre entier de secondes pour ex
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl_seconds)))
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Optional[Any]], ttl_seconds: float) -> None:
+        """
+        Atomique entre processus avec redis.Redis (WATCH / MULTI, rejoué si la
+        clé change entre-temps) ; simple lecture puis écriture sinon
+        """
+        full_key = self.prefix + key
+
+        def new_value(raw) -> Optional[Any]:
+            return fn(None if raw is None else json.loads(raw))
+
+        if not hasattr(self.client, "transaction"):
+            value = new_value(self.client.get(full_key))
+            if value is not None:
+                self.set(key, value, ttl_seconds)
+            return
+
+        def apply(pipe) -> None:
+            value = new_value(pipe.get(full_key))
+            if value is not None:
+                pipe.multi()
+                pipe.set(full_key, json.dumps(value), ex=max(1, int(ttl_seconds)))
+
+        self.client.transaction(apply, full_key)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+def build_cache(backend: str, redis_url: str = ""):
+    """Backend configuré : "memory" ou "redis" (paquet redis requis)"""
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        return RedisCache(redis.Redis.from_url(redis_url))
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -10,6 +10,91 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     SECRET_KEY = "ton_secret_key_super_long_et_securise_ici_minimum_32_caracteres"
 
+    # Partitionnement mensuel de gps_history (PostgreSQL) : partitions du mois
+    # en cours et des N mois suivants créées au démarrage et par
+    # python -m app.cli create-partitions (à planifier)
+    GPS_HISTORY_PARTITIONING: bool = False
+    GPS_HISTORY_PARTITIONS_AHEAD: int = 3
+
+    # Rétention par paliers (python -m app.cli apply-retention) : pleine
+    # résolution N jours, puis trace simplifiée, puis archive compacte par jour
+    GPS_RETENTION_FULL_DAYS: int = 30
+    GPS_RETENTION_ROLLUP_DAYS: int = 365
+    GPS_ROLLUP_TOLERANCE_M: float = 10.0
+    GPS_ARCHIVE_TOLERANCE_M: float = 30.0
+
+    # Moteur snap-to-roads : "google" (Roads API) ou "local" (map-matching
+    # hors-ligne sur un extrait OpenStreetMap .osm)
+    SNAP_BACKEND: str = "google"
+    OSM_GRAPH_PATH: str = ""
+    MAP_MATCHING_SIGMA_M: float = 10.0
+    MAP_MATCHING_RADIUS_M: float = 50.0
+
+    # Client Google Roads API (snap-to-roads)
+    ROADS_API_URL: str = "https://roads.googleapis.com/v1/snapToRoads"
+    ROADS_CHUNK_OVERLAP: int = 10
+    ROADS_MAX_CONCURRENCY: int = 4
+    ROADS_MAX_RETRIES: int = 3
+
+    # Cache des traces snap-to-roads (entrées gardées en mémoire, LRU)
+    SNAP_CACHE_MAX_ENTRIES: int = 64
+
+    # Buffer d'ingestion GPS (write-behind)
+    GPS_BUFFER_ENABLED: bool = True
+    GPS_BUFFER_MAX_POINTS: int = 20000
+    GPS_BUFFER_FLUSH_SIZE: int = 500
+    GPS_BUFFER_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Cache des dernières positions (carte en direct) : "memory" ou "redis"
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    LAST_POSITION_TTL_SECONDS: float = 300.0
+
+    # Positions en direct (SSE / WebSocket) : file par connexion, keep-alive
+    LIVE_QUEUE_SIZE: int = 100
+    LIVE_HEARTBEAT_SECONDS: float = 15.0
+
+    # Géofencing : marge au-delà du rayon avant de considérer une sortie (anti-jitter)
+    GEOFENCE_HYSTERESIS_M: float = 25.0
+    # Lecture par curseur : événements servis seulement après ce délai (les ids
+    # sont pris à l'insertion, une ingestion concurrente peut commiter un id
+    # plus petit après un id plus grand) ; à garder au-dessus de la durée
+    # d'une transaction d'ingestion
+    GEOFENCE_EVENTS_SAFETY_LAG_SECONDS: float = 5.0
+
+    # Dédoublonnage à l'ingestion : fixes consécutifs à moins de GPS_DEDUP_DISTANCE_M
+    # (ou de la précision rapportée, plafonnée) et espacés de moins de
+    # GPS_DEDUP_MAX_GAP_SECONDS regroupés sur une seule ligne de gps_history
+    GPS_DEDUP_ENABLED: bool = True
+    GPS_DEDUP_DISTANCE_M: float = 15.0
+    GPS_DEDUP_MAX_DISTANCE_M: float = 50.0
+    GPS_DEDUP_MAX_GAP_SECONDS: float = 900.0
+
+    # Horodatage émetteur : au-delà de cette avance sur l'heure serveur (horloge
+    # du téléphone déréglée), le fix est recalé de l'avance mesurée sur le
+    # premier fix en avance ; avance gardée GPS_CLOCK_OFFSET_TTL_SECONDS (un
+    # fix renvoyé dans ce délai retombe sur le même horodatage)
+    GPS_MAX_CLOCK_SKEW_SECONDS: float = 300.0
+    GPS_CLOCK_OFFSET_TTL_SECONDS: float = 3600.0
+
+    # Consignes de cadence renvoyées à l'émetteur : intervalle (s) et déplacement
+    # minimal (m) par mode, vitesse sous laquelle l'enfant est immobile (écarts
+    # sous REPORTING_JITTER_M ignorés), batterie faible = intervalle doublé
+    REPORTING_MOVING_INTERVAL_SECONDS: int = 10
+    REPORTING_MOVING_DISTANCE_M: float = 10.0
+    REPORTING_STATIONARY_INTERVAL_SECONDS: int = 60
+    REPORTING_STATIONARY_DISTANCE_M: float = 30.0
+    REPORTING_SAFE_ZONE_INTERVAL_SECONDS: int = 300
+    REPORTING_SAFE_ZONE_DISTANCE_M: float = 100.0
+    REPORTING_STATIONARY_SPEED_MPS: float = 0.5
+    REPORTING_JITTER_M: float = 15.0
+    REPORTING_LOW_BATTERY_PERCENT: int = 20
+
+    # Chronologie (arrêts / trajets) : rayon et durée minimale d'un arrêt, journées en cache
+    TIMELINE_STAY_RADIUS_M: float = 100.0
+    TIMELINE_STAY_MIN_SECONDS: float = 300.0
+    TIMELINE_CACHE_MAX_ENTRIES: int = 256
+
     class Config:
         env_file = ".env"
 
@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine  # Transform URL into Postgre connection
+from sqlalchemy import create_engine, inspect, text  # Transform URL into Postgre connection
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import (  # import base Class
     declarative_base,
 )
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
 
 """ build session for each http request"""
 from app.core.config import settings
@@ -14,6 +17,83 @@ engine = create_engine(db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str) -> tuple:
+    """URL et connect_args du moteur async (asyncpg / aiosqlite) équivalent à une URL synchrone"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    connect_args = {}
+    if backend == "postgresql" and "sslmode" in parsed.query:
+        # asyncpg ne connaît pas ?sslmode= : même valeur passée en ssl=
+        connect_args["ssl"] = parsed.query["sslmode"]
+        parsed = parsed.difference_update_query(["sslmode"])
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]), connect_args
+
+
+# Routes async : attente des requêtes sans bloquer la boucle d'événements
+_async_db_url, _async_connect_args = async_url(db_url)
+async_engine = create_async_engine(_async_db_url, connect_args=_async_connect_args)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def init_db():
+    """Crée les tables manquantes et les index ajoutés depuis leur création"""
+    from app import models  # noqa: F401 - enregistre les modèles dans Base
+    from app.core.partitioning import (
+        create_partitioned_gps_history,
+        create_upcoming_partitions,
+        partitioning_enabled,
+    )
+
+    if partitioning_enabled(engine):
+        create_partitioned_gps_history(engine)
+        create_upcoming_partitions(engine)
+
+    Base.metadata.create_all(bind=engine)
+
+    # create_all ignore les colonnes et index ajoutés à une table déjà existante
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for name in _REPLACED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.execute(text(_add_column_sql(table.name, column)))
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.unique and index.name not in indexes:
+                    # Doublons écrits avant l'index unique : le plus ancien est gardé
+                    conn.execute(text(_delete_duplicates_sql(table.name, [c.name for c in index.columns])))
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+# Index remplacés par un autre sur les mêmes colonnes
+_REPLACED_INDEXES = ["ix_gps_history_child_id_timestamp"]
+
+
+def _add_column_sql(table_name: str, column) -> str:
+    """ALTER TABLE ADD COLUMN d'une colonne ajoutée au modèle (nullable ou avec server_default)"""
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    return ddl
+
+
+def _delete_duplicates_sql(table_name: str, columns: list) -> str:
+    """DELETE des lignes en double sur `columns` (hors la première par id)"""
+    partition = ", ".join(f'"{name}"' for name in columns)
+    return (
+        f"DELETE FROM {table_name} WHERE id IN ("
+        f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY id) AS row_rank "
+        f"FROM {table_name}) ranked WHERE row_rank > 1)"
+    )
+
 
 def get_db():
 
@@ -22,3 +102,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Session async par requête (routes async def)"""
+    async with AsyncSessionLocal() as db:
+        yield db
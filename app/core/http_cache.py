@@ -0,0 +1,71 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match → 304)
+ETag fort calculé depuis une version connue à l'avance (last_update, version
+d'une journée d'historique) ou, à défaut, depuis le corps JSON de la réponse.
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Toujours revalidé (304 si rien n'a changé) : même un jour passé peut être
+# réécrit (rétention, import, lot rejoué en retard)
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fort (entre guillemets) dérivé des éléments de version donnés"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Vrai si If-None-Match contient l'ETag (comparaison faible, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def _headers(etag: str, cache_control: str) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    return Response(status_code=304, headers=_headers(etag, cache_control))
+
+
+def conditional(
+    request: Request,
+    content: bytes,
+    media_type: str,
+    etag: str,
+    cache_control: str = REVALIDATE_CACHE_CONTROL
+) -> Response:
+    """Réponse avec ETag, ou 304 si le client a déjà cette version"""
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return Response(content=content, media_type=media_type, headers=_headers(etag, cache_control))
+
+
+def conditional_json(
+    request: Request,
+    data: Any,
+    etag: Optional[str] = None,
+    cache_control: str = REVALIDATE_CACHE_CONTROL
+) -> Response:
+    """
+    Réponse JSON conditionnelle
+
+    Sans etag fourni, l'ETag est l'empreinte du corps sérialisé : la requête
+    DB est faite mais le client ne retélécharge rien si rien n'a changé.
+    """
+    content = json.dumps(jsonable_encoder(data), separators=(",", ":")).encode()
+    if etag is None:
+        etag = f'"{hashlib.sha1(content).hexdigest()[:32]}"'
+    return conditional(request, content, "application/json", etag, cache_control)
@@ -0,0 +1,183 @@
+"""
+Partitionnement mensuel de gps_history (PostgreSQL uniquement)
+
+Activé par GPS_HISTORY_PARTITIONING=true : gps_history devient une table
+partitionnée par RANGE sur timestamp, une partition par mois, créées à
+l'avance (mois en cours + GPS_HISTORY_PARTITIONS_AHEAD) au démarrage et par
+python -m app.cli create-partitions. Jamais depuis une ingestion : CREATE
+TABLE ... PARTITION OF prend un verrou ACCESS EXCLUSIVE sur gps_history,
+que la transaction d'ingestion bloquerait elle-même. Une partition DEFAULT
+reçoit les lignes d'un mois sans partition.
+"""
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Mois (année, mois) dont la partition est connue pour exister
+_known_partitions: set = set()
+
+_PARTITION_NAME = re.compile(r"gps_history_y(\d{4})m(\d{2})")
+
+
+def partitioning_enabled(engine: Engine) -> bool:
+    return settings.GPS_HISTORY_PARTITIONING and engine.dialect.name == "postgresql"
+
+
+def create_partitioned_gps_history(engine: Engine) -> None:
+    """Crée gps_history en table partitionnée si elle n'existe pas encore"""
+    if inspect(engine).has_table("gps_history"):
+        with engine.connect() as conn:
+            kind = conn.execute(text(
+                "SELECT relkind FROM pg_class WHERE relname = 'gps_history'"
+            )).scalar()
+        if kind != "p":
+            logger.warning(
+                "gps_history already exists and is not partitioned, "
+                "GPS_HISTORY_PARTITIONING ignored"
+            )
+        return
+
+    with engine.begin() as conn:
+        # La clé primaire d'une table partitionnée doit contenir la clé de partition
+        conn.execute(text("""
+            CREATE TABLE gps_history (
+                id SERIAL,
+                child_id INTEGER NOT NULL REFERENCES children (id),
+                latitude DOUBLE PRECISION NOT NULL,
+                longitude DOUBLE PRECISION NOT NULL,
+                battery INTEGER,
+                "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                end_timestamp TIMESTAMP WITH TIME ZONE,
+                fix_count INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        """))
+        conn.execute(text(
+            "CREATE TABLE gps_history_default PARTITION OF gps_history DEFAULT"
+        ))
+
+
+def _partition_names(conn) -> list:
+    return conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'gps_history'
+    """)).scalars().all()
+
+
+def create_upcoming_partitions(engine: Engine, months_ahead: Optional[int] = None) -> list:
+    """
+    Crée les partitions du mois en cours et des months_ahead mois suivants
+
+    Partitions existantes relues dans le catalogue : rien n'est recréé (ni
+    verrouillé) pour un mois qui a déjà la sienne.
+
+    Returns:
+        list: Mois (année, mois) couverts
+    """
+    if not partitioning_enabled(engine):
+        return []
+    if months_ahead is None:
+        months_ahead = settings.GPS_HISTORY_PARTITIONS_AHEAD
+
+    with engine.connect() as conn:
+        for name in _partition_names(conn):
+            match = _PARTITION_NAME.fullmatch(name)
+            if match is not None:
+                _known_partitions.add((int(match.group(1)), int(match.group(2))))
+
+    month = datetime.now(timezone.utc).date().replace(day=1)
+    months = []
+    for _ in range(months_ahead + 1):
+        months.append(month)
+        month = _next_month(month)
+    ensure_gps_history_partitions(engine, months)
+    return [(m.year, m.month) for m in months]
+
+
+def _next_month(day: date) -> date:
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def ensure_gps_history_partitions(engine: Engine, timestamps: Iterable[date]) -> None:
+    """
+    Crée les partitions mensuelles manquantes pour ces horodatages
+
+    Une transaction par partition, sur une connexion à part : à appeler hors
+    de toute transaction qui a lu ou écrit gps_history (elle attendrait son
+    propre verrou).
+    """
+    if not partitioning_enabled(engine):
+        return
+
+    months = {(ts.year, ts.month) for ts in timestamps} - _known_partitions
+    if not months:
+        return
+
+    for year, month in sorted(months):
+        start = date(year, month, 1)
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS gps_history_y{year}m{month:02d} "
+                    f"PARTITION OF gps_history FOR VALUES "
+                    f"FROM ('{start.isoformat()} 00:00:00+00') "
+                    f"TO ('{_next_month(start).isoformat()} 00:00:00+00')"
+                ))
+        except SQLAlchemyError:
+            # Ex : la partition DEFAULT contient déjà des lignes de ce mois
+            logger.exception("Could not create gps_history partition %d-%02d", year, month)
+        _known_partitions.add((year, month))
+
+
+def drop_gps_history_partitions_before(conn, before: date, copied: dict) -> list:
+    """
+    Supprime les partitions mensuelles entièrement antérieures à `before`
+
+    DROP d'une partition au lieu d'un DELETE de ses lignes : ni lignes
+    mortes à nettoyer par VACUUM, ni index à compacter. À exécuter dans la
+    transaction de la rétention, une fois les lignes recopiées. Chaque
+    partition est verrouillée puis comptée : si elle contient plus de lignes
+    que la rétention n'en a recopié (lignes en retard validées depuis sa
+    lecture), elle est gardée et ses lignes recopiées sont supprimées par
+    DELETE ; les autres le seront au prochain passage.
+
+    Args:
+        copied: Lignes recopiées par mois (année, mois)
+
+    Returns:
+        list: Noms des partitions supprimées
+    """
+    names = _partition_names(conn)
+
+    dropped = []
+    for name in sorted(names):
+        match = _PARTITION_NAME.fullmatch(name)
+        if match is None:
+            # Partition DEFAULT : ses lignes sont supprimées par DELETE
+            continue
+        year, month = int(match.group(1)), int(match.group(2))
+        if _next_month(date(year, month, 1)) > before:
+            continue
+        # Plus d'insertion possible jusqu'à la fin de la transaction
+        conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        count = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        if count != copied.get((year, month), 0):
+            logger.warning("Partition %s has rows the retention did not copy, kept", name)
+            continue
+        conn.execute(text(f"DROP TABLE {name}"))
+        _known_partitions.discard((year, month))
+        dropped.append(name)
+    return dropped
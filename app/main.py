@@ -1,26 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.routes.auth import router as auth_router
 from app.core.dependencies import get_current_user
-from app.routes import auth, locations, children, gps_tracking
-from app.core.database import Base, engine
-from app.models import User, Child, Location, GPSHistory
+from app.routes import auth, locations, children, gps_tracking, live
+from app.core.database import async_engine, init_db
+from app.services.gps_buffer import gps_buffer
+from app.services.roads_service import roads_client
 
-# Créer les tables
-Base.metadata.create_all(bind=engine)
+# Créer les tables (et les index manquants)
+init_db()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Flush périodique du buffer GPS, puis flush final à l'arrêt
+    await gps_buffer.start()
+    yield
+    await gps_buffer.stop()
+    await roads_client.aclose()
+    await async_engine.dispose()
 
 
 app = FastAPI(
     title="W.I.M.C",
     description="Where Is My Child",
-    version="0.0.1"
+    version="0.0.1",
+    lifespan=lifespan
 
 )
 app.include_router(auth_router)
 app.include_router(locations.router)
 app.include_router(children.router)
 app.include_router(gps_tracking.router, prefix="/api")
+app.include_router(live.router, prefix="/api")
 
 
 @app.get("/ping")
@@ -2,5 +2,9 @@ from app.models.user import User
 from .child import Child
 from .location import Location
 from .gps_history import GPSHistory
+from .snapped_track import SnappedTrack
+from .geofence_event import GeofenceEvent
+from .gps_daily_summary import GPSDailySummary
+from .gps_history_tier import GPSHistoryRollup, GPSHistoryArchive
 
 __all__ = ["User", "Location", "Child", ]
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class GeofenceEvent(Base):
+    """Entrée / sortie d'un enfant dans une zone de confiance, détectée à l'ingestion"""
+    __tablename__ = "geofence_events"
+    __table_args__ = (
+        # Lecture par curseur : événements d'un enfant après un id donné
+        Index("ix_geofence_events_child_id_id", "child_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    child_id = Column(Integer, ForeignKey("children.id", ondelete="CASCADE"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="SET NULL"), nullable=True)
+    zone_name = Column(String, nullable=False)  # Conservé si la zone est supprimée
+    event_type = Column(String(5), nullable=False)  # "enter" | "exit"
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+
+class GPSDailySummary(Base):
+    """Résumé d'une journée d'historique d'un enfant (jour UTC), tenu à jour à l'ingestion"""
+    __tablename__ = "gps_daily_summary"
+    __table_args__ = (
+        UniqueConstraint("child_id", "day", name="uq_gps_daily_summary_child_id_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    child_id = Column(Integer, ForeignKey("children.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    point_count = Column(Integer, nullable=False, default=0)
+    first_fix = Column(DateTime(timezone=True), nullable=False)
+    last_fix = Column(DateTime(timezone=True), nullable=False)
+    # Dernier point du jour : point de départ du prochain segment de distance
+    last_latitude = Column(Float, nullable=False)
+    last_longitude = Column(Float, nullable=False)
+    distance_m = Column(Float, nullable=False, default=0.0)
+    min_battery = Column(Integer, nullable=True)
+    min_latitude = Column(Float, nullable=False)
+    max_latitude = Column(Float, nullable=False)
+    min_longitude = Column(Float, nullable=False)
+    max_longitude = Column(Float, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.core.database import Base
@@ -6,6 +6,11 @@ from app.core.database import Base
 
 class GPSHistory(Base):
     __tablename__="gps_history"
+    __table_args__ = (
+        # Toutes les lectures d'historique filtrent child_id puis bornent timestamp.
+        # Unique : un fix est identifié par son horodatage émetteur (renvois ignorés)
+        Index("uq_gps_history_child_id_timestamp", "child_id", "timestamp", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     child_id = Column(Integer, ForeignKey("children.id"), nullable=False)
@@ -13,5 +18,9 @@ class GPSHistory(Base):
     longitude = Column(Float, nullable=False)
     battery = Column(Integer, nullable=True)
     timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Point d'arrêt : fixes consécutifs quasi identiques regroupés sur une ligne
+    # (timestamp = premier fix, end_timestamp = dernier, NULL si un seul fix)
+    end_timestamp = Column(DateTime(timezone=True), nullable=True)
+    fix_count = Column(Integer, nullable=False, default=1, server_default="1")
 
     child = relationship("Child", back_populates="gps_history")
@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, ForeignKey, Index, Integer, Text, UniqueConstraint
+from app.core.database import Base
+
+
+class GPSHistoryRollup(Base):
+    """Trace simplifiée des jours sortis de la pleine résolution (palier 2 de la rétention)"""
+    __tablename__ = "gps_history_rollup"
+    __table_args__ = (
+        Index("ix_gps_history_rollup_child_id_timestamp", "child_id", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    child_id = Column(Integer, ForeignKey("children.id", ondelete="CASCADE"), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    battery = Column(Integer, nullable=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+
+
+class GPSHistoryArchive(Base):
+    """Archive compacte d'une journée (palier 3) : polyline et horodatages delta-encodés"""
+    __tablename__ = "gps_history_archive"
+    __table_args__ = (
+        UniqueConstraint("child_id", "day", name="uq_gps_history_archive_child_id_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    child_id = Column(Integer, ForeignKey("children.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    point_count = Column(Integer, nullable=False)
+    # Format de to_polyline : secondes depuis start (epoch UTC), delta-encodées
+    polyline = Column(Text, nullable=False)
+    start = Column(BigInteger, nullable=False)
+    timestamps = Column(Text, nullable=False)
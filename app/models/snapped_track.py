@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Date, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class SnappedTrack(Base):
+    """Trace snap-to-roads d'un jour passé, mise en cache (les jours passés ne changent plus)"""
+    __tablename__ = "snapped_tracks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(128), unique=True, index=True, nullable=False)
+    child_id = Column(Integer, ForeignKey("children.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    points = Column(Text, nullable=False)  # JSON [{"latitude", "longitude"}, ...]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
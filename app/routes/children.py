@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.core.http_cache import conditional_json
 from app.core.security import get_current_user
 from app.models.user import User
 from app.schemas.child import ChildCreate, ChildResponse, ChildUpdate
@@ -28,21 +29,25 @@ def create_child_endpoint(
 
 @router.get("/", response_model=List[ChildResponse])
 def get_my_children(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer tous les enfants de l'utilisateur connecté"""
-    return get_children_by_parent(db, current_user.id)
+    children = get_children_by_parent(db, current_user.id)
+    return conditional_json(request, [ChildResponse.model_validate(obj) for obj in children])
 
 
 @router.get("/{child_id}", response_model=ChildResponse)
 def get_child_endpoint(
     child_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer un enfant spécifique"""
-    return get_child_by_id(db, child_id, current_user.id)
+    child = get_child_by_id(db, child_id, current_user.id)
+    return conditional_json(request, ChildResponse.model_validate(child))
 
 
 @router.put("/{child_id}", response_model=ChildResponse)
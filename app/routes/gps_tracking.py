@@ -1,73 +1,344 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
-from datetime import date
-from app.core.database import get_db
-from app.schemas.gps import GPSUpdate, GPSResponse
+from typing import List, Optional
+from datetime import date, timedelta
+from app.core.config import settings
+from app.core.database import SessionLocal, get_async_db, get_db
+from app.core.http_cache import (
+    REVALIDATE_CACHE_CONTROL,
+    conditional,
+    conditional_json,
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.gps import (
+    GPSUpdate,
+    GPSResponse,
+    GPSUpdateResponse,
+    GPSBatchUpdate,
+    GPSBatchResponse,
+    MultiChildGPSBatch,
+    GeofenceEventPage,
+    ChildPositionResponse,
+    DailySummaryResponse,
+    TimelineSegment,
+)
+from app.services.gps_buffer import gps_buffer
+from app.services import gps_async_service as gps_async
+from app.services.track_service import simplify_track
+from app.services.history_format_service import (
+    MSGPACK_MEDIA_TYPE,
+    to_msgpack,
+    to_polyline,
+)
+from app.services.geofence_service import get_geofence_events, get_parent_geofence_events
+from app.services.summary_service import get_daily_summaries
+from app.services.timeline_service import get_timeline
 from app.services.gps_service import (
+    get_child_or_404,
     update_child_gps,
-    get_child_last_position,
-    is_child_in_safe_zone,
+    update_child_gps_batch,
+    update_children_gps_batch,
+    export_gps_history,
+    day_bounds,
     get_gps_history,
     get_history_days,
-    snap_to_roads
+    get_history_distance,
+    get_history_version,
+    get_history_zones,
+    get_parent_positions,
+    is_child_in_safe_zone,
+    snap_history,
+    snapping_available
 )
 
 router = APIRouter(prefix="/gps", tags=["gps-tracking"])
 
 
-@router.post("/children/{child_id}/update", response_model=GPSResponse)
+async def _history_cache(db: Session, child_id: int, day: Optional[date], *params) -> tuple:
+    """
+    ETag et Cache-Control d'une journée d'historique
+
+    ETag = version du contenu du jour (+ paramètres de la requête), paliers de
+    rétention compris ; toujours revalidé : un jour passé peut encore changer
+    (rétention, import, lot rejoué en retard).
+    """
+    day = day or date.today()
+    version = await run_in_threadpool(get_history_version, db, child_id, day)
+    etag = make_etag(child_id, day, *version, *params)
+    return etag, REVALIDATE_CACHE_CONTROL
+
+
+@router.post("/children/{child_id}/update", response_model=GPSUpdateResponse)
 async def update_gps_endpoint(
     child_id: int,
     gps_data: GPSUpdate,
     db: Session = Depends(get_db)
 ):
-    """Endpoint pour recevoir les positions GPS de l'émetteur iPhone"""
-    return update_child_gps(db, child_id, gps_data)
+    """
+    Endpoint pour recevoir les positions GPS de l'émetteur iPhone
+
+    La réponse porte une consigne de cadence (`reporting`) : délai avant le
+    prochain envoi et déplacement minimal, à appliquer par l'émetteur.
+    """
+    if not settings.GPS_BUFFER_ENABLED:
+        return await run_in_threadpool(update_child_gps, db, child_id, gps_data)
+
+    # Seul le premier envoi d'un enfant touche la DB (vérification 404)
+    if not gps_buffer.is_known(child_id):
+        await run_in_threadpool(get_child_or_404, db, child_id)
+        gps_buffer.mark_known(child_id)
+
+    return gps_buffer.add(child_id, gps_data)
+
+
+@router.post("/children/{child_id}/batch", response_model=GPSBatchResponse)
+def update_gps_batch_endpoint(
+    child_id: int,
+    batch: GPSBatchUpdate,
+    db: Session = Depends(get_db)
+):
+    """Recevoir un lot de positions bufferisées hors-ligne par l'émetteur"""
+    return update_child_gps_batch(db, child_id, batch.fixes)
+
+
+@router.post("/batch", response_model=List[GPSBatchResponse])
+def update_gps_multi_batch_endpoint(
+    payload: MultiChildGPSBatch,
+    db: Session = Depends(get_db)
+):
+    """Recevoir des lots de positions pour plusieurs enfants en une transaction"""
+    return update_children_gps_batch(db, payload.batches)
 
 
 @router.get("/children/{child_id}/last-position", response_model=GPSResponse)
 async def get_last_position_endpoint(
     child_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Récupérer la dernière position connue d'un enfant"""
-    return get_child_last_position(db, child_id)
+    """Récupérer la dernière position connue d'un enfant (304 si inchangée)"""
+    position = await gps_async.get_child_last_position(db, child_id)
+    etag = make_etag(position.child_id, position.last_update, position.latitude,
+                     position.longitude, position.battery)
+    return conditional_json(request, position, etag)
+
+
+@router.get("/me/positions", response_model=List[ChildPositionResponse])
+async def get_my_positions(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Position, batterie et statut de zone de tous les enfants du parent connecté"""
+    return conditional_json(request, await run_in_threadpool(get_parent_positions, db, current_user.id))
 
 
 @router.get("/children/{child_id}/in-safe-zone")
 async def check_safe_zone_endpoint(
     child_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Vérifie si un enfant est dans une zone de confiance"""
-    return is_child_in_safe_zone(db, child_id)
+    return conditional_json(request, await run_in_threadpool(is_child_in_safe_zone, db, child_id))
+
+
+@router.get("/children/{child_id}/geofence-events", response_model=GeofenceEventPage)
+async def get_child_geofence_events(
+    child_id: int,
+    after: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Entrées / sorties de zones d'un enfant depuis le curseur `after`"""
+    await run_in_threadpool(get_child_or_404, db, child_id)
+    return await run_in_threadpool(get_geofence_events, db, [child_id], after, limit)
+
+
+@router.get("/me/geofence-events", response_model=GeofenceEventPage)
+async def get_my_geofence_events(
+    after: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Entrées / sorties de zones de tous les enfants du parent connecté (un seul curseur)"""
+    return await run_in_threadpool(get_parent_geofence_events, db, current_user.id, after, limit)
 
 
 @router.get("/children/{child_id}/history/days")
-def get_history_days_endpoint(
+async def get_history_days_endpoint(
     child_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Retourne la liste des jours avec des données GPS"""
-    return get_history_days(db, child_id)
+    return conditional_json(request, await run_in_threadpool(get_history_days, db, child_id))
+
+
+@router.get("/children/{child_id}/history/summary", response_model=List[DailySummaryResponse])
+async def get_history_summary_endpoint(
+    child_id: int,
+    request: Request,
+    from_: Optional[date] = Query(default=None, alias="from"),
+    to: Optional[date] = Query(default=None),
+    db: Session = Depends(get_db)
+):
+    """Résumé de chaque jour (points, distance, batterie min, emprise), du plus récent au plus ancien"""
+    summaries = await run_in_threadpool(get_daily_summaries, db, child_id, from_, to)
+    return conditional_json(request, [DailySummaryResponse.model_validate(s) for s in summaries])
+
+
+@router.get("/children/{child_id}/history/stream")
+def stream_child_history(
+    child_id: int,
+    from_: date = Query(alias="from"),
+    to: date = Query(),
+    format_: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db)
+):
+    """Export en flux (NDJSON ou CSV) de l'historique GPS du jour `from` au jour `to` inclus"""
+    if to < from_:
+        raise HTTPException(status_code=422, detail="'to' must be on or after 'from'")
+    get_child_or_404(db, child_id)
+
+    start = day_bounds(from_)[0]
+    end = day_bounds(to)[0] + timedelta(days=1)
+
+    def body():
+        # Session propre au flux : celle de get_db est fermée avant l'envoi
+        stream_db = SessionLocal()
+        try:
+            yield from export_gps_history(stream_db, child_id, start, end, format_)
+        finally:
+            stream_db.close()
+
+    extension = "csv" if format_ == "csv" else "ndjson"
+    return StreamingResponse(
+        body(),
+        media_type="text/csv" if format_ == "csv" else "application/x-ndjson",
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="child_{child_id}_{from_}_{to}.{extension}"'
+        }
+    )
+
+
+@router.get("/children/{child_id}/history/distance")
+async def get_child_history_distance(
+    child_id: int,
+    request: Request,
+    day: Optional[date] = Query(default=None),
+    db: Session = Depends(get_db)
+):
+    """Distance parcourue par un enfant sur une journée (mètres)"""
+    etag, cache_control = await _history_cache(db, child_id, day, "distance")
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    distance = await run_in_threadpool(get_history_distance, db, child_id, day)
+    return conditional_json(request, distance, etag, cache_control)
+
+
+@router.get("/children/{child_id}/history/zones")
+async def get_child_history_zones(
+    child_id: int,
+    request: Request,
+    day: Optional[date] = Query(default=None),
+    db: Session = Depends(get_db)
+):
+    """Zones de confiance traversées par un enfant sur une journée"""
+    # Dépend aussi des zones (modifiables) : ETag sur le contenu
+    return conditional_json(request, await run_in_threadpool(get_history_zones, db, child_id, day))
+
+
+@router.get("/children/{child_id}/timeline", response_model=List[TimelineSegment])
+async def get_child_timeline(
+    child_id: int,
+    request: Request,
+    day: Optional[date] = Query(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    Chronologie d'une journée : arrêts (avec leur zone de confiance) et trajets
+
+    Calculée côté serveur et mise à jour au fil des nouveaux points : l'app
+    n'a plus à télécharger toute la trace pour la reconstituer.
+    """
+    await run_in_threadpool(get_child_or_404, db, child_id)
+    # Dépend aussi des zones (modifiables) : ETag sur le contenu
+    return conditional_json(request, await run_in_threadpool(get_timeline, db, child_id, day))
 
 
 @router.get("/children/{child_id}/history")
 async def get_child_history(
     child_id: int,
+    request: Request,
     day: Optional[date] = Query(default=None),
     interval_seconds: int = Query(default=30),
     snap: bool = Query(default=False),
+    simplify: Optional[str] = Query(default=None, pattern="^(dp|vw)$"),
+    tolerance_m: float = Query(default=10.0, gt=0),
+    format_: str = Query(default="json", alias="format", pattern="^(json|polyline|msgpack)$"),
     db: Session = Depends(get_db)
 ):
-    """Historique GPS d'un enfant, avec snap-to-roads optionnel"""
-    points = get_gps_history(db, child_id, day, interval_seconds)
+    """
+    Historique GPS d'un enfant, avec simplification et snap-to-roads optionnels
+
+    format=json (défaut) | polyline (polyline Google + horodatages delta-encodés)
+    | msgpack (tableaux float32 compactés)
+
+    ETag = version du contenu du jour : un rafraîchissement sans nouveau point
+    répond 304 sans relire l'historique.
+    """
+    etag, cache_control = await _history_cache(
+        db, child_id, day, interval_seconds, snap and snapping_available(),
+        simplify, tolerance_m, format_
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+    if simplify:
+        # Simplification géométrique sur la trace complète du jour
+        points = await run_in_threadpool(get_gps_history, db, child_id, day, 0)
+        # Calcul CPU sur toute la journée : hors de la boucle d'événements
+        points = await run_in_threadpool(simplify_track, points, simplify, tolerance_m)
+    else:
+        points = await run_in_threadpool(get_gps_history, db, child_id, day, interval_seconds)
     
     if snap and points:
-        return await snap_to_roads(points)
-    
-    return [
-        {"latitude": p.latitude, "longitude": p.longitude, "timestamp": p.timestamp}
-        for p in points
-    ]
+        snapped, degraded = await snap_history(db, child_id, day, interval_seconds, points)
+        if degraded:
+            # Points bruts faute de snap : ETag distinct, jamais servi comme la trace snappée
+            etag, cache_control = make_etag(etag, "raw"), REVALIDATE_CACHE_CONTROL
+        if format_ == "json":
+            return conditional_json(request, snapped, etag, cache_control)
+        latitudes = [p["latitude"] for p in snapped]
+        longitudes = [p["longitude"] for p in snapped]
+        timestamps = None
+    else:
+        if format_ == "json":
+            return conditional_json(request, [
+                {"latitude": p.latitude, "longitude": p.longitude, "timestamp": p.timestamp}
+                for p in points
+            ], etag, cache_control)
+        latitudes = [p.latitude for p in points]
+        longitudes = [p.longitude for p in points]
+        timestamps = [p.timestamp for p in points]
+
+    if format_ == "polyline":
+        encoded = await run_in_threadpool(to_polyline, latitudes, longitudes, timestamps)
+        return conditional_json(request, encoded, etag, cache_control)
+    return conditional(
+        request,
+        await run_in_threadpool(to_msgpack, latitudes, longitudes, timestamps),
+        MSGPACK_MEDIA_TYPE,
+        etag,
+        cache_control
+    )
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import get_current_user, verify_token
+from app.models.user import User
+from app.services.child_service import get_children_by_parent
+from app.services.gps_service import get_child_last_position
+from app.services.live_hub import live_hub
+
+router = APIRouter(prefix="/gps", tags=["gps-live"])
+
+
+def _snapshot(child_ids: List[int]) -> List[dict]:
+    """Positions courantes des enfants (envoyées à la connexion)"""
+    db = SessionLocal()
+    try:
+        return [get_child_last_position(db, child_id).model_dump(mode="json") for child_id in child_ids]
+    finally:
+        db.close()
+
+
+def _parent_child_ids(parent_id: int, child_id: Optional[int] = None) -> List[int]:
+    """Enfants du parent (un seul si child_id est donné, 404 s'il n'est pas à lui)"""
+    db = SessionLocal()
+    try:
+        child_ids = [child.id for child in get_children_by_parent(db, parent_id)]
+    finally:
+        db.close()
+    if child_id is None:
+        return child_ids
+    if child_id not in child_ids:
+        raise HTTPException(status_code=404, detail="Child not found")
+    return [child_id]
+
+
+def _sse(message: dict) -> str:
+    return f"event: position\ndata: {json.dumps(message)}\n\n"
+
+
+@router.get("/stream")
+async def stream_positions(
+    request: Request,
+    child_id: Optional[int] = Query(default=None),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Positions en direct des enfants du parent connecté (Server-Sent Events)
+
+    Envoie d'abord la position courante de chaque enfant, puis chaque nouvelle
+    position ; un commentaire keep-alive toutes les LIVE_HEARTBEAT_SECONDS.
+    """
+    child_ids = await run_in_threadpool(_parent_child_ids, current_user.id, child_id)
+
+    async def events():
+        # Abonné avant la photo initiale : aucune position perdue entre les deux
+        sub = live_hub.subscribe(child_ids)
+        try:
+            for message in await run_in_threadpool(_snapshot, child_ids):
+                yield _sse(message)
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.get(), timeout=settings.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    # Client trop lent : déconnecté, il se reconnectera
+                    break
+                yield _sse(message)
+        finally:
+            live_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    """Lit (et ignore) les messages du client jusqu'à sa déconnexion"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ws")
+async def websocket_positions(
+    websocket: WebSocket,
+    token: Optional[str] = Query(default=None),
+    child_id: Optional[int] = Query(default=None)
+):
+    """
+    Positions en direct par WebSocket (même flux que /stream)
+
+    Authentification par ?token=<access token> ou en-tête Authorization
+    (les WebSocket des navigateurs ne permettent pas d'en-têtes).
+    """
+    header = websocket.headers.get("authorization", "")
+    token = token or (header[7:] if header.lower().startswith("bearer ") else None)
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
+        user_id = verify_token(token)["user_id"]
+        child_ids = await run_in_threadpool(_parent_child_ids, user_id, child_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    sub = live_hub.subscribe(child_ids)
+    receiver = asyncio.create_task(_wait_disconnect(websocket))
+    try:
+        for message in await run_in_threadpool(_snapshot, child_ids):
+            await websocket.send_json(message)
+        while True:
+            getter = asyncio.ensure_future(sub.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                break
+            message = getter.result()
+            if message is None:
+                # Client trop lent : fermé, il se reconnectera
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                break
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        live_hub.unsubscribe(sub)
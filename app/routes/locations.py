@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.core.http_cache import conditional_json
 from app.core.security import get_current_user
 from app.schemas.location import LocationCreate, LocationResponse, LocationUpdate
 from app.models.user import User
@@ -28,21 +29,25 @@ def create_location_endpoint(
 
 @router.get("/", response_model=List[LocationResponse])
 def get_my_locations(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer toutes les locations de tous les enfants du parent"""
-    return get_locations_by_parent(db, current_user.id)
+    locations = get_locations_by_parent(db, current_user.id)
+    return conditional_json(request, [LocationResponse.model_validate(obj) for obj in locations])
 
 
 @router.get("/{location_id}", response_model=LocationResponse)
 def get_location_endpoint(
     location_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer une location spécifique"""
-    return get_location_by_id(db, location_id, current_user.id)
+    location = get_location_by_id(db, location_id, current_user.id)
+    return conditional_json(request, LocationResponse.model_validate(location))
 
 
 @router.put("/{location_id}", response_model=LocationResponse)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from datetime import date, datetime
+from typing import List, Optional
 
 
 class GPSUpdate(BaseModel):
@@ -9,6 +9,14 @@ class GPSUpdate(BaseModel):
     longitude: float
     timestamp: str  # ISO format
     battery: Optional[int]
+    accuracy: Optional[float] = None  # Précision horizontale (m) rapportée par l'appareil
+
+    @field_validator("timestamp")
+    @classmethod
+    def timestamp_is_iso(cls, value: str) -> str:
+        """Horodatage illisible : 422 (l'identité du fix en dépend, pas de repli)"""
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return value
 
 
 class GPSResponse(BaseModel):
@@ -21,3 +29,102 @@ class GPSResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class ReportingHint(BaseModel):
+    """Consigne de cadence pour l'émetteur : délai avant le prochain envoi, déplacement minimal"""
+    mode: str
+    next_report_seconds: int
+    min_distance_m: float
+    low_battery: bool
+
+
+class GPSUpdateResponse(GPSResponse):
+    """Réponse à l'émetteur : position enregistrée + consigne de cadence"""
+    reporting: ReportingHint
+
+
+class ChildPositionResponse(GPSResponse):
+    """Position, batterie et statut de zone d'un enfant (carte du parent)"""
+    name: str
+    in_safe_zone: bool
+    zone_name: Optional[str]
+
+
+class DailySummaryResponse(BaseModel):
+    """Résumé d'une journée d'historique (calendrier, vue d'ensemble du jour)"""
+    day: date
+    point_count: int
+    first_fix: datetime
+    last_fix: datetime
+    distance_m: float
+    min_battery: Optional[int]
+    min_latitude: float
+    max_latitude: float
+    min_longitude: float
+    max_longitude: float
+
+    class Config:
+        from_attributes = True
+
+
+class TimelineSegment(BaseModel):
+    """Arrêt (stay, rapproché d'une zone de confiance) ou trajet (trip) d'une journée"""
+    type: str
+    start: datetime
+    end: datetime
+    duration_seconds: float
+    point_count: int
+    # Arrêts
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    zone_id: Optional[int] = None
+    zone_name: Optional[str] = None
+    ongoing: Optional[bool] = None
+    # Trajets
+    distance_m: Optional[float] = None
+
+
+class GPSBatchUpdate(BaseModel):
+    """Schema pour recevoir un lot de positions (rejeu après coupure réseau)"""
+    fixes: List[GPSUpdate] = Field(min_length=1, max_length=1000)
+
+
+class ChildGPSBatch(GPSBatchUpdate):
+    """Lot de positions pour un enfant donné (variante multi-enfants)"""
+    child_id: int
+
+
+class MultiChildGPSBatch(BaseModel):
+    """Schema pour recevoir des lots de positions de plusieurs enfants"""
+    batches: List[ChildGPSBatch] = Field(min_length=1, max_length=50)
+
+
+class GPSBatchResponse(BaseModel):
+    """Schema de réponse d'un lot : nombre de points insérés + position courante"""
+    child_id: int
+    inserted: int
+    last_position: GPSResponse
+    reporting: Optional[ReportingHint] = None
+
+
+class GeofenceEventResponse(BaseModel):
+    """Entrée / sortie de zone de confiance"""
+    id: int
+    child_id: int
+    location_id: Optional[int]
+    zone_name: str
+    event_type: str
+    latitude: float
+    longitude: float
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class GeofenceEventPage(BaseModel):
+    """Événements après un curseur ; cursor est à repasser en `after`"""
+    events: List[GeofenceEventResponse]
+    cursor: int
+    has_more: bool
@@ -5,6 +5,8 @@ Contient toute la logique métier pour les opérations CRUD sur les enfants
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.child import Child
+from app.services.position_cache import position_cache
+from app.services.zone_index import invalidate_child_zones
 from typing import List, Optional
 
 
@@ -107,9 +109,15 @@ def delete_child(db: Session, child_id: int, parent_id: int) -> None:
     Raises:
         HTTPException 404: Si l'enfant n'existe pas ou n'appartient pas au parent
     """
+    from app.services.gps_buffer import gps_buffer
+
     # Récupérer l'enfant (avec vérification propriétaire)
     child = get_child_by_id(db, child_id, parent_id)
     
     # Supprimer l'enfant
     db.delete(child)
     db.commit()
+    invalidate_child_zones(child_id)
+    position_cache.invalidate(child_id)
+    # Plus de positions bufferisées à écrire pour cet enfant (clé étrangère)
+    gps_buffer.forget(child_id)
@@ -0,0 +1,168 @@
+"""
+Dédoublonnage des points d'arrêt à l'ingestion
+Un enfant immobile (en classe, à la maison) envoie des fixes quasi
+identiques toutes les quelques secondes : ils sont regroupés sur une seule
+ligne de gps_history (timestamp du premier fix, end_timestamp du dernier,
+fix_count) au lieu d'une ligne par fix. Les fixes déjà enregistrés (même
+horodatage émetteur, ou compris dans un point d'arrêt) sont ignorés : un
+renvoi ou un lot rejoué ne crée ni ligne ni fix en plus.
+"""
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.gps_history import GPSHistory
+from app.services.geo_service import haversine
+
+
+def _aware(ts: Optional[datetime]) -> Optional[datetime]:
+    # SQLite relit des datetimes naïfs (stockés en UTC)
+    if ts is None or ts.tzinfo is not None:
+        return ts
+    return ts.replace(tzinfo=timezone.utc)
+
+
+def _threshold(accuracy: Optional[float]) -> float:
+    """Déplacement toléré : seuil fixe, ou précision rapportée si elle est moins bonne (plafonnée)"""
+    if accuracy is None:
+        return settings.GPS_DEDUP_DISTANCE_M
+    return min(max(settings.GPS_DEDUP_DISTANCE_M, accuracy), settings.GPS_DEDUP_MAX_DISTANCE_M)
+
+
+def _collapses(dwell: dict, ts: datetime, lat: float, lon: float, accuracy: Optional[float]) -> bool:
+    previous = dwell["end_timestamp"] or dwell["timestamp"]
+    gap = (ts - previous).total_seconds()
+    if gap < 0 or gap > settings.GPS_DEDUP_MAX_GAP_SECONDS:
+        return False
+    # Une ligne ne déborde pas sur le jour (UTC) suivant : calendrier, historique
+    # et résumés découpent par jour sur timestamp
+    if ts.astimezone(timezone.utc).date() != dwell["timestamp"].astimezone(timezone.utc).date():
+        return False
+    # Distance au premier fix de l'arrêt (pas au précédent : pas de dérive lente)
+    return float(haversine(dwell["latitude"], dwell["longitude"], lat, lon)) <= _threshold(accuracy)
+
+
+def _row(child_id: int, ts: datetime, lat: float, lon: float, battery: Optional[int]) -> dict:
+    return {
+        "child_id": child_id,
+        "latitude": lat,
+        "longitude": lon,
+        "battery": battery,
+        "timestamp": ts,
+        "end_timestamp": None,
+        "fix_count": 1,
+    }
+
+
+def _drop_stored_fixes(db: Session, child_id: int, fixes: list) -> list:
+    """Retire les fixes compris dans une ligne existante ([timestamp, end_timestamp])"""
+    first = fixes[0][0]
+    result = db.execute(
+        select(GPSHistory.timestamp, GPSHistory.end_timestamp)
+        .where(GPSHistory.child_id == child_id, GPSHistory.timestamp <= fixes[-1][0])
+        .order_by(GPSHistory.timestamp.desc())
+        .execution_options(yield_per=100)
+    )
+    spans = []
+    for start, end in result:
+        start = _aware(start)
+        end = _aware(end) or start
+        # Lignes disjointes, parcourues de la plus récente à la plus ancienne
+        if end < first:
+            break
+        spans.append((start, end))
+    result.close()
+
+    spans.reverse()
+    starts = [start for start, _ in spans]
+    kept = []
+    for fix in fixes:
+        i = bisect_right(starts, fix[0]) - 1
+        if i < 0 or fix[0] > spans[i][1]:
+            kept.append(fix)
+    return kept
+
+
+def _extend(dwell: dict, ts: datetime, battery: Optional[int]) -> None:
+    dwell["end_timestamp"] = ts
+    dwell["fix_count"] += 1
+    # Batterie la plus basse de l'arrêt (résumés, alertes), pas celle du premier fix
+    if battery is not None and (dwell["battery"] is None or battery < dwell["battery"]):
+        dwell["battery"] = battery
+
+
+def collapse_stationary_fixes(db: Session, child_id: int, fixes: list) -> Tuple[List[dict], int, Optional[dict]]:
+    """
+    Lignes gps_history à insérer pour des fixes d'un enfant
+
+    Les fixes qui prolongent la dernière ligne de l'enfant la mettent à jour
+    (UPDATE dans la transaction en cours) ; les autres sont regroupés entre
+    eux. Un point d'arrêt ne passe jamais minuit (UTC) et garde la batterie
+    la plus basse de ses fixes. Les fixes en retard (antérieurs à la dernière ligne) ont chacun leur
+    ligne. Dernière ligne verrouillée (FOR UPDATE) : deux ingestions
+    simultanées du même enfant ne prolongent pas la même ligne, et la seconde
+    voit les fixes déjà écrits par la première.
+
+    Args:
+        fixes: Tuples (timestamp, latitude, longitude, battery, accuracy) triés
+            par timestamp, sans doublon
+
+    Returns:
+        tuple: Lignes à insérer (dicts pour insert(GPSHistory)), nombre de
+        fixes nouveaux (hors fixes déjà enregistrés), dernière ligne existante
+        si elle a été prolongée (None sinon), pour le résumé de son jour
+    """
+    if not fixes:
+        return [], 0, None
+
+    last = db.execute(
+        select(GPSHistory.id, GPSHistory.latitude, GPSHistory.longitude, GPSHistory.battery,
+               GPSHistory.timestamp, GPSHistory.end_timestamp, GPSHistory.fix_count)
+        .where(GPSHistory.child_id == child_id)
+        .order_by(GPSHistory.timestamp.desc(), GPSHistory.id.desc())
+        .limit(1)
+        .with_for_update()
+    ).first()
+
+    existing = None
+    if last is not None:
+        existing = dict(last._mapping)
+        existing["timestamp"] = _aware(existing["timestamp"])
+        existing["end_timestamp"] = _aware(existing["end_timestamp"])
+        # Renvoi ou lot rejoué : fixes antérieurs à la fin de la dernière ligne
+        if fixes[0][0] <= (existing["end_timestamp"] or existing["timestamp"]):
+            fixes = _drop_stored_fixes(db, child_id, fixes)
+
+    if not settings.GPS_DEDUP_ENABLED:
+        return [_row(child_id, *fix[:4]) for fix in fixes], len(fixes), None
+
+    current = existing
+    initial_count = existing["fix_count"] if existing else 0
+
+    rows = []
+    for ts, lat, lon, battery, accuracy in fixes:
+        if existing is not None and ts < existing["timestamp"]:
+            rows.append(_row(child_id, ts, lat, lon, battery))
+            continue
+        if current is not None and _collapses(current, ts, lat, lon, accuracy):
+            _extend(current, ts, battery)
+            continue
+        current = _row(child_id, ts, lat, lon, battery)
+        rows.append(current)
+
+    if existing is None or existing["fix_count"] == initial_count:
+        return rows, len(fixes), None
+
+    db.execute(
+        update(GPSHistory)
+        # timestamp : élagage des partitions (clé primaire (id, timestamp))
+        .where(GPSHistory.id == last.id, GPSHistory.timestamp == last.timestamp)
+        .values(end_timestamp=existing["end_timestamp"], fix_count=existing["fix_count"],
+                battery=existing["battery"])
+    )
+    return rows, len(fixes), existing
+
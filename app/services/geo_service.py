@@ -0,0 +1,45 @@
+"""
+Calculs géodésiques vectorisés (NumPy)
+Haversine sur des tableaux de points : distances point à point, matrice
+points × zones, longueur d'une trace. calculate_distance (gps_service)
+reste la version scalaire pour un seul couple de points.
+"""
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Distance haversine en mètres, avec broadcasting NumPy
+
+    Accepte scalaires ou tableaux de formes compatibles (mêmes résultats que
+    calculate_distance à la précision float64 près).
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    # Arrondis flottants : a peut dépasser 1 de quelques ulp aux antipodes
+    a = np.clip(a, 0.0, 1.0)
+    return EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_matrix(lats, lons, zone_lats, zone_lons) -> np.ndarray:
+    """Distances de chaque point (n) à chaque zone (m) : tableau (n, m) en mètres"""
+    lats = np.asarray(lats, dtype=np.float64)[:, None]
+    lons = np.asarray(lons, dtype=np.float64)[:, None]
+    zone_lats = np.asarray(zone_lats, dtype=np.float64)[None, :]
+    zone_lons = np.asarray(zone_lons, dtype=np.float64)[None, :]
+    return haversine(lats, lons, zone_lats, zone_lons)
+
+
+def path_length(lats, lons) -> float:
+    """Longueur totale d'une trace en mètres (somme des segments successifs)"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if len(lats) < 2:
+        return 0.0
+    return float(haversine(lats[:-1], lons[:-1], lats[1:], lons[1:]).sum())
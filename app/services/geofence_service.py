@@ -0,0 +1,196 @@
+"""
+Moteur d'événements de géofencing
+Machine à états par enfant alimentée à l'ingestion : détecte les entrées et
+sorties des zones de confiance et les enregistre dans geofence_events.
+Hystérésis : entrée dès que le point est dans le rayon, sortie seulement
+au-delà de rayon + GEOFENCE_HYSTERESIS_M (le bruit GPS au bord de la zone ne
+génère pas d'allers-retours).
+
+Limite connue : seuls les fixes postérieurs à la position courante
+(children.last_update) font avancer la machine à états. Un fix reçu en
+retard (lot hors ligne renvoyé après un fix plus récent) est enregistré
+dans gps_history mais ne génère pas d'entrée / sortie : les événements sont
+lus par curseur (id croissant), un événement daté dans le passé serait
+inséré derrière le curseur déjà lu par les parents, et l'état courant
+(dernier événement par zone) deviendrait faux. Les passages manqués
+restent visibles dans l'historique et la chronologie du jour.
+
+Concurrence : l'ingestion verrouille la ligne children (SELECT ... FOR
+UPDATE) avant la détection, deux ingestions du même enfant (flush du
+buffer et /gps/batch, ou deux workers) détectent donc l'une après l'autre.
+L'état en mémoire est daté par la position jusqu'à laquelle il a été
+calculé : s'il ne correspond plus à children.last_update (commit d'une
+autre ingestion pas encore retenu, autre worker), il est rechargé depuis
+geofence_events.
+
+Lecture par curseur : les ids sont attribués à l'insertion, pas au commit.
+Deux ingestions concurrentes (enfants différents) peuvent commiter un id plus
+petit après un id plus grand : un parent qui relit depuis le dernier id vu
+sauterait le premier. Les événements ne sont donc servis qu'après
+GEOFENCE_EVENTS_SAFETY_LAG_SECONDS (created_at fixé à la détection, sous le
+verrou de l'enfant), et jamais au-delà d'un événement plus récent que ce délai.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.child import Child
+from app.models.geofence_event import GeofenceEvent
+from app.services.zone_index import get_zone_index
+
+ENTER = "enter"
+EXIT = "exit"
+
+# Par enfant : (horodatage de la position jusqu'à laquelle l'état est calculé,
+# zones (ids de location) où il se trouve), d'après les événements commités
+_states: Dict[int, Tuple[Optional[datetime], Set[int]]] = {}
+_lock = threading.Lock()
+
+
+def _load_state(db: Session, child_id: int) -> Set[int]:
+    """État reconstruit depuis la DB : dernier événement de chaque zone"""
+    latest = (
+        select(func.max(GeofenceEvent.id))
+        .where(GeofenceEvent.child_id == child_id, GeofenceEvent.location_id.isnot(None))
+        .group_by(GeofenceEvent.location_id)
+    )
+    rows = db.execute(
+        select(GeofenceEvent.location_id, GeofenceEvent.event_type)
+        .where(GeofenceEvent.id.in_(latest))
+    ).all()
+    return {row.location_id for row in rows if row.event_type == ENTER}
+
+
+def detect_geofence_events(
+    db: Session,
+    child_id: int,
+    fixes: list,
+    since: Optional[datetime]
+) -> Tuple[List[GeofenceEvent], tuple]:
+    """
+    Fait avancer la machine à états d'un enfant sur des positions
+
+    À appeler avec la ligne children verrouillée (FOR UPDATE) jusqu'au commit.
+
+    Args:
+        fixes: Tuples (timestamp, latitude, longitude) dans l'ordre
+            chronologique, tous postérieurs à la position courante (les fixes
+            en retard ne sont pas rejoués, cf. docstring du module)
+        since: Position courante (children.last_update lu sous le verrou)
+
+    Returns:
+        tuple: (événements ajoutés à la session, non commités ; nouvel état à
+        passer à save_geofence_states une fois le commit fait)
+    """
+    until = fixes[-1][0]
+    index = get_zone_index(db, child_id)
+    if not index.zones:
+        return [], (until, set())
+
+    cached = _states.get(child_id)
+    if cached is not None and cached[0] == since:
+        state = cached[1]
+    else:
+        # Inconnu, ou calculé jusqu'à une autre position : l'état commité fait foi
+        state = _load_state(db, child_id)
+
+    # Zones supprimées entre-temps : plus suivies
+    ids = np.array([zone.id for zone in index.zones], dtype=np.int64)
+    inside = np.isin(ids, list(state))
+    radii = index.radii
+    exit_radii = radii + settings.GEOFENCE_HYSTERESIS_M
+
+    distances = index.distances([f[1] for f in fixes], [f[2] for f in fixes])
+    detected_at = datetime.now(timezone.utc)
+    events = []
+    for (ts, lat, lon), row in zip(fixes, distances):
+        exited = inside & (row > exit_radii)
+        entered = ~inside & (row <= radii)
+        if not (exited.any() or entered.any()):
+            continue
+        # Sorties d'abord : passage d'une zone à une zone voisine
+        for event_type, mask in ((EXIT, exited), (ENTER, entered)):
+            for position in np.flatnonzero(mask):
+                zone = index.zones[position]
+                events.append(GeofenceEvent(
+                    child_id=child_id,
+                    location_id=zone.id,
+                    zone_name=zone.name,
+                    event_type=event_type,
+                    latitude=lat,
+                    longitude=lon,
+                    timestamp=ts,
+                    created_at=detected_at
+                ))
+        inside = (inside & ~exited) | entered
+
+    db.add_all(events)
+    return events, (until, {int(i) for i in ids[inside]})
+
+
+def save_geofence_states(states: Dict[int, tuple]) -> None:
+    """Retient les nouveaux états (renvoyés par detect_geofence_events) après un commit réussi"""
+    with _lock:
+        _states.update(states)
+
+
+def current_zones(child_id: int) -> Set[int]:
+    """Zones où se trouve l'enfant d'après le dernier état commité (vide si inconnu)"""
+    return _states.get(child_id, (None, set()))[1]
+
+
+def clear_geofence_states() -> None:
+    with _lock:
+        _states.clear()
+
+
+def get_geofence_events(
+    db: Session,
+    child_ids: List[int],
+    after: int = 0,
+    limit: int = 100
+) -> dict:
+    """
+    Événements postérieurs au curseur `after` (id du dernier événement lu)
+
+    Seuls les événements détectés depuis plus de
+    GEOFENCE_EVENTS_SAFETY_LAG_SECONDS sont servis, et seulement en deçà du
+    plus petit id encore dans ce délai : un id plus petit commité plus tard
+    n'est pas sauté par le curseur (cf. docstring du module).
+
+    Returns:
+        dict: {"events", "cursor" (à repasser en `after`), "has_more"}
+    """
+    settled = datetime.now(timezone.utc) - timedelta(seconds=settings.GEOFENCE_EVENTS_SAFETY_LAG_SECONDS)
+    pending = db.query(func.min(GeofenceEvent.id)).filter(
+        GeofenceEvent.child_id.in_(child_ids),
+        GeofenceEvent.id > after,
+        GeofenceEvent.created_at > settled
+    ).scalar()
+
+    query = db.query(GeofenceEvent).filter(
+        GeofenceEvent.child_id.in_(child_ids),
+        GeofenceEvent.id > after
+    )
+    if pending is not None:
+        query = query.filter(GeofenceEvent.id < pending)
+    events = query.order_by(GeofenceEvent.id.asc()).limit(limit + 1).all()
+
+    has_more = len(events) > limit
+    events = events[:limit]
+    return {
+        "events": events,
+        "cursor": events[-1].id if events else after,
+        "has_more": has_more,
+    }
+
+
+def get_parent_geofence_events(db: Session, parent_id: int, after: int = 0, limit: int = 100) -> dict:
+    """Événements de tous les enfants d'un parent (un seul curseur)"""
+    child_ids = [row.id for row in db.query(Child.id).filter(Child.parent_id == parent_id)]
+    return get_geofence_events(db, child_ids, after, limit)
@@ -0,0 +1,43 @@
+"""
+Services GPS pour les routes async (AsyncSession, asyncpg / aiosqlite)
+Seules les lectures d'une ligne, les plus fréquentes (dernière position,
+enfant), sont écrites en async natif. Les autres lectures (historique,
+chronologie, zones, résumés, événements) passent par les services
+synchrones appelés dans le threadpool (run_in_threadpool) avec une session
+synchrone : requêtes et calculs y tournent hors de la boucle d'événements.
+AsyncSession.run_sync n'est pas utilisé : il exécute le service sur le
+thread de la boucle et la bloquerait pendant tout le calcul.
+"""
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.child import Child
+from app.schemas.gps import GPSResponse
+from app.services import gps_service
+from app.services.position_cache import position_cache
+
+
+async def get_child_or_404(db: AsyncSession, child_id: int) -> Child:
+    """Récupérer un enfant ou lever une 404"""
+    child = await db.get(Child, child_id)
+    if not child:
+        raise HTTPException(status_code=404, detail="Child not found")
+    return child
+
+
+async def get_child_last_position(db: AsyncSession, child_id: int) -> GPSResponse:
+    """Dernière position d'un enfant : buffer d'ingestion, cache, puis DB"""
+    from app.services.gps_buffer import gps_buffer
+
+    buffered = gps_buffer.latest(child_id)
+    if buffered:
+        return buffered
+
+    cached = position_cache.get(child_id)
+    if cached:
+        return cached
+
+    child = await get_child_or_404(db, child_id)
+    response = gps_service._to_response(child)
+    position_cache.put(response)
+    return response
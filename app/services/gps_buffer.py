@@ -0,0 +1,261 @@
+"""
+Buffer d'ingestion GPS (write-behind)
+Acquitte les positions immédiatement, les regroupe par enfant et les écrit
+en lot dans gps_history sur seuil de taille ou de temps
+"""
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.child import Child
+from app.schemas.gps import GPSUpdate, GPSResponse, GPSUpdateResponse
+from app.services.live_hub import live_hub
+from app.services.position_cache import position_cache
+from app.services.reporting_service import reporting_hint
+
+logger = logging.getLogger(__name__)
+
+
+class GPSIngestBuffer:
+    """
+    File d'attente en mémoire des positions GPS, bornée
+
+    - add() acquitte la position sans toucher à la DB (429 si le buffer est plein)
+      et la diffuse aux abonnés en direct
+    - latest() expose la dernière position non encore écrite d'un enfant
+    - flush() écrit tout le contenu en une transaction (via _ingest_batches)
+    - start()/stop() pilotent la tâche de flush périodique et le flush final
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_points: int = 20000,
+        flush_size: int = 500,
+        flush_interval: float = 2.0,
+    ):
+        self._session_factory = session_factory
+        self.max_points = max_points
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending: Dict[int, List[GPSUpdate]] = {}
+        self._latest: Dict[int, GPSResponse] = {}
+        self._known_children: set = set()
+        self._size = 0
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def is_known(self, child_id: int) -> bool:
+        return child_id in self._known_children
+
+    def mark_known(self, child_id: int) -> None:
+        self._known_children.add(child_id)
+
+    def forget(self, child_id: int) -> None:
+        """Enfant supprimé : positions en attente abandonnées, plus considéré comme connu"""
+        with self._lock:
+            self._known_children.discard(child_id)
+            self._size -= len(self._pending.pop(child_id, []))
+            self._latest.pop(child_id, None)
+
+    def add(self, child_id: int, gps_data: GPSUpdate) -> GPSUpdateResponse:
+        """
+        Ajoute une position au buffer et renvoie la position courante
+
+        Un fix plus ancien que la position courante (renvoi, lot rejoué) est
+        bufferisé (l'écriture l'ignore s'il est déjà en base) sans remplacer
+        la position courante ni être diffusé.
+
+        Consigne de cadence calculée sans DB : statut de zone d'après le
+        dernier état commité (au plus un flush de retard).
+
+        Raises:
+            HTTPException 429: Si le buffer a atteint max_points
+        """
+        from app.services.gps_service import _aware, parse_fix_timestamp
+
+        ts = parse_fix_timestamp(gps_data, child_id)
+        response = GPSResponse(
+            child_id=child_id,
+            latitude=gps_data.latitude,
+            longitude=gps_data.longitude,
+            last_update=ts,
+            battery=gps_data.battery
+        )
+        # Position courante connue sans DB : buffer, sinon cache (dernier flush)
+        cached = None if child_id in self._latest else position_cache.get(child_id)
+
+        with self._lock:
+            if self._size >= self.max_points:
+                raise HTTPException(
+                    status_code=429,
+                    detail="GPS ingest buffer full",
+                    headers={"Retry-After": str(max(1, round(self.flush_interval)))}
+                )
+            self._pending.setdefault(child_id, []).append(gps_data)
+            # Fix en retard (renvoi, lot rejoué) : la position courante ne recule pas
+            current = self._latest.get(child_id) or cached
+            newer = current is None or current.last_update is None or ts > _aware(current.last_update)
+            if newer:
+                self._latest[child_id] = response
+            self._size += 1
+            full = self._size >= self.flush_size
+
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+        # Diffusée dès l'acquittement, sans attendre l'écriture en DB
+        if newer:
+            live_hub.publish(response)
+
+        position = response if newer else current
+        hint = reporting_hint(child_id, [(ts, gps_data.latitude, gps_data.longitude)], gps_data.battery)
+        return GPSUpdateResponse(**position.model_dump(), reporting=hint)
+
+    def latest(self, child_id: int) -> Optional[GPSResponse]:
+        """Dernière position bufferisée d'un enfant (None si tout est écrit)"""
+        return self._latest.get(child_id)
+
+    def _requeue(self, pending: Dict[int, List[GPSUpdate]]) -> None:
+        with self._lock:
+            for child_id, fixes in pending.items():
+                self._pending[child_id] = fixes + self._pending.get(child_id, [])
+                self._size += len(fixes)
+
+    def _ingest_each(self, db: Session, batches: Dict[int, List[GPSUpdate]]) -> Tuple[Set[int], Set[int]]:
+        """
+        Écrit les lots enfant par enfant, après l'échec du lot commun
+
+        Erreur permanente (enfant supprimé pendant le flush : clé étrangère,
+        404) : lot abandonné, pas remis en file (il échouerait à chaque
+        flush). Autre erreur : lot remis dans le buffer.
+
+        Returns:
+            tuple: Enfants écrits, enfants dont le lot a été abandonné
+        """
+        from app.services.gps_service import _ingest_batches
+
+        written, dropped = set(), set()
+        for child_id, fixes in batches.items():
+            try:
+                _ingest_batches(db, {child_id: fixes}, publish=False)
+                written.add(child_id)
+            except (IntegrityError, HTTPException):
+                db.rollback()
+                dropped.add(child_id)
+                logger.error("GPS buffer dropped %d fixes for child %d", len(fixes), child_id, exc_info=True)
+            except Exception:
+                db.rollback()
+                self._requeue({child_id: fixes})
+                logger.exception("GPS buffer flush failed, child %d re-queued", child_id)
+        return written, dropped
+
+    def flush(self) -> int:
+        """
+        Écrit tout le contenu du buffer en une transaction
+
+        Les positions d'enfants supprimés entre-temps sont abandonnées. Si le
+        lot échoue sur une erreur d'intégrité, les enfants sont réécrits un
+        par un (_ingest_each) : seul le lot fautif est abandonné. En cas
+        d'autre erreur DB, les positions sont remises dans le buffer.
+
+        Returns:
+            int: Nombre de positions écrites
+        """
+        from app.services.gps_service import _ingest_batches
+
+        with self._lock:
+            pending, self._pending, self._size = self._pending, {}, 0
+            snapshot = {child_id: self._latest.get(child_id) for child_id in pending}
+
+        if not pending:
+            return 0
+
+        db = self._session_factory()
+        unknown = set()
+        batches = {}
+        try:
+            existing = {
+                row[0] for row in
+                db.query(Child.id).filter(Child.id.in_(list(pending))).all()
+            }
+            unknown = set(pending) - existing
+            batches = {
+                child_id: fixes for child_id, fixes in pending.items()
+                if child_id in existing
+            }
+            if batches:
+                _ingest_batches(db, batches, publish=False)
+        except (IntegrityError, HTTPException):
+            db.rollback()
+            written, dropped = self._ingest_each(db, batches)
+            unknown |= dropped
+            batches = {child_id: fixes for child_id, fixes in batches.items() if child_id in written}
+        except Exception:
+            db.rollback()
+            self._requeue(pending)
+            logger.exception("GPS buffer flush failed, %d children re-queued", len(pending))
+            return 0
+        finally:
+            db.close()
+
+        if unknown:
+            logger.warning("GPS buffer dropped fixes for unknown children %s", sorted(unknown))
+
+        with self._lock:
+            # Ne retire que les positions déjà écrites (pas celles arrivées pendant le flush)
+            for child_id, response in snapshot.items():
+                if child_id not in self._pending and self._latest.get(child_id) is response:
+                    del self._latest[child_id]
+            self._known_children -= unknown
+
+        return sum(len(fixes) for fixes in batches.values())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await run_in_threadpool(self.flush)
+
+    async def start(self) -> None:
+        """Démarre la tâche de flush périodique (au démarrage de l'app)"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrête la tâche de flush et écrit ce qui reste (à l'arrêt de l'app)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await run_in_threadpool(self.flush)
+
+
+gps_buffer = GPSIngestBuffer(
+    SessionLocal,
+    max_points=settings.GPS_BUFFER_MAX_POINTS,
+    flush_size=settings.GPS_BUFFER_FLUSH_SIZE,
+    flush_interval=settings.GPS_BUFFER_FLUSH_INTERVAL_SECONDS,
+)
@@ -1,45 +1,90 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from datetime import timezone, datetime, date
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from datetime import timezone, datetime, date, timedelta
+from typing import List, Optional, Tuple
+from app.core.cache import build_cache
+from app.core.config import settings
 from app.models.child import Child
-from app.schemas.gps import GPSUpdate, GPSResponse
+from app.schemas.gps import (
+    GPSUpdate,
+    GPSResponse,
+    GPSUpdateResponse,
+    ChildPositionResponse,
+    GPSBatchResponse,
+    ChildGPSBatch,
+)
 from app.models.gps_history import GPSHistory
-from sqlalchemy import func
+from app.models.gps_daily_summary import GPSDailySummary
+from app.models.gps_history_tier import GPSHistoryArchive, GPSHistoryRollup
+from app.services.geofence_service import detect_geofence_events, save_geofence_states
+from app.services.live_hub import live_hub
+from app.services.position_cache import position_cache
+from app.services.reporting_service import reporting_hint
+from app.services.dwell_service import collapse_stationary_fixes
+from app.services.retention_service import FULL, get_tier_points, history_tier, iter_tier_points
+from app.services.summary_service import record_daily_summaries, record_dwell_extension
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
 
+import json
 import math
-import httpx
 import os
 
 
-def update_child_gps(
-    db: Session, 
-    child_id: int, 
-    gps_data: GPSUpdate,
-) -> GPSResponse:
-    """Mettre à jour la position GPS d'un enfant"""
-    
-    child = db.query(Child).filter(Child.id == child_id).first()
-    if not child:
-        raise HTTPException(status_code=404, detail="Child not found")
-    
-    child.last_latitude = gps_data.latitude
-    child.last_longitude = gps_data.longitude
-    child.last_update = datetime.now(timezone.utc)
-    child.battery = gps_data.battery
-    
-    db.commit()
-    db.refresh(child)
-    
-    history_entry = GPSHistory(
-        child_id=child.id,
-        latitude=gps_data.latitude,
-        longitude=gps_data.longitude,
-        battery=gps_data.battery
-    )
-    db.add(history_entry)
-    db.commit()
+# Avance d'horloge mesurée par enfant (secondes), partagée entre workers si Redis
+_clock_offsets = build_cache(settings.CACHE_BACKEND, settings.REDIS_URL)
+
+
+def _clock_offset(child_id: int, ts: datetime, now: datetime) -> float:
+    """
+    Avance de l'horloge de l'émetteur, ancrée sur le premier fix trop en avance
+
+    Gardée GPS_CLOCK_OFFSET_TTL_SECONDS sans être réévaluée, tant qu'elle
+    suffit à ramener les fixes sous GPS_MAX_CLOCK_SKEW_SECONDS : un même fix
+    renvoyé retombe sur le même horodatage, et l'écart entre fixes est gardé.
+    """
+    anchored = {}
+
+    def anchor(current: Optional[float]) -> Optional[float]:
+        if current is not None and (ts - now).total_seconds() - current <= settings.GPS_MAX_CLOCK_SKEW_SECONDS:
+            anchored["offset"] = current
+            return None
+        anchored["offset"] = (ts - now).total_seconds()
+        return anchored["offset"]
+
+    _clock_offsets.update(f"clock_offset:{child_id}", anchor, settings.GPS_CLOCK_OFFSET_TTL_SECONDS)
+    return anchored["offset"]
+
+
+def clear_clock_offsets() -> None:
+    """Oublie les avances mesurées (backend mémoire uniquement, utilisé par les tests)"""
+    _clock_offsets.clear()
+
+
+def parse_fix_timestamp(gps_data: GPSUpdate, child_id: int) -> datetime:
+    """
+    Horodatage envoyé par l'émetteur (UTC), identité du fix (index unique)
 
+    Trop en avance sur l'heure serveur (une position dans le futur bloquerait
+    children.last_*) : recalé de l'avance mesurée de l'horloge de l'émetteur
+    (_clock_offset), pas sur l'heure serveur qui changerait à chaque renvoi.
+
+    Raises:
+        HTTPException 422: Horodatage illisible
+    """
+    try:
+        ts = datetime.fromisoformat(gps_data.timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=422, detail="Invalid fix timestamp")
+    ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+    now = datetime.now(timezone.utc)
+    if (ts - now).total_seconds() > settings.GPS_MAX_CLOCK_SKEW_SECONDS:
+        return ts - timedelta(seconds=_clock_offset(child_id, ts, now))
+    return ts
+
+
+def _to_response(child: Child) -> GPSResponse:
     return GPSResponse(
         child_id=child.id,
         latitude=child.last_latitude,
@@ -49,103 +94,559 @@ def update_child_gps(
     )
 
 
+def get_child_or_404(db: Session, child_id: int) -> Child:
+    """Récupérer un enfant ou lever une 404"""
+    child = db.query(Child).filter(Child.id == child_id).first()
+    if not child:
+        raise HTTPException(status_code=404, detail="Child not found")
+    return child
+
+
+def update_child_gps(
+    db: Session, 
+    child_id: int, 
+    gps_data: GPSUpdate,
+) -> GPSUpdateResponse:
+    """
+    Mettre à jour la position GPS d'un enfant (+ consigne de cadence pour l'émetteur)
+
+    Horodaté par l'émetteur : un fix renvoyé (réponse perdue, retry) n'est
+    pas réécrit et ne fait pas reculer la position courante.
+    """
+    result = _ingest_batches(db, {child_id: [gps_data]})[0]
+    return GPSUpdateResponse(**result.last_position.model_dump(), reporting=result.reporting)
+
+
+def _aware(ts: Optional[datetime]) -> Optional[datetime]:
+    # SQLite relit des datetimes naïfs (stockés en UTC)
+    if ts is None or ts.tzinfo is not None:
+        return ts
+    return ts.replace(tzinfo=timezone.utc)
+
+
+_DIALECT_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _insert_history(db: Session, rows: List[dict]) -> set:
+    """
+    INSERT ... ON CONFLICT DO NOTHING sur (child_id, timestamp)
+
+    Returns:
+        set: (child_id, timestamp) des lignes réellement insérées (sans celles
+        écrites entre-temps par une ingestion concurrente du même lot)
+    """
+    stmt = (
+        _DIALECT_INSERT[db.get_bind().dialect.name](GPSHistory)
+        .on_conflict_do_nothing(index_elements=["child_id", "timestamp"])
+        .returning(GPSHistory.child_id, GPSHistory.timestamp)
+    )
+    return {(child_id, _aware(ts)) for child_id, ts in db.execute(stmt, rows)}
+
+
+def _advance_position(db: Session, child_id: int, ts: datetime, latitude: float,
+                      longitude: float, battery: Optional[int]) -> bool:
+    """
+    children.last_* <- position, seulement si elle est plus récente que la position courante
+
+    UPDATE conditionnel (pas de lecture puis écriture) : deux lots du même
+    enfant traités en parallèle ne peuvent pas faire reculer la position.
+    """
+    result = db.execute(
+        update(Child)
+        .where(Child.id == child_id, or_(Child.last_update.is_(None), Child.last_update < ts))
+        .values(last_latitude=latitude, last_longitude=longitude, last_update=ts, battery=battery)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _ingest_batches(db: Session, batches: dict, publish: bool = True) -> list:
+    """
+    Insère des lots de positions {child_id: [GPSUpdate, ...]} en une seule transaction
+
+    Idempotent : les fixes sont identifiés par (child_id, horodatage émetteur),
+    un fix déjà enregistré est ignoré (index unique + ON CONFLICT DO NOTHING),
+    un lot rejoué ou reçu en désordre ne réécrit rien et ne fait pas reculer
+    children.last_* (mis à jour seulement si le fix le plus récent du lot est
+    plus récent que la position courante). Un seul INSERT multi-lignes (points
+    d'arrêt regroupés, collapse_stationary_fixes), un seul commit.
+    publish=False : flush du buffer, positions déjà diffusées en direct et
+    consignes de cadence déjà renvoyées à l'émetteur.
+    """
+    # Verrou par enfant jusqu'au commit : deux ingestions du même enfant
+    # (buffer, /gps/batch, autre worker) détectent les géofences l'une après
+    # l'autre ; ordre des ids : pas d'interblocage entre lots multi-enfants
+    children = (
+        db.query(Child)
+        .filter(Child.id.in_(list(batches)))
+        .order_by(Child.id)
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+    children_by_id = {child.id: child for child in children}
+    missing = set(batches) - set(children_by_id)
+    if missing:
+        raise HTTPException(status_code=404, detail="Child not found")
+
+    rows = []
+    results = []
+    zones = {}
+    advanced = {}
+    tracks = {}
+    extended = {}
+    for child_id, fixes in batches.items():
+        # Même horodatage émetteur : même fix envoyé deux fois, gardé une fois
+        unique = {}
+        for fix in fixes:
+            unique.setdefault(parse_fix_timestamp(fix, child_id), fix)
+        stamped = sorted(unique.items(), key=lambda item: item[0])
+
+        child_rows, accepted, dwell = collapse_stationary_fixes(db, child_id, [
+            (ts, fix.latitude, fix.longitude, fix.battery, fix.accuracy) for ts, fix in stamped
+        ])
+        rows += child_rows
+        if dwell is not None:
+            extended[child_id] = dwell
+
+        child = children_by_id[child_id]
+        current = _aware(child.last_update)
+        newest_ts, newest = stamped[-1]
+        if current is None or newest_ts > current:
+            advanced[child_id] = _advance_position(
+                db, child_id, newest_ts, newest.latitude, newest.longitude, newest.battery
+            )
+        if advanced.get(child_id):
+            position = GPSResponse(child_id=child_id, latitude=newest.latitude, longitude=newest.longitude,
+                                   last_update=newest_ts, battery=newest.battery)
+        else:
+            position = _to_response(child)
+
+        # Transitions de zones dans l'ordre chronologique, à partir de la
+        # position courante (les fixes en retard ne rejouent pas d'entrée/sortie)
+        tracks[child_id] = [(ts, fix.latitude, fix.longitude) for ts, fix in stamped]
+        fresh = [point for point in tracks[child_id] if current is None or point[0] > current]
+        if fresh:
+            _, zones[child_id] = detect_geofence_events(db, child_id, fresh, current)
+
+        results.append(GPSBatchResponse(child_id=child_id, inserted=accepted, last_position=position))
+
+    inserted = set()
+    if rows:
+        # Partitions créées à l'avance (create_upcoming_partitions), jamais ici :
+        # la transaction verrouille déjà gps_history (collapse_stationary_fixes)
+        inserted = _insert_history(db, rows)
+    # Après l'INSERT : un jour créé ou recalculé relit ces points
+    summarized = {}
+    for row in rows:
+        if (row["child_id"], row["timestamp"]) in inserted:
+            summarized.setdefault(row["child_id"], []).append(
+                (row["timestamp"], row["latitude"], row["longitude"], row["battery"], row["end_timestamp"])
+            )
+    for child_id, points in summarized.items():
+        record_daily_summaries(db, child_id, points)
+    for child_id, dwell in extended.items():
+        record_dwell_extension(db, child_id, dwell["end_timestamp"], dwell["battery"])
+    db.commit()
+    save_geofence_states(zones)
+    for result in results:
+        position_cache.put(result.last_position)
+        if publish:
+            if advanced.get(result.child_id):
+                live_hub.publish(result.last_position)
+            result.reporting = reporting_hint(
+                result.child_id, tracks[result.child_id], result.last_position.battery
+            )
+
+    return results
+
+
+def update_child_gps_batch(
+    db: Session,
+    child_id: int,
+    fixes: List[GPSUpdate],
+) -> GPSBatchResponse:
+    """Enregistrer un lot de positions GPS d'un enfant (une seule transaction)"""
+    return _ingest_batches(db, {child_id: fixes})[0]
+
+
+def update_children_gps_batch(
+    db: Session,
+    batches: List[ChildGPSBatch],
+) -> List[GPSBatchResponse]:
+    """Enregistrer des lots de positions GPS de plusieurs enfants (une seule transaction)"""
+    grouped = {}
+    for batch in batches:
+        grouped.setdefault(batch.child_id, []).extend(batch.fixes)
+    return _ingest_batches(db, grouped)
+
+
 def get_child_last_position(
     db: Session, 
     child_id: int
 ) -> GPSResponse:
     """Récupérer la dernière position d'un enfant"""
-    
-    child = db.query(Child).filter(Child.id == child_id).first()
-    if not child:
-        raise HTTPException(status_code=404, detail="Child not found")
-    
-    return GPSResponse(
-        child_id=child.id,
-        latitude=child.last_latitude,
-        longitude=child.last_longitude,
-        last_update=child.last_update,
-        battery=child.battery
-    )
+    from app.services.gps_buffer import gps_buffer
 
+    # Position encore dans le buffer d'ingestion = plus récente que la DB
+    buffered = gps_buffer.latest(child_id)
+    if buffered:
+        return buffered
 
-def get_history_days(db: Session, child_id: int) -> list:
-    print("🔥 VERSION TEST 123")
-    rows = db.query(
-        func.date(GPSHistory.timestamp).label("day")
-    ).filter(
-        GPSHistory.child_id == child_id
-    ).group_by(
-        func.date(GPSHistory.timestamp)
-    ).order_by(
-        func.date(GPSHistory.timestamp).desc()
+    cached = position_cache.get(child_id)
+    if cached:
+        return cached
+
+    child = get_child_or_404(db, child_id)
+    response = _to_response(child)
+    position_cache.put(response)
+    return response
+
+
+def get_parent_positions(db: Session, parent_id: int) -> List[ChildPositionResponse]:
+    """
+    Dernière position, batterie et statut de zone de tous les enfants d'un parent
+
+    Une seule requête (children LEFT JOIN locations) ; les zones de chaque
+    enfant sont évaluées en mémoire. Les positions encore dans le buffer
+    d'ingestion priment sur celles de la DB.
+    """
+    from itertools import groupby
+    from app.models.location import Location
+    from app.services.gps_buffer import gps_buffer
+    from app.services.zone_index import DEFAULT_RADIUS_M, Zone, ZoneIndex
+
+    rows = db.execute(
+        select(
+            Child.id, Child.name, Child.last_latitude, Child.last_longitude,
+            Child.last_update, Child.battery,
+            Location.id.label("zone_id"), Location.name.label("zone_name"),
+            Location.latitude.label("zone_latitude"), Location.longitude.label("zone_longitude"),
+            Location.radius.label("zone_radius"),
+        )
+        .outerjoin(Location, Location.child_id == Child.id)
+        .where(Child.parent_id == parent_id)
+        .order_by(Child.id, Location.id)
     ).all()
 
+    positions = []
+    for child_id, child_rows in groupby(rows, key=lambda row: row.id):
+        child_rows = list(child_rows)
+        first = child_rows[0]
+        position = gps_buffer.latest(child_id) or GPSResponse(
+            child_id=child_id,
+            latitude=first.last_latitude,
+            longitude=first.last_longitude,
+            last_update=first.last_update,
+            battery=first.battery
+        )
+
+        zone = None
+        if position.latitude and position.longitude:
+            index = ZoneIndex([
+                Zone(row.zone_id, row.zone_name, row.zone_latitude, row.zone_longitude,
+                     row.zone_radius if row.zone_radius is not None else DEFAULT_RADIUS_M)
+                for row in child_rows if row.zone_id is not None
+            ])
+            zone = index.find(position.latitude, position.longitude)
+
+        positions.append(ChildPositionResponse(
+            **position.model_dump(),
+            name=first.name,
+            in_safe_zone=zone is not None,
+            zone_name=zone.name if zone else None
+        ))
+    return positions
+
+
+def get_history_days(db: Session, child_id: int) -> list:
+    """Jours avec des données GPS, du plus récent au plus ancien (table des résumés)"""
+    rows = db.query(GPSDailySummary.day).filter(
+        GPSDailySummary.child_id == child_id
+    ).order_by(GPSDailySummary.day.desc()).all()
+
     return [str(row.day) for row in rows]
 
 
-def get_gps_history( 
-    db: Session,
-    child_id: int,
-    day: Optional[date] = None,
-    interval_seconds: int = 30
-) -> list:
-    """Prends 1 coordonnées gps toutes les 30sec sur le jour choisi. Historique GPS d'un enfant pour un jour donné, sous-échantillonné"""
-    
-    target_day = day or date.today()
-    start = datetime(target_day.year, target_day.month, target_day.day, tzinfo=timezone.utc)
-    end = datetime(target_day.year, target_day.month, target_day.day, 23, 59, 59, tzinfo=timezone.utc)
-    
-    points = db.query(GPSHistory).filter(
-        GPSHistory.child_id == child_id,
-        GPSHistory.timestamp >= start,
-        GPSHistory.timestamp <= end
-    ).order_by(GPSHistory.timestamp.asc()).all()
-    
+# Sous-échantillonnage en SQL (PostgreSQL) : même algorithme glouton que
+# _sample_by_interval, chaque point gardé est le premier à >= interval du
+# précédent. Une requête récursive saute de point gardé en point gardé via
+# l'index (child_id, timestamp) : seuls les points renvoyés sont lus.
+_SAMPLED_HISTORY_SQL = text("""
+    WITH RECURSIVE sampled AS (
+        (SELECT h.id, h.latitude, h.longitude, h."timestamp"
+         FROM gps_history h
+         WHERE h.child_id = :child_id
+           AND h."timestamp" >= :start AND h."timestamp" <= :end
+         ORDER BY h."timestamp", h.id
+         LIMIT 1)
+        UNION ALL
+        SELECT nxt.id, nxt.latitude, nxt.longitude, nxt."timestamp"
+        FROM sampled s
+        CROSS JOIN LATERAL (
+            SELECT h.id, h.latitude, h.longitude, h."timestamp"
+            FROM gps_history h
+            WHERE h.child_id = :child_id
+              AND h."timestamp" >= s."timestamp" + make_interval(secs => :interval)
+              AND h."timestamp" <= :end
+            ORDER BY h."timestamp", h.id
+            LIMIT 1
+        ) nxt
+    )
+    SELECT latitude, longitude, "timestamp" FROM sampled ORDER BY "timestamp", id
+""")
+
+
+def day_bounds(day: date) -> tuple:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    end = datetime(day.year, day.month, day.day, 23, 59, 59, tzinfo=timezone.utc)
+    return start, end
+
+
+def get_history_version(db: Session, child_id: int, day: date) -> tuple:
+    """
+    Version du contenu d'une journée d'historique : (nombre de lignes, id max,
+    nombre de fixes) de gps_history, suivis pour un jour sorti de la pleine
+    résolution de la version de ses paliers (trace simplifiée : nombre de
+    points, id max ; archive : nombre de points, début, taille de la polyline)
+
+    Change dès qu'un point est ajouté (y compris un lot rejoué en retard),
+    qu'un point d'arrêt est prolongé ou qu'un point est supprimé, et quand
+    la rétention fait changer le jour de palier ou y refond des points en
+    retard (import, lot rejoué).
+    """
+    start, end = day_bounds(day)
+    row = db.execute(
+        select(func.count(GPSHistory.id), func.max(GPSHistory.id), func.sum(GPSHistory.fix_count))
+        .where(
+            GPSHistory.child_id == child_id,
+            GPSHistory.timestamp >= start,
+            GPSHistory.timestamp <= end
+        )
+    ).one()
+    if history_tier(day) == FULL:
+        return tuple(row)
+
+    rollup = db.execute(
+        select(func.count(GPSHistoryRollup.id), func.max(GPSHistoryRollup.id))
+        .where(
+            GPSHistoryRollup.child_id == child_id,
+            GPSHistoryRollup.timestamp >= start,
+            GPSHistoryRollup.timestamp < start + timedelta(days=1)
+        )
+    ).one()
+    archive = db.execute(
+        select(GPSHistoryArchive.point_count, GPSHistoryArchive.start, func.length(GPSHistoryArchive.polyline))
+        .where(GPSHistoryArchive.child_id == child_id, GPSHistoryArchive.day == day)
+    ).one_or_none()
+    return tuple(row) + tuple(rollup) + (tuple(archive) if archive else (None, None, None))
+
+
+def _sample_by_interval(points: list, interval_seconds: int) -> list:
+    """Garde le premier point puis chaque point à >= interval_seconds du dernier gardé"""
     if not points:
         return []
-    
-    # Sous-échantillonnage : 1 point toutes les N secondes
+
     sampled = [points[0]]
     for p in points[1:]:
         delta = (p.timestamp - sampled[-1].timestamp).total_seconds()
         if delta >= interval_seconds:
             sampled.append(p)
-    
+
     return sampled
 
 
-async def snap_to_roads(points: list) -> list:
-    """Snap les points GPS aux routes via Google Roads API"""
+def get_gps_history( 
+    db: Session,
+    child_id: int,
+    day: Optional[date] = None,
+    interval_seconds: int = 30
+) -> list:
+    """Prends 1 coordonnées gps toutes les 30sec sur le jour choisi. Historique GPS d'un enfant pour un jour donné, sous-échantillonné"""
     
+    target_day = day or date.today()
+    start, end = day_bounds(target_day)
+
+    # Jour sorti de la pleine résolution : trace simplifiée ou archive
+    older = get_tier_points(db, child_id, target_day)
+    if older is not None:
+        return _sample_by_interval(older, interval_seconds)
+
+    # Sous-échantillonnage fait par PostgreSQL (interval <= 0 = tous les points)
+    if interval_seconds > 0 and db.get_bind().dialect.name == "postgresql":
+        return db.execute(_SAMPLED_HISTORY_SQL, {
+            "child_id": child_id,
+            "start": start,
+            "end": end,
+            "interval": float(interval_seconds),
+        }).all()
+
+    # Repli (SQLite des tests) : colonnes utiles seulement, pas d'objets ORM
+    points = db.execute(
+        select(GPSHistory.latitude, GPSHistory.longitude, GPSHistory.timestamp)
+        .where(
+            GPSHistory.child_id == child_id,
+            GPSHistory.timestamp >= start,
+            GPSHistory.timestamp <= end
+        )
+        .order_by(GPSHistory.timestamp.asc(), GPSHistory.id.asc())
+    ).all()
+
+    return _sample_by_interval(points, interval_seconds)
+
+
+def iter_gps_history(
+    db: Session,
+    child_id: int,
+    start: datetime,
+    end: datetime,
+    chunk_size: int = 1000
+):
+    """
+    Parcourt l'historique GPS d'une période sans le charger en mémoire
+
+    Curseur côté serveur (stream_results) lu par blocs de chunk_size lignes :
+    mémoire constante quelle que soit la durée demandée. Les jours sortis de
+    la pleine résolution sont lus d'abord dans leur palier de rétention.
+    """
+    if history_tier(start.date()) != FULL:
+        yield from iter_tier_points(db, child_id, start, end)
+
+    result = db.execute(
+        select(
+            GPSHistory.latitude,
+            GPSHistory.longitude,
+            GPSHistory.battery,
+            GPSHistory.timestamp,
+            GPSHistory.end_timestamp,
+            GPSHistory.fix_count
+        )
+        .where(
+            GPSHistory.child_id == child_id,
+            GPSHistory.timestamp >= start,
+            GPSHistory.timestamp < end
+        )
+        .order_by(GPSHistory.timestamp.asc(), GPSHistory.id.asc())
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        yield from partition
+
+
+def export_gps_history(db: Session, child_id: int, start: datetime,
+                       end: datetime, fmt: str = "ndjson", chunk_size: int = 1000):
+    """
+    Export NDJSON (une ligne JSON par point) ou CSV de l'historique, en flux
+
+    Produit un bloc de texte par tranche de chunk_size points (un seul
+    passage par le threadpool de StreamingResponse par tranche). Mêmes
+    colonnes que l'import (python -m app.cli import-gps), durée des points
+    d'arrêt comprise (end_timestamp, fix_count).
+    """
+    lines = ["child_id,timestamp,latitude,longitude,battery,end_timestamp,fix_count\n"] if fmt == "csv" else []
+    for p in iter_gps_history(db, child_id, start, end, chunk_size):
+        timestamp = _aware(p.timestamp).isoformat()
+        end_timestamp = p.end_timestamp and _aware(p.end_timestamp).isoformat()
+        if fmt == "csv":
+            battery = "" if p.battery is None else p.battery
+            lines.append(
+                f"{child_id},{timestamp},{p.latitude},{p.longitude},{battery},"
+                f"{end_timestamp or ''},{p.fix_count}\n"
+            )
+        else:
+            lines.append(json.dumps({
+                "child_id": child_id,
+                "timestamp": timestamp,
+                "latitude": p.latitude,
+                "longitude": p.longitude,
+                "battery": p.battery,
+                "end_timestamp": end_timestamp,
+                "fix_count": p.fix_count
+            }) + "\n")
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+async def snap_to_roads(points: list) -> Tuple[list, bool]:
+    """
+    Snap les points GPS aux routes via Google Roads API ou le map-matching local
+
+    Returns:
+        (trace, dégradée) : dégradée si tout ou partie de la trace est restée en
+        points bruts (pas de clé API, tranche Roads en échec)
+    """
+    from app.services.roads_service import roads_client
+
+    if settings.SNAP_BACKEND == "local" and settings.OSM_GRAPH_PATH:
+        from app.services.map_matching import get_map_matcher
+        # Calcul CPU : hors de la boucle d'événements
+        return await run_in_threadpool(get_map_matcher().match, points), False
+
     key = os.getenv("GOOGLE_MAPS_API_KEY")
     if not key:
-        return [{"latitude": p.latitude, "longitude": p.longitude} for p in points]
-    
-    snapped = []
-    
-    async with httpx.AsyncClient() as client:
-        for i in range(0, len(points), 100):
-            chunk = points[i:i+100]
-            path = "|".join([f"{p.latitude},{p.longitude}" for p in chunk])
-            
-            res = await client.get(
-                "https://roads.googleapis.com/v1/snapToRoads",
-                params={
-                    "path": path,
-                    "interpolate": "true",
-                    "key": key
-                }
-            )
-            data = res.json()
-            snapped += [
-                {
-                    "latitude": p["location"]["latitude"],
-                    "longitude": p["location"]["longitude"]
-                }
-                for p in data.get("snappedPoints", [])
-            ]
-    
-    return snapped
+        return [{"latitude": p.latitude, "longitude": p.longitude} for p in points], True
+
+    return await roads_client.snap(points, key)
+
+
+async def snap_history(
+    db: Session,
+    child_id: int,
+    day: Optional[date],
+    interval_seconds: int,
+    points: list
+) -> Tuple[list, bool]:
+    """
+    Snap-to-roads d'un historique, servi depuis le cache quand c'est possible
+
+    Lecture et écriture du cache (DB) dans le threadpool ; une trace dégradée
+    (points bruts en tout ou partie) n'est jamais mise en cache, le prochain
+    appel retente le snap.
+
+    Returns:
+        (trace, dégradée)
+    """
+    from app.services.snap_cache import snap_cache, snap_cache_key
+
+    target_day = day or date.today()
+    key = snap_cache_key(child_id, target_day, interval_seconds, points, snap_backend_version())
+    cached = await run_in_threadpool(snap_cache.get, db, key)
+    if cached is not None:
+        return cached, False
+
+    snapped, degraded = await snap_to_roads(points)
+    if snapped and not degraded:
+        await run_in_threadpool(snap_cache.put, db, key, child_id, target_day, snapped,
+                                persist=target_day < date.today())
+    return snapped, degraded
+
+
+def snap_backend_version() -> str:
+    """
+    Moteur snap-to-roads et version de ce qu'il calcule (clé du cache des
+    traces) : URL de l'API Google, ou version de l'appariement, extrait OSM
+    et paramètres du map-matching local
+    """
+    if settings.SNAP_BACKEND == "local":
+        from app.services.map_matching import MATCHER_VERSION
+
+        path = settings.OSM_GRAPH_PATH
+        modified = int(os.path.getmtime(path)) if path and os.path.exists(path) else 0
+        return (
+            f"local:{MATCHER_VERSION}:{os.path.basename(path)}@{modified}:"
+            f"{settings.MAP_MATCHING_SIGMA_M}:{settings.MAP_MATCHING_RADIUS_M}"
+        )
+    return f"google:{settings.ROADS_API_URL}"
+
+
+def snapping_available() -> bool:
+    """Vrai si snap_to_roads snappe réellement (sinon il renvoie les points bruts)"""
+    if settings.SNAP_BACKEND == "local":
+        return bool(settings.OSM_GRAPH_PATH)
+    return bool(os.getenv("GOOGLE_MAPS_API_KEY"))
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -163,22 +664,79 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
 def is_child_in_safe_zone(db: Session, child_id: int) -> dict:
     """Vérifie si un enfant est dans une zone de confiance"""
     
-    child = db.query(Child).filter(Child.id == child_id).first()
-    if not child:
-        raise HTTPException(status_code=404, detail="Child not found")
+    position = get_child_last_position(db, child_id)
     
-    if not child.last_latitude or not child.last_longitude:
+    if not position.latitude or not position.longitude:
         return {"in_safe_zone": False, "zone_name": None}
     
-    from app.models.location import Location
-    zones = db.query(Location).filter(Location.child_id == child_id).all()
-    
-    for zone in zones:
-        distance = calculate_distance(
-            child.last_latitude, child.last_longitude,
-            zone.latitude, zone.longitude
-        )
-        if distance <= zone.radius:
-            return {"in_safe_zone": True, "zone_name": zone.name}
+    from app.services.zone_index import get_zone_index
+
+    # Seules les zones proches du point sont testées
+    zone = get_zone_index(db, child_id).find(position.latitude, position.longitude)
+    if zone:
+        return {"in_safe_zone": True, "zone_name": zone.name}
     
     return {"in_safe_zone": False, "zone_name": None}
+
+
+def get_history_distance(db: Session, child_id: int, day: Optional[date] = None) -> dict:
+    """Distance parcourue sur une journée (tous les points, haversine vectorisé)"""
+    from app.services.geo_service import path_length
+
+    target_day = day or date.today()
+    if history_tier(target_day) != FULL:
+        # Trace simplifiée : distance exacte gardée par le résumé du jour
+        summary = db.query(GPSDailySummary).filter(
+            GPSDailySummary.child_id == child_id, GPSDailySummary.day == target_day
+        ).first()
+        if summary is not None:
+            return {"day": target_day, "points": summary.point_count, "distance_m": round(summary.distance_m, 1)}
+
+    points = get_gps_history(db, child_id, target_day, 0)
+    return {
+        "day": target_day,
+        "points": len(points),
+        "distance_m": round(path_length(
+            [p.latitude for p in points], [p.longitude for p in points]
+        ), 1),
+    }
+
+
+def get_history_zones(db: Session, child_id: int, day: Optional[date] = None) -> list:
+    """
+    Passages dans les zones de confiance sur une journée
+
+    Toute la trace du jour est évaluée contre toutes les zones en un seul
+    calcul vectorisé (ZoneIndex.locate).
+
+    Returns:
+        list: Par zone visitée (ordre des ids) : nombre de points, premier et
+        dernier point dans la zone
+    """
+    from app.services.zone_index import get_zone_index
+
+    target_day = day or date.today()
+    points = get_gps_history(db, child_id, target_day, 0)
+    index = get_zone_index(db, child_id)
+    located = index.locate(
+        [p.latitude for p in points], [p.longitude for p in points]
+    ).tolist()
+
+    visits = {}
+    for p, position in zip(points, located):
+        if position < 0:
+            continue
+        visit = visits.get(position)
+        if visit is None:
+            zone = index.zones[position]
+            visits[position] = {
+                "zone_id": zone.id,
+                "zone_name": zone.name,
+                "points": 1,
+                "first_seen": p.timestamp,
+                "last_seen": p.timestamp,
+            }
+        else:
+            visit["points"] += 1
+            visit["last_seen"] = p.timestamp
+    return [visits[position] for position in sorted(visits)]
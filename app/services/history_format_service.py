@@ -0,0 +1,137 @@
+"""
+Service d'encodage compact de l'historique GPS
+Alternatives au JSON point par point : polyline Google (avec horodatages
+delta-encodés) et msgpack à tableaux float32 compactés
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import msgpack
+import numpy as np
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+POLYLINE_PRECISION = 5
+
+
+def _encode_value(value: int, chunks: list) -> None:
+    """Encode un entier signé selon l'algorithme polyline (zigzag + blocs de 5 bits)"""
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+
+
+def encode_deltas(values: List[int]) -> str:
+    """Encode une suite d'entiers en deltas successifs (premier delta depuis 0)"""
+    chunks = []
+    previous = 0
+    for value in values:
+        _encode_value(value - previous, chunks)
+        previous = value
+    return "".join(chunks)
+
+
+def decode_deltas(encoded: str, dimensions: int = 1) -> List[tuple]:
+    """Décode une chaîne polyline en tuples d'entiers (inverse de encode_deltas)"""
+    values = []
+    current = [0] * dimensions
+    index = 0
+    while index < len(encoded):
+        for dim in range(dimensions):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            current[dim] += ~(result >> 1) if result & 1 else result >> 1
+        values.append(tuple(current))
+    return values
+
+
+def encode_polyline(latitudes: List[float], longitudes: List[float],
+                    precision: int = POLYLINE_PRECISION) -> str:
+    """Polyline Google encodée (précision 5 = ~1 m)"""
+    factor = 10 ** precision
+    chunks = []
+    prev_lat = prev_lon = 0
+    for lat, lon in zip(latitudes, longitudes):
+        lat_i = round(lat * factor)
+        lon_i = round(lon * factor)
+        _encode_value(lat_i - prev_lat, chunks)
+        _encode_value(lon_i - prev_lon, chunks)
+        prev_lat, prev_lon = lat_i, lon_i
+    return "".join(chunks)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> List[tuple]:
+    factor = 10 ** precision
+    return [(lat / factor, lon / factor) for lat, lon in decode_deltas(encoded, 2)]
+
+
+def _epoch_seconds(timestamps: List[datetime]) -> List[int]:
+    return [
+        int((ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp())
+        for ts in timestamps
+    ]
+
+
+def to_polyline(latitudes: List[float], longitudes: List[float],
+                timestamps: Optional[List[datetime]] = None) -> dict:
+    """
+    Historique au format polyline
+
+    Returns:
+        dict: {"polyline", "precision", "start", "timestamps"} où timestamps est
+        la suite des secondes depuis "start" (epoch UTC), delta-encodée
+    """
+    payload = {
+        "format": "polyline",
+        "precision": POLYLINE_PRECISION,
+        "polyline": encode_polyline(latitudes, longitudes),
+        "start": None,
+        "timestamps": None,
+    }
+    if timestamps:
+        seconds = _epoch_seconds(timestamps)
+        payload["start"] = seconds[0]
+        payload["timestamps"] = encode_deltas([s - seconds[0] for s in seconds])
+    return payload
+
+
+def to_msgpack(latitudes: List[float], longitudes: List[float],
+               timestamps: Optional[List[datetime]] = None) -> bytes:
+    """
+    Historique en msgpack, coordonnées en tableaux float32 little-endian
+
+    Clés : "lat"/"lon" (bytes float32), "start" (epoch UTC) et
+    "dt" (bytes uint32, secondes depuis start) si horodaté.
+    """
+    payload = {
+        "lat": np.asarray(latitudes, dtype="<f4").tobytes(),
+        "lon": np.asarray(longitudes, dtype="<f4").tobytes(),
+        "start": None,
+        "dt": None,
+    }
+    if timestamps:
+        seconds = np.asarray(_epoch_seconds(timestamps), dtype=np.int64)
+        payload["start"] = int(seconds[0])
+        payload["dt"] = (seconds - seconds[0]).astype("<u4").tobytes()
+    return msgpack.packb(payload)
+
+
+def from_msgpack(data: bytes) -> dict:
+    """Décode un historique msgpack en tableaux NumPy (tests, clients Python)"""
+    payload = msgpack.unpackb(data)
+    result = {
+        "lat": np.frombuffer(payload["lat"], dtype="<f4"),
+        "lon": np.frombuffer(payload["lon"], dtype="<f4"),
+        "start": payload["start"],
+        "dt": None,
+    }
+    if payload["dt"] is not None:
+        result["dt"] = np.frombuffer(payload["dt"], dtype="<u4")
+    return result
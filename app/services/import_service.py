@@ -0,0 +1,203 @@
+"""
+Import en masse d'historique GPS (restauration, migration, exports CSV)
+Les fixes sont lus en flux (CSV ou NDJSON) et écrits dans gps_history par
+blocs : COPY FROM STDIN dans une table temporaire puis INSERT ... SELECT
+sur PostgreSQL, INSERT multi-lignes ailleurs. Un fix déjà présent
+(child_id, timestamp) est ignoré : relancer un import interrompu est sans
+risque. children.last_* et les résumés journaliers sont recalculés à la
+fin pour les enfants importés.
+"""
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, TextIO
+
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.partitioning import ensure_gps_history_partitions
+from app.models.child import Child
+from app.models.gps_history import GPSHistory
+from app.services.position_cache import position_cache
+
+COLUMNS = ("child_id", "latitude", "longitude", "battery", "timestamp", "end_timestamp", "fix_count")
+REQUIRED = ("child_id", "latitude", "longitude", "timestamp")
+FORMATS = ("csv", "ndjson")
+
+_STAGING = "gps_history_import"
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _optional_int(value) -> Optional[int]:
+    return None if value in (None, "") else int(value)
+
+
+def _parse(record: dict, line: int) -> tuple:
+    missing = [name for name in REQUIRED if record.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"ligne {line} : colonnes manquantes {', '.join(missing)}")
+    try:
+        return (
+            int(record["child_id"]),
+            float(record["latitude"]),
+            float(record["longitude"]),
+            _optional_int(record.get("battery")),
+            _timestamp(record["timestamp"]),
+            _timestamp(record.get("end_timestamp")),
+            _optional_int(record.get("fix_count")) or 1,
+        )
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"ligne {line} : {exc}") from exc
+
+
+def read_fixes(stream: TextIO, fmt: str) -> Iterator[tuple]:
+    """
+    Lit des fixes en flux
+
+    CSV avec en-tête, ou NDJSON (un objet par ligne), colonnes de COLUMNS :
+    child_id, latitude, longitude et timestamp (ISO 8601) obligatoires.
+
+    Raises:
+        ValueError: Format inconnu, ligne illisible ou colonne obligatoire absente
+    """
+    if fmt == "csv":
+        for line, record in enumerate(csv.DictReader(stream), start=2):
+            yield _parse(record, line)
+    elif fmt == "ndjson":
+        for line, raw in enumerate(stream, start=1):
+            if raw.strip():
+                yield _parse(json.loads(raw), line)
+    else:
+        raise ValueError(f"Format inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+
+
+def _chunks(fixes: Iterable[tuple], size: int) -> Iterator[list]:
+    chunk = []
+    for fix in fixes:
+        chunk.append(fix)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy_payload(chunk: list) -> io.StringIO:
+    """
+    Bloc au format COPY ... WITH (FORMAT csv) : None -> champ vide non
+    quoté (NULL), datetime -> ISO avec décalage (timestamptz)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for fix in chunk:
+        writer.writerow(["" if value is None else value.isoformat() if isinstance(value, datetime) else value
+                         for value in fix])
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_chunk(db: Session, chunk: list) -> int:
+    """COPY dans la table temporaire, puis INSERT ... SELECT (enfants inconnus et doublons ignorés)"""
+    db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_STAGING} ("
+        "child_id integer, latitude double precision, longitude double precision, battery integer, "
+        '"timestamp" timestamptz, end_timestamp timestamptz, fix_count integer'
+        ") ON COMMIT DELETE ROWS"
+    ))
+    buffer = _copy_payload(chunk)
+
+    columns = ", ".join(f'"{name}"' for name in COLUMNS)
+    selected = ", ".join(f's."{name}"' for name in COLUMNS)
+    raw = db.connection().connection.dbapi_connection
+    with raw.cursor() as cursor:
+        cursor.copy_expert(f"COPY {_STAGING} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    result = db.execute(text(
+        f"INSERT INTO gps_history ({columns}) "
+        f"SELECT {selected} FROM {_STAGING} s "
+        "JOIN children c ON c.id = s.child_id "
+        'ON CONFLICT (child_id, "timestamp") DO NOTHING'
+    ))
+    return result.rowcount
+
+
+def _insert_chunk(db: Session, chunk: list, known: set) -> int:
+    from app.services.gps_service import _insert_history
+
+    rows = [dict(zip(COLUMNS, fix)) for fix in chunk if fix[0] in known]
+    return len(_insert_history(db, rows)) if rows else 0
+
+
+def _refresh_last_positions(db: Session, child_ids: set) -> None:
+    """children.last_* <- point le plus récent importé, s'il est plus récent que la position courante"""
+    from app.services.gps_service import _advance_position
+
+    latest = (
+        select(GPSHistory.child_id, func.max(GPSHistory.timestamp).label("timestamp"))
+        .where(GPSHistory.child_id.in_(child_ids))
+        .group_by(GPSHistory.child_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(GPSHistory.child_id, GPSHistory.timestamp, GPSHistory.end_timestamp,
+               GPSHistory.latitude, GPSHistory.longitude, GPSHistory.battery)
+        .join(latest, and_(GPSHistory.child_id == latest.c.child_id,
+                           GPSHistory.timestamp == latest.c.timestamp))
+    )
+    for child_id, ts, end_ts, lat, lon, battery in rows:
+        if _advance_position(db, child_id, end_ts or ts, lat, lon, battery):
+            position_cache.invalidate(child_id)
+
+
+def import_gps_history(db: Session, fixes: Iterable[tuple], chunk_size: int = 50000) -> dict:
+    """
+    Écrit des fixes (tuples dans l'ordre de COLUMNS, cf. read_fixes) dans gps_history
+
+    Un commit par bloc de chunk_size fixes, résumés recalculés pour les seuls
+    jours importés. Les points d'arrêt ne sont pas
+    regroupés (end_timestamp / fix_count repris tels quels) et l'import ne
+    génère pas d'entrées / sorties de zones. Les fixes d'enfants inconnus
+    sont ignorés.
+
+    Returns:
+        dict: Fixes lus, insérés et ignorés (doublons, enfants inconnus),
+        enfants touchés, durée et débit (fixes lus par seconde)
+    """
+    from app.services.summary_service import rebuild_daily_summaries
+
+    started = time.perf_counter()
+    copy = db.get_bind().dialect.name == "postgresql"
+    known = set(db.execute(select(Child.id)).scalars())
+    stats = {"rows": 0, "inserted": 0, "skipped": 0, "children": 0}
+    touched = {}
+
+    for chunk in _chunks(fixes, chunk_size):
+        ensure_gps_history_partitions(db.get_bind(), {fix[4] for fix in chunk})
+        inserted = _copy_chunk(db, chunk) if copy else _insert_chunk(db, chunk, known)
+        db.commit()
+        stats["rows"] += len(chunk)
+        stats["inserted"] += inserted
+        for fix in chunk:
+            if fix[0] in known:
+                touched.setdefault(fix[0], set()).add(fix[4].date())
+
+    if touched:
+        _refresh_last_positions(db, set(touched))
+        db.commit()
+        # Seuls les jours importés sont recalculés, pas tout l'historique de l'enfant
+        for child_id in sorted(touched):
+            rebuild_daily_summaries(db, child_id, days=touched[child_id])
+
+    stats["skipped"] = stats["rows"] - stats["inserted"]
+    stats["children"] = len(touched)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["rows_per_second"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] else stats["rows"]
+    return stats
@@ -0,0 +1,89 @@
+"""
+Diffusion en direct des positions GPS (SSE / WebSocket)
+Chaque connexion s'abonne aux enfants de son parent et reçoit chaque
+nouvelle position dans une file bornée. Un client trop lent (file pleine)
+est déconnecté plutôt que de retenir de la mémoire : il se reconnecte et
+repart de la position courante.
+"""
+import asyncio
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.schemas.gps import GPSResponse
+
+
+class Subscription:
+    """Abonnement d'une connexion : file bornée lue dans la boucle asyncio"""
+
+    def __init__(self, child_ids: Iterable[int], loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.child_ids = frozenset(child_ids)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, message: dict) -> None:
+        """Dépose un message (dans la boucle de l'abonné) ; file pleine = abonné abandonné"""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Vide la file et réveille le lecteur pour qu'il ferme la connexion
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[dict]:
+        """Prochaine position, None si l'abonné a été abandonné (trop lent)"""
+        return await self.queue.get()
+
+
+class LiveHub:
+    """Abonnés par enfant ; publish() est appelable depuis n'importe quel thread"""
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def subscribe(self, child_ids: Iterable[int]) -> Subscription:
+        """Nouvel abonnement (à appeler depuis la boucle asyncio de la connexion)"""
+        sub = Subscription(child_ids, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            for child_id in sub.child_ids:
+                self._subscribers.setdefault(child_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for child_id in sub.child_ids:
+                subs = self._subscribers.get(child_id)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[child_id]
+
+    def publish(self, position: GPSResponse) -> None:
+        """Pousse une position aux abonnés de l'enfant"""
+        with self._lock:
+            subs = list(self._subscribers.get(position.child_id, ()))
+        if not subs:
+            return
+
+        message = position.model_dump(mode="json")
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, message)
+            except RuntimeError:
+                # Boucle de la connexion déjà fermée
+                self.unsubscribe(sub)
+
+
+live_hub = LiveHub(settings.LIVE_QUEUE_SIZE)
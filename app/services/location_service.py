@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.location import Location
 from app.models.child import Child
+from app.services.zone_index import invalidate_child_zones
 from typing import List
 
 
@@ -70,6 +71,7 @@ def create_location(db: Session, location_data, parent_id: int) -> Location:
     db.add(new_location)
     db.commit()
     db.refresh(new_location)
+    invalidate_child_zones(new_location.child_id)
     return new_location
 
 
@@ -161,6 +163,7 @@ def update_location(
 
     db.commit()
     db.refresh(location)
+    invalidate_child_zones(location.child_id)
     return location
 
 
@@ -181,5 +184,7 @@ def delete_location(db: Session, location_id: int, parent_id: int) -> None:
     location = get_location_by_id(db, location_id, parent_id)
 
     # Supprimer la location
+    child_id = location.child_id
     db.delete(location)
     db.commit()
+    invalidate_child_zones(child_id)
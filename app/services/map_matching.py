@@ -0,0 +1,310 @@
+"""
+Map-matching local (alternative hors-ligne à Google Roads API)
+Graphe routier chargé depuis un extrait OpenStreetMap (.osm XML), index
+spatial en grille, appariement HMM/Viterbi (Newson & Krumm 2009)
+"""
+import heapq
+import logging
+import math
+import threading
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.geo_service import EARTH_RADIUS_M
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand l'appariement change : les traces en cache (snap_cache)
+# calculées par une version précédente ne sont plus servies
+MATCHER_VERSION = 1
+
+# Types de voies OSM retenus : routes et chemins praticables à pied
+HIGHWAY_TYPES = {
+    "motorway", "trunk", "primary", "secondary", "tertiary", "unclassified",
+    "residential", "living_street", "service", "pedestrian", "track", "road",
+    "footway", "path", "cycleway", "steps",
+    "motorway_link", "trunk_link", "primary_link", "secondary_link", "tertiary_link",
+}
+
+
+class RoadGraph:
+    """
+    Graphe routier non orienté (un enfant marche dans les deux sens)
+
+    Coordonnées projetées en mètres (équirectangulaire locale) ; les arêtes
+    sont rangées dans une grille de cell_size mètres pour la recherche des
+    routes proches d'un point.
+    """
+
+    def __init__(self, nodes: Dict[int, Tuple[float, float]], edges: List[Tuple[int, int]],
+                 cell_size: float = 100.0):
+        ids = list(nodes)
+        position = {node_id: i for i, node_id in enumerate(ids)}
+        lats = np.array([nodes[n][0] for n in ids], dtype=np.float64)
+        lons = np.array([nodes[n][1] for n in ids], dtype=np.float64)
+
+        self.lat0 = float(lats.mean()) if len(ids) else 0.0
+        self._cos_lat0 = math.cos(math.radians(self.lat0))
+        self.x, self.y = self.to_xy(lats, lons)
+
+        pairs = [(position[u], position[v]) for u, v in edges
+                 if u in position and v in position and u != v]
+        self.edges = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        u, v = self.edges[:, 0], self.edges[:, 1]
+        self.lengths = np.hypot(self.x[v] - self.x[u], self.y[v] - self.y[u])
+
+        self.adjacency: List[List[Tuple[int, float]]] = [[] for _ in ids]
+        for (a, b), length in zip(pairs, self.lengths.tolist()):
+            self.adjacency[a].append((b, length))
+            self.adjacency[b].append((a, length))
+
+        self.cell_size = cell_size
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for e, (a, b) in enumerate(pairs):
+            x0, x1 = sorted((self.x[a], self.x[b]))
+            y0, y1 = sorted((self.y[a], self.y[b]))
+            for cx in range(int(x0 // cell_size), int(x1 // cell_size) + 1):
+                for cy in range(int(y0 // cell_size), int(y1 // cell_size) + 1):
+                    self.grid[(cx, cy)].append(e)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def to_xy(self, lat, lon):
+        x = np.radians(lon) * EARTH_RADIUS_M * self._cos_lat0
+        y = np.radians(lat) * EARTH_RADIUS_M
+        return x, y
+
+    def to_latlon(self, x: float, y: float) -> Tuple[float, float]:
+        lat = math.degrees(y / EARTH_RADIUS_M)
+        lon = math.degrees(x / (EARTH_RADIUS_M * self._cos_lat0))
+        return lat, lon
+
+    def candidates(self, x: float, y: float, radius: float, limit: int = 8) -> list:
+        """
+        Projections du point sur les arêtes à moins de `radius` mètres
+
+        Returns:
+            list: Tuples (distance, arête, t, px, py), t position sur l'arête (0 = u, 1 = v)
+        """
+        r = int(math.ceil(radius / self.cell_size))
+        cx, cy = int(x // self.cell_size), int(y // self.cell_size)
+        nearby = {
+            e for i in range(cx - r, cx + r + 1) for j in range(cy - r, cy + r + 1)
+            for e in self.grid.get((i, j), ())
+        }
+        if not nearby:
+            return []
+
+        idx = np.fromiter(nearby, dtype=np.int64)
+        u, v = self.edges[idx, 0], self.edges[idx, 1]
+        ax, ay = self.x[u], self.y[u]
+        dx, dy = self.x[v] - ax, self.y[v] - ay
+        length2 = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(((x - ax) * dx + (y - ay) * dy) / length2, 0.0, 1.0)
+        t = np.nan_to_num(t)
+        px, py = ax + t * dx, ay + t * dy
+        dist = np.hypot(px - x, py - y)
+
+        order = [i for i in np.argsort(dist)[:limit] if dist[i] <= radius]
+        return [(float(dist[i]), int(idx[i]), float(t[i]), float(px[i]), float(py[i]))
+                for i in order]
+
+    def shortest_paths(self, source: int, limit: float) -> Tuple[dict, dict]:
+        """Dijkstra depuis source, borné à `limit` mètres : (distances, prédécesseurs)"""
+        dist = {source: 0.0}
+        prev = {}
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist.get(node, math.inf) or d > limit:
+                continue
+            for nbr, length in self.adjacency[node]:
+                nd = d + length
+                if nd < dist.get(nbr, math.inf) and nd <= limit:
+                    dist[nbr] = nd
+                    prev[nbr] = node
+                    heapq.heappush(heap, (nd, nbr))
+        return dist, prev
+
+
+def load_osm_graph(path: str, cell_size: float = 100.0) -> RoadGraph:
+    """Charge un extrait OpenStreetMap (.osm XML) en RoadGraph (voies HIGHWAY_TYPES)"""
+    nodes = {}
+    edges = []
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag == "node":
+            nodes[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+            elem.clear()
+        elif elem.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+            if tags.get("highway") in HIGHWAY_TYPES:
+                refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                edges += list(zip(refs, refs[1:]))
+            elem.clear()
+
+    used = {n for edge in edges for n in edge}
+    graph = RoadGraph({n: nodes[n] for n in used if n in nodes}, edges, cell_size)
+    logger.info("Loaded road graph from %s: %d nodes, %d edges", path, len(graph.x), len(graph))
+    return graph
+
+
+class MapMatcher:
+    """
+    Appariement HMM : états = projections candidates sur les routes proches
+
+    - émission : gaussienne sur la distance point/route (sigma mètres)
+    - transition : exponentielle sur |distance à vol d'oiseau - distance par
+      la route| (beta mètres), distances routières par Dijkstra borné
+    - Viterbi par segment de trace ; un point sans route proche ou sans
+      transition possible coupe la chaîne et reste brut
+    """
+
+    def __init__(self, graph: RoadGraph, sigma: float = 10.0, beta: float = 30.0,
+                 search_radius: float = 50.0, max_detour: float = 500.0):
+        self.graph = graph
+        self.sigma = sigma
+        self.beta = beta
+        self.search_radius = search_radius
+        self.max_detour = max_detour
+
+    def _route(self, c1: tuple, c2: tuple, limit: float, cache: dict) -> Tuple[float, list]:
+        """Distance par la route entre deux projections, et nœuds traversés"""
+        g = self.graph
+        _, e1, t1, _, _ = c1
+        _, e2, t2, _, _ = c2
+        if e1 == e2:
+            return abs(t2 - t1) * g.lengths[e1], []
+
+        best = (math.inf, [])
+        u1, v1 = (int(n) for n in g.edges[e1])
+        u2, v2 = (int(n) for n in g.edges[e2])
+        for a, cost_a in ((u1, t1 * g.lengths[e1]), (v1, (1 - t1) * g.lengths[e1])):
+            if a not in cache:
+                cache[a] = g.shortest_paths(a, limit)
+            dist, prev = cache[a]
+            for b, cost_b in ((u2, t2 * g.lengths[e2]), (v2, (1 - t2) * g.lengths[e2])):
+                total = cost_a + dist.get(b, math.inf) + cost_b
+                if total < best[0]:
+                    path = [b]
+                    while path[-1] != a:
+                        path.append(prev[path[-1]])
+                    best = (total, path[::-1])
+        return best
+
+    def _emission(self, candidate: tuple) -> float:
+        return -0.5 * (candidate[0] / self.sigma) ** 2
+
+    def _step(self, scores: list, previous: list, candidates: list,
+              xy0: tuple, xy1: tuple) -> Tuple[list, list]:
+        """Une étape de Viterbi : scores des nouveaux candidats et meilleurs prédécesseurs"""
+        gc = math.hypot(xy1[0] - xy0[0], xy1[1] - xy0[1])
+        limit = gc + self.max_detour
+        cache = {}
+        new_scores, pointers = [], []
+        for c in candidates:
+            best = (-math.inf, None, [])
+            for j, p in enumerate(previous):
+                if scores[j] == -math.inf:
+                    continue
+                route, path = self._route(p, c, limit, cache)
+                if route == math.inf:
+                    continue
+                score = scores[j] - abs(gc - route) / self.beta
+                if score > best[0]:
+                    best = (score, j, path)
+            new_scores.append(best[0] + self._emission(c))
+            pointers.append((best[1], best[2]))
+        return new_scores, pointers
+
+    def _emit(self, layers: List[list], back: List[list], scores: list, out: List[dict]) -> None:
+        """Remonte le meilleur chemin d'une chaîne et l'ajoute à la sortie"""
+        k = int(np.argmax(scores))
+        chain = []
+        for i in range(len(layers) - 1, 0, -1):
+            j, path = back[i - 1][k]
+            chain.append((layers[i][k], path))
+            k = j
+        chain.append((layers[0][k], []))
+
+        for candidate, path in reversed(chain):
+            for node in path:
+                lat, lon = self.graph.to_latlon(self.graph.x[node], self.graph.y[node])
+                out.append({"latitude": lat, "longitude": lon})
+            lat, lon = self.graph.to_latlon(candidate[3], candidate[4])
+            out.append({"latitude": lat, "longitude": lon})
+
+    def match(self, points: list) -> List[dict]:
+        """
+        Snappe une trace sur le graphe routier
+
+        Returns:
+            list: [{"latitude", "longitude"}] : points projetés sur les routes,
+            avec les intersections traversées entre deux points (interpolation)
+        """
+        out: List[dict] = []
+        layers: List[list] = []
+        back: List[list] = []
+        scores: list = []
+        last_xy = None
+
+        for p in points:
+            x, y = self.graph.to_xy(p.latitude, p.longitude)
+            xy = (float(x), float(y))
+            candidates = self.graph.candidates(xy[0], xy[1], self.search_radius)
+
+            if not candidates:
+                # Pas de route proche : la chaîne est coupée, le point reste brut
+                if layers:
+                    self._emit(layers, back, scores, out)
+                    layers, back = [], []
+                out.append({"latitude": p.latitude, "longitude": p.longitude})
+                continue
+
+            if layers:
+                new_scores, pointers = self._step(scores, layers[-1], candidates, last_xy, xy)
+                if max(new_scores) > -math.inf:
+                    layers.append(candidates)
+                    back.append(pointers)
+                    scores = new_scores
+                    last_xy = xy
+                    continue
+                # Aucune transition possible : nouvelle chaîne
+                self._emit(layers, back, scores, out)
+
+            layers, back = [candidates], []
+            scores = [self._emission(c) for c in candidates]
+            last_xy = xy
+
+        if layers:
+            self._emit(layers, back, scores, out)
+        return out
+
+
+_matcher: Optional[MapMatcher] = None
+_lock = threading.Lock()
+
+
+def get_map_matcher() -> MapMatcher:
+    """
+    Matcher partagé, graphe chargé au premier appel depuis OSM_GRAPH_PATH
+
+    Appels concurrents (threadpool) : un seul chargement du graphe, les
+    autres attendent sous le verrou.
+    """
+    global _matcher
+    if _matcher is not None:
+        return _matcher
+    with _lock:
+        if _matcher is None:
+            from app.core.config import settings
+            _matcher = MapMatcher(
+                load_osm_graph(settings.OSM_GRAPH_PATH),
+                sigma=settings.MAP_MATCHING_SIGMA_M,
+                search_radius=settings.MAP_MATCHING_RADIUS_M,
+            )
+    return _matcher
@@ -0,0 +1,64 @@
+"""
+Cache des dernières positions (carte en direct)
+Écrit à chaque ingestion (write-through) : tant que l'entrée n'a pas expiré,
+get_child_last_position ne touche pas la base. Une position n'en remplace
+jamais une plus récente (ingestions concurrentes terminées dans le désordre).
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.schemas.gps import GPSResponse
+
+
+def _utc(ts: Optional[datetime]) -> Optional[datetime]:
+    # SQLite relit des datetimes naïfs (stockés en UTC)
+    if ts is None or ts.tzinfo is not None:
+        return ts
+    return ts.replace(tzinfo=timezone.utc)
+
+
+class PositionCache:
+    """Dernière position de chaque enfant, sur un backend de app.core.cache"""
+
+    def __init__(self, backend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(child_id: int) -> str:
+        return f"last_position:{child_id}"
+
+    def get(self, child_id: int) -> Optional[GPSResponse]:
+        value = self.backend.get(self._key(child_id))
+        return None if value is None else GPSResponse(**value)
+
+    def put(self, position: GPSResponse) -> None:
+        """Met la position en cache, sauf si celle en cache est plus récente"""
+        # Champs de GPSResponse seulement (pas la consigne de cadence d'une réponse d'ingestion)
+        value = position.model_dump(mode="json", include=set(GPSResponse.model_fields))
+        last_update = _utc(position.last_update)
+
+        def newer(current: Optional[dict]) -> Optional[dict]:
+            if current is None or current.get("last_update") is None:
+                return value
+            cached = _utc(datetime.fromisoformat(current["last_update"]))
+            if last_update is None or last_update < cached:
+                return None
+            return value
+
+        self.backend.update(self._key(position.child_id), newer, self.ttl_seconds)
+
+    def invalidate(self, child_id: int) -> None:
+        self.backend.delete(self._key(child_id))
+
+    def clear(self) -> None:
+        """Vide le cache (backend mémoire uniquement, utilisé par les tests)"""
+        self.backend.clear()
+
+
+position_cache = PositionCache(
+    build_cache(settings.CACHE_BACKEND, settings.REDIS_URL),
+    settings.LAST_POSITION_TTL_SECONDS
+)
@@ -0,0 +1,92 @@
+"""
+Consignes de cadence d'émission renvoyées à l'émetteur GPS
+Délai avant le prochain envoi et déplacement minimal, déduits de la vitesse
+récente (lissée), du statut de zone et de la batterie : un enfant immobile
+à la maison n'envoie que quelques points par heure, un enfant en
+déplacement garde la cadence de base.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.schemas.gps import ReportingHint
+from app.services.geo_service import haversine
+from app.services.geofence_service import current_zones
+
+MOVING = "moving"
+STATIONARY = "stationary"
+SAFE_ZONE = "safe_zone"
+
+
+class MotionTracker:
+    """Vitesse lissée (moyenne exponentielle) de chaque enfant d'après ses derniers points"""
+
+    def __init__(self, smoothing: float = 0.5):
+        self.smoothing = smoothing
+        # child_id -> (timestamp, latitude, longitude, vitesse lissée ou None)
+        self._last: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last.clear()
+
+    def update(self, child_id: int, ts: datetime, lat: float, lon: float) -> Optional[float]:
+        """Prend en compte un point et renvoie la vitesse lissée (m/s, None si inconnue)"""
+        with self._lock:
+            previous = self._last.get(child_id)
+            if previous is None:
+                self._last[child_id] = (ts, lat, lon, None)
+                return None
+            previous_ts, previous_lat, previous_lon, smoothed = previous
+            elapsed = (ts - previous_ts).total_seconds()
+            if elapsed <= 0:
+                # Point rejoué ou en double : pas de vitesse à en tirer
+                return smoothed
+
+            # Bruit GPS à l'arrêt : écart sous REPORTING_JITTER_M compté comme nul
+            moved = float(haversine(previous_lat, previous_lon, lat, lon))
+            speed = max(0.0, moved - settings.REPORTING_JITTER_M) / elapsed
+            if smoothed is not None:
+                speed = self.smoothing * speed + (1 - self.smoothing) * smoothed
+            self._last[child_id] = (ts, lat, lon, speed)
+            return speed
+
+
+motion_tracker = MotionTracker()
+
+
+def compute_hint(speed: Optional[float], in_safe_zone: bool, battery: Optional[int]) -> ReportingHint:
+    """Consigne pour une vitesse (None = inconnue, cadence pleine), une zone et une batterie"""
+    if speed is None or speed >= settings.REPORTING_STATIONARY_SPEED_MPS:
+        mode = MOVING
+        interval = settings.REPORTING_MOVING_INTERVAL_SECONDS
+        distance = settings.REPORTING_MOVING_DISTANCE_M
+    elif in_safe_zone:
+        mode = SAFE_ZONE
+        interval = settings.REPORTING_SAFE_ZONE_INTERVAL_SECONDS
+        distance = settings.REPORTING_SAFE_ZONE_DISTANCE_M
+    else:
+        mode = STATIONARY
+        interval = settings.REPORTING_STATIONARY_INTERVAL_SECONDS
+        distance = settings.REPORTING_STATIONARY_DISTANCE_M
+
+    low_battery = battery is not None and battery <= settings.REPORTING_LOW_BATTERY_PERCENT
+    if low_battery:
+        interval *= 2
+    return ReportingHint(mode=mode, next_report_seconds=interval, min_distance_m=distance, low_battery=low_battery)
+
+
+def reporting_hint(child_id: int, fixes: List[tuple], battery: Optional[int]) -> ReportingHint:
+    """
+    Consigne à renvoyer après réception de points d'un enfant
+
+    Args:
+        fixes: Tuples (timestamp, latitude, longitude) triés par timestamp
+        battery: Batterie du point le plus récent
+    """
+    speed = None
+    for ts, lat, lon in fixes:
+        speed = motion_tracker.update(child_id, ts, lat, lon)
+    return compute_hint(speed, bool(current_zones(child_id)), battery)
@@ -0,0 +1,278 @@
+"""
+Rétention par paliers de l'historique GPS
+gps_history garde la pleine résolution GPS_RETENTION_FULL_DAYS jours. Les
+jours plus anciens passent dans gps_history_rollup (trace simplifiée
+Douglas-Peucker) puis, au-delà de GPS_RETENTION_ROLLUP_DAYS, dans
+gps_history_archive (une ligne par jour, polyline encodée). Les lectures
+d'historique choisissent le palier d'après la date ; les résumés
+journaliers (gps_daily_summary) ne sont pas touchés. Les traces
+snap-to-roads en cache (snapped_tracks) d'un jour qui change de palier sont
+supprimées : elles ont été calculées sur des points qui n'existent plus.
+"""
+from collections import Counter, namedtuple
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.gps_history import GPSHistory
+from app.models.gps_history_tier import GPSHistoryArchive, GPSHistoryRollup
+from app.services.history_format_service import decode_deltas, decode_polyline, to_polyline
+from app.services.snap_cache import snap_cache
+from app.services.track_service import simplify_track
+
+FULL = "full"
+ROLLUP = "rollup"
+ARCHIVE = "archive"
+
+# Mêmes attributs que les lignes de iter_gps_history (durée des points d'arrêt non conservée)
+TierPoint = namedtuple("TierPoint", ["latitude", "longitude", "battery", "timestamp", "end_timestamp", "fix_count"],
+                       defaults=(None, 1))
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def full_cutoff(today: Optional[date] = None) -> date:
+    """Premier jour gardé en pleine résolution"""
+    return (today or _today()) - timedelta(days=settings.GPS_RETENTION_FULL_DAYS)
+
+
+def archive_cutoff(today: Optional[date] = None) -> date:
+    """Premier jour gardé en trace simplifiée (les précédents sont archivés)"""
+    return (today or _today()) - timedelta(days=settings.GPS_RETENTION_ROLLUP_DAYS)
+
+
+def history_tier(day: date, today: Optional[date] = None) -> str:
+    if day >= full_cutoff(today):
+        return FULL
+    if day >= archive_cutoff(today):
+        return ROLLUP
+    return ARCHIVE
+
+
+def _decode_archive(archive: GPSHistoryArchive) -> List[TierPoint]:
+    coordinates = decode_polyline(archive.polyline)
+    offsets = decode_deltas(archive.timestamps)
+    return [
+        TierPoint(lat, lon, None, datetime.fromtimestamp(archive.start + offset, tz=timezone.utc))
+        for (lat, lon), (offset,) in zip(coordinates, offsets)
+    ]
+
+
+def iter_tier_points(db: Session, child_id: int, start: datetime, end: datetime) -> Iterator[TierPoint]:
+    """Points archivés puis simplifiés de [start, end), dans l'ordre chronologique"""
+    archives = db.execute(
+        select(GPSHistoryArchive)
+        .where(
+            GPSHistoryArchive.child_id == child_id,
+            GPSHistoryArchive.day >= _utc(start).date(),
+            GPSHistoryArchive.day <= _utc(end).date()
+        )
+        .order_by(GPSHistoryArchive.day)
+    ).scalars()
+    for archive in archives:
+        for point in _decode_archive(archive):
+            if start <= point.timestamp < end:
+                yield point
+
+    rows = db.execute(
+        select(GPSHistoryRollup.latitude, GPSHistoryRollup.longitude,
+               GPSHistoryRollup.battery, GPSHistoryRollup.timestamp)
+        .where(
+            GPSHistoryRollup.child_id == child_id,
+            GPSHistoryRollup.timestamp >= start,
+            GPSHistoryRollup.timestamp < end
+        )
+        .order_by(GPSHistoryRollup.timestamp)
+    )
+    for lat, lon, battery, ts in rows:
+        yield TierPoint(lat, lon, battery, _utc(ts))
+
+
+def get_tier_points(db: Session, child_id: int, day: date) -> Optional[List[TierPoint]]:
+    """
+    Points d'un jour sorti de la pleine résolution
+
+    Returns:
+        None si le jour est encore en pleine résolution d'après sa date, ou si
+        la rétention ne l'a pas encore traité (à lire dans gps_history)
+    """
+    if history_tier(day) == FULL:
+        return None
+    start = _midnight(day)
+    points = list(iter_tier_points(db, child_id, start, start + timedelta(days=1)))
+    return points or None
+
+
+def _write_archive(db: Session, child_id: int, day: date, points: list, pending: dict) -> None:
+    """
+    Archive un jour (fusionné avec une archive existante du même jour)
+
+    pending : archives écrites depuis le début du job, par (child_id, jour).
+    Un jour peut être archivé deux fois dans le même job (points en retard
+    dans gps_history et trace simplifiée) ; la session ne flushe pas
+    d'elle-même (autoflush=False), le SELECT ne verrait pas la première.
+    """
+    existing = pending.get((child_id, day))
+    if existing is None:
+        existing = db.execute(
+            select(GPSHistoryArchive)
+            .where(GPSHistoryArchive.child_id == child_id, GPSHistoryArchive.day == day)
+        ).scalar_one_or_none()
+    if existing is not None:
+        points = sorted(_decode_archive(existing) + list(points), key=lambda p: _utc(p.timestamp))
+
+    points = simplify_track(points, "dp", settings.GPS_ARCHIVE_TOLERANCE_M)
+    encoded = to_polyline(
+        [p.latitude for p in points], [p.longitude for p in points], [p.timestamp for p in points]
+    )
+    archive = existing or GPSHistoryArchive(child_id=child_id, day=day)
+    archive.point_count = len(points)
+    archive.polyline = encoded["polyline"]
+    archive.start = encoded["start"]
+    archive.timestamps = encoded["timestamps"]
+    db.add(archive)
+    pending[(child_id, day)] = archive
+
+
+def _write_rollup(db: Session, child_id: int, day: date, points: list) -> None:
+    """
+    Trace simplifiée d'un jour (fusionnée avec celle déjà écrite pour ce jour)
+
+    Des points en retard (import, lot rejoué) d'un jour déjà passé en trace
+    simplifiée sont refondus avec elle : une seule trace par jour, pas deux
+    jeux de points entrelacés.
+    """
+    start = _midnight(day)
+    same_day = (
+        GPSHistoryRollup.child_id == child_id,
+        GPSHistoryRollup.timestamp >= start,
+        GPSHistoryRollup.timestamp < start + timedelta(days=1),
+    )
+    existing = db.execute(
+        select(GPSHistoryRollup.latitude, GPSHistoryRollup.longitude,
+               GPSHistoryRollup.battery, GPSHistoryRollup.timestamp)
+        .where(*same_day)
+    ).all()
+    if existing:
+        # Même horodatage (fix rejoué) : le point le plus récent l'emporte
+        merged = {_utc(ts): TierPoint(lat, lon, battery, _utc(ts)) for lat, lon, battery, ts in existing}
+        merged.update((_utc(p.timestamp), p) for p in points)
+        points = [merged[ts] for ts in sorted(merged)]
+        db.execute(delete(GPSHistoryRollup).where(*same_day))
+
+    points = simplify_track(points, "dp", settings.GPS_ROLLUP_TOLERANCE_M)
+    db.execute(insert(GPSHistoryRollup), [
+        {"child_id": child_id, "latitude": p.latitude, "longitude": p.longitude,
+         "battery": p.battery, "timestamp": p.timestamp}
+        for p in points
+    ])
+
+
+def _by_day(rows) -> Iterator[tuple]:
+    """
+    Regroupe des lignes (id, child_id, lat, lon, batterie, timestamp) triées
+    par (child_id, timestamp) en (child_id, jour, points, ids)
+    """
+    key, points, ids = None, [], []
+    for row_id, child_id, lat, lon, battery, ts in rows:
+        ts = _utc(ts)
+        if key != (child_id, ts.date()):
+            if points:
+                yield key + (points, ids)
+            key, points, ids = (child_id, ts.date()), [], []
+        points.append(TierPoint(lat, lon, battery, ts))
+        ids.append(row_id)
+    if points:
+        yield key + (points, ids)
+
+
+def apply_retention(db: Session, today: Optional[date] = None, chunk_size: int = 5000) -> dict:
+    """
+    Fait descendre d'un palier les jours qui ont dépassé leur durée de rétention
+
+    Une seule transaction : les points copiés dans le palier suivant et les
+    lignes supprimées sont validés ensemble (relancer le job est sans effet
+    tant qu'aucun jour n'a changé de palier). Seules les lignes lues sont
+    supprimées de gps_history : un point en retard validé pendant le job
+    (buffer, import) reste en pleine résolution jusqu'au passage suivant.
+    gps_history partitionnée : les mois entièrement expirés et entièrement
+    recopiés sont supprimés par DROP de leur partition.
+
+    Returns:
+        dict: Jours passés en trace simplifiée, jours archivés, points et
+        partitions supprimés de gps_history
+    """
+    from app.core.partitioning import drop_gps_history_partitions_before, partitioning_enabled
+
+    full_start = _midnight(full_cutoff(today))
+    archive_start = _midnight(archive_cutoff(today))
+    stats = {"rolled_up_days": 0, "archived_days": 0, "deleted_points": 0, "dropped_partitions": []}
+    archives = {}
+    moved = set()
+    # Lignes de gps_history recopiées : ids, et nombre par mois (DROP de partition)
+    copied_ids = []
+    copied_months = Counter()
+
+    # Pleine résolution expirée -> trace simplifiée (ou archive si déjà très ancienne)
+    rows = db.execute(
+        select(GPSHistory.id, GPSHistory.child_id, GPSHistory.latitude, GPSHistory.longitude,
+               GPSHistory.battery, GPSHistory.timestamp)
+        .where(GPSHistory.timestamp < full_start)
+        .order_by(GPSHistory.child_id, GPSHistory.timestamp, GPSHistory.id)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    for child_id, day, points, ids in _by_day(rows):
+        if day < archive_start.date():
+            _write_archive(db, child_id, day, points, archives)
+            stats["archived_days"] += 1
+        else:
+            _write_rollup(db, child_id, day, points)
+            stats["rolled_up_days"] += 1
+        moved.add((child_id, day))
+        copied_ids.extend(ids)
+        copied_months[(day.year, day.month)] += len(ids)
+
+    # Trace simplifiée expirée -> archive
+    rows = db.execute(
+        select(GPSHistoryRollup.id, GPSHistoryRollup.child_id, GPSHistoryRollup.latitude,
+               GPSHistoryRollup.longitude, GPSHistoryRollup.battery, GPSHistoryRollup.timestamp)
+        .where(GPSHistoryRollup.timestamp < archive_start)
+        .order_by(GPSHistoryRollup.child_id, GPSHistoryRollup.timestamp, GPSHistoryRollup.id)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    for child_id, day, points, _ in _by_day(rows):
+        _write_archive(db, child_id, day, points, archives)
+        if (child_id, day) not in moved:
+            stats["archived_days"] += 1
+        moved.add((child_id, day))
+    db.flush()
+    db.execute(delete(GPSHistoryRollup).where(GPSHistoryRollup.timestamp < archive_start))
+    snap_cache.purge(db, moved)
+
+    if partitioning_enabled(db.get_bind()):
+        stats["dropped_partitions"] = drop_gps_history_partitions_before(
+            db.connection(), full_start.date(), copied_months
+        )
+    # Reste : mois entamé, partition DEFAULT ou gardée, table non partitionnée
+    for i in range(0, len(copied_ids), chunk_size):
+        result = db.execute(
+            delete(GPSHistory)
+            .where(GPSHistory.id.in_(copied_ids[i:i + chunk_size]), GPSHistory.timestamp < full_start)
+        )
+        stats["deleted_points"] += result.rowcount
+
+    db.commit()
+    return stats
@@ -0,0 +1,186 @@
+"""
+Client Google Roads API (snap-to-roads)
+Client HTTP/2 partagé (pool de connexions), tranches de 100 points envoyées
+en parallèle (concurrence bornée), tranches qui se chevauchent pour des
+raccords sans trou, et nouvelles tentatives avec backoff exponentiel.
+Une tranche définitivement en échec est rendue en points bruts et la trace
+est signalée dégradée (à ne pas mettre en cache).
+"""
+import asyncio
+import logging
+import random
+from typing import List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Limite de l'API Roads : 100 points par requête
+MAX_POINTS_PER_REQUEST = 100
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RoadsAPIError(Exception):
+    """Échec définitif d'une requête Roads API (après les nouvelles tentatives)"""
+
+
+def _raw(points: list) -> List[dict]:
+    return [{"latitude": p.latitude, "longitude": p.longitude} for p in points]
+
+
+class RoadsClient:
+    """
+    Client snap-to-roads réutilisable
+
+    Args:
+        base_url: URL de l'endpoint snapToRoads (un serveur bouchon en test)
+        chunk_size: Points par requête (<= 100)
+        overlap: Points repris de la tranche précédente en tête de chaque tranche
+        max_concurrency: Requêtes simultanées au maximum
+        max_retries: Nouvelles tentatives par tranche (429, 5xx, erreurs réseau)
+        transport: Transport httpx à injecter (tests)
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://roads.googleapis.com/v1/snapToRoads",
+        chunk_size: int = MAX_POINTS_PER_REQUEST,
+        overlap: int = 10,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.2,
+        timeout_seconds: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if not 0 <= overlap < chunk_size <= MAX_POINTS_PER_REQUEST:
+            raise ValueError("Expected 0 <= overlap < chunk_size <= 100")
+        self.base_url = base_url
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Créé à la première utilisation, puis partagé par toutes les requêtes
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self._transport is None,
+                transport=self._transport,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def chunk_bounds(self, n: int) -> List[tuple]:
+        """
+        Découpe n points en tranches (début requête, début possédé, fin)
+
+        Chaque tranche possède [début possédé, fin) et envoie en plus les
+        `overlap` points précédents pour que l'interpolation du raccord soit
+        calculée sur une route continue.
+        """
+        bounds = []
+        owned_start = 0
+        while owned_start < n:
+            request_start = max(0, owned_start - self.overlap)
+            end = min(n, request_start + self.chunk_size)
+            bounds.append((request_start, owned_start, end))
+            owned_start = end
+        return bounds
+
+    async def _request(self, path: str, key: str) -> dict:
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = await client.get(self.base_url, params={
+                    "path": path,
+                    "interpolate": "true",
+                    "key": key,
+                })
+                if res.status_code not in RETRY_STATUSES:
+                    res.raise_for_status()
+                    return res.json()
+                error = f"HTTP {res.status_code}"
+            except httpx.TransportError as exc:
+                error = repr(exc)
+            except (httpx.HTTPStatusError, ValueError) as exc:
+                raise RoadsAPIError(str(exc)) from exc
+
+            if attempt < self.max_retries:
+                delay = self.backoff_seconds * 2 ** attempt
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        raise RoadsAPIError(f"Roads API failed after {self.max_retries + 1} attempts: {error}")
+
+    async def _snap_chunk(self, semaphore: asyncio.Semaphore, points: list,
+                          bounds: tuple, key: str) -> Tuple[List[dict], bool]:
+        """Points snappés possédés par la tranche, et vrai si elle a échoué"""
+        request_start, owned_start, end = bounds
+        chunk = points[request_start:end]
+        path = "|".join(f"{p.latitude},{p.longitude}" for p in chunk)
+
+        try:
+            async with semaphore:
+                data = await self._request(path, key)
+        except RoadsAPIError:
+            # Tranche en échec : points bruts plutôt que trou dans la trace
+            logger.exception("Snap-to-roads chunk %d-%d failed", owned_start, end)
+            return _raw(points[owned_start:end]), True
+
+        # Indice local du premier point possédé ; les points interpolés qui
+        # suivent le point juste avant (raccord) appartiennent à cette tranche
+        first_owned = owned_start - request_start
+        snapped = []
+        owner = -1
+        for p in data.get("snappedPoints", []):
+            original = p.get("originalIndex")
+            if original is not None:
+                owner = original
+                if original < first_owned:
+                    continue
+            elif owner < first_owned - 1:
+                continue
+            snapped.append({
+                "latitude": p["location"]["latitude"],
+                "longitude": p["location"]["longitude"]
+            })
+        return snapped, False
+
+    async def snap(self, points: list, key: str) -> Tuple[List[dict], bool]:
+        """
+        Snappe toute la trace : tranches en parallèle, réassemblées dans l'ordre
+
+        Returns:
+            (trace, dégradée) : dégradée si au moins une tranche est restée en
+            points bruts après toutes les tentatives
+        """
+        if not points:
+            return [], False
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        parts = await asyncio.gather(*(
+            self._snap_chunk(semaphore, points, bounds, key)
+            for bounds in self.chunk_bounds(len(points))
+        ))
+        return [p for part, _ in parts for p in part], any(failed for _, failed in parts)
+
+
+roads_client = RoadsClient(
+    base_url=settings.ROADS_API_URL,
+    overlap=settings.ROADS_CHUNK_OVERLAP,
+    max_concurrency=settings.ROADS_MAX_CONCURRENCY,
+    max_retries=settings.ROADS_MAX_RETRIES,
+)
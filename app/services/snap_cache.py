@@ -0,0 +1,116 @@
+"""
+Cache des traces snap-to-roads
+Deux niveaux : LRU en mémoire (tous les jours) puis table snapped_tracks
+(jours passés uniquement, qui ne changent plus). Les traces d'un jour qui
+quitte la pleine résolution sont supprimées par la rétention (purge).
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.snapped_track import SnappedTrack
+
+
+def snap_cache_key(child_id: int, day: date, interval_seconds: int, points: list, backend: str) -> str:
+    """
+    Clé enfant/jour/intervalle/moteur + empreinte des points d'entrée
+
+    L'empreinte couvre aussi la simplification éventuelle, les points
+    arrivés depuis (aujourd'hui) et la version du moteur (backend, cf.
+    gps_service.snap_backend_version) : une trace ou un moteur différent =
+    une clé différente.
+    """
+    digest = hashlib.sha1(f"{backend}|".encode())
+    for p in points:
+        digest.update(f"{p.latitude:.6f},{p.longitude:.6f};".encode())
+    name = backend.split(":", 1)[0]
+    return f"{child_id}:{day.isoformat()}:{interval_seconds}:{name}:{digest.hexdigest()}"
+
+
+class SnapCache:
+    """LRU en mémoire adossé à la table snapped_tracks"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, points: List[dict]) -> None:
+        with self._lock:
+            self._entries[key] = points
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, db: Session, key: str) -> Optional[List[dict]]:
+        """Trace en cache (mémoire puis DB), None si absente"""
+        with self._lock:
+            points = self._entries.get(key)
+            if points is not None:
+                self._entries.move_to_end(key)
+                return points
+
+        row = db.query(SnappedTrack.points).filter(SnappedTrack.cache_key == key).first()
+        if row is None:
+            return None
+
+        points = json.loads(row.points)
+        self._remember(key, points)
+        return points
+
+    def put(self, db: Session, key: str, child_id: int, day: date,
+            points: List[dict], persist: bool) -> None:
+        """Met une trace en cache ; persist=True l'écrit aussi en DB (jour passé)"""
+        self._remember(key, points)
+        if not persist:
+            return
+
+        db.add(SnappedTrack(
+            cache_key=key,
+            child_id=child_id,
+            day=day,
+            points=json.dumps(points)
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Déjà écrite par une requête concurrente
+            db.rollback()
+
+    def purge(self, db: Session, days: Set[Tuple[int, date]]) -> None:
+        """
+        Supprime les traces de ces (child_id, jour), en mémoire et en DB
+
+        Sans commit : à appeler dans la transaction qui fait changer ces jours
+        de palier (rétention).
+        """
+        prefixes = tuple(f"{child_id}:{day.isoformat()}:" for child_id, day in days)
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefixes)]:
+                del self._entries[key]
+
+        by_child = {}
+        for child_id, day in days:
+            by_child.setdefault(child_id, []).append(day)
+        for child_id, child_days in by_child.items():
+            db.execute(delete(SnappedTrack).where(
+                SnappedTrack.child_id == child_id, SnappedTrack.day.in_(child_days)
+            ))
+
+
+snap_cache = SnapCache(settings.SNAP_CACHE_MAX_ENTRIES)
@@ -0,0 +1,259 @@
+"""
+Résumés journaliers de l'historique GPS (table gps_daily_summary)
+Tenus à jour à chaque ingestion : le calendrier et la vue d'ensemble d'une
+journée sont lus dans cette petite table au lieu d'agréger gps_history.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.gps_daily_summary import GPSDailySummary
+from app.models.gps_history import GPSHistory
+from app.services.geo_service import path_length
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite relit des datetimes naïfs ; jours toujours découpés en UTC
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _fix_end(fix: tuple) -> datetime:
+    # Point d'arrêt : le jour se termine au dernier fix regroupé (end_timestamp)
+    return (fix[4] if len(fix) > 4 else None) or fix[0]
+
+
+def _extend(summary: GPSDailySummary, fixes: list) -> None:
+    """Ajoute des points (triés, tous postérieurs au dernier point du résumé)"""
+    lats = [f[1] for f in fixes]
+    lons = [f[2] for f in fixes]
+    batteries = [f[3] for f in fixes if f[3] is not None]
+
+    if summary.point_count:
+        # Segment entre le dernier point connu et le premier nouveau point
+        summary.distance_m += path_length([summary.last_latitude] + lats, [summary.last_longitude] + lons)
+        summary.min_latitude = min(summary.min_latitude, *lats)
+        summary.max_latitude = max(summary.max_latitude, *lats)
+        summary.min_longitude = min(summary.min_longitude, *lons)
+        summary.max_longitude = max(summary.max_longitude, *lons)
+    else:
+        summary.distance_m = path_length(lats, lons)
+        summary.first_fix = fixes[0][0]
+        summary.min_latitude, summary.max_latitude = min(lats), max(lats)
+        summary.min_longitude, summary.max_longitude = min(lons), max(lons)
+
+    if batteries:
+        lowest = min(batteries)
+        summary.min_battery = lowest if summary.min_battery is None else min(summary.min_battery, lowest)
+    summary.point_count += len(fixes)
+    summary.last_fix = _fix_end(fixes[-1])
+    summary.last_latitude = lats[-1]
+    summary.last_longitude = lons[-1]
+
+
+def _new_summary(child_id: int, day: date) -> GPSDailySummary:
+    return GPSDailySummary(child_id=child_id, day=day, point_count=0, distance_m=0.0, min_battery=None)
+
+
+def _day_fixes(db: Session, child_id: int, day: date) -> list:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    end = datetime(day.year, day.month, day.day, 23, 59, 59, 999999, tzinfo=timezone.utc)
+    rows = db.execute(
+        select(GPSHistory.timestamp, GPSHistory.latitude, GPSHistory.longitude, GPSHistory.battery,
+               GPSHistory.end_timestamp)
+        .where(
+            GPSHistory.child_id == child_id,
+            GPSHistory.timestamp >= start,
+            GPSHistory.timestamp <= end
+        )
+        .order_by(GPSHistory.timestamp.asc(), GPSHistory.id.asc())
+    ).all()
+    return [(_utc(ts), lat, lon, battery, end_ts and _utc(end_ts)) for ts, lat, lon, battery, end_ts in rows]
+
+
+def _get_or_create(db: Session, child_id: int, day: date, existing: Dict[date, GPSDailySummary]) -> GPSDailySummary:
+    summary = existing.get(day)
+    if summary is not None:
+        return summary
+
+    summary = _new_summary(child_id, day)
+    fixes = _day_fixes(db, child_id, day)
+    # Création concurrente du même jour : on reprend la ligne déjà créée
+    try:
+        with db.begin_nested():
+            if fixes:
+                _extend(summary, fixes)
+                db.add(summary)
+                db.flush()
+    except IntegrityError:
+        # Attend le commit de l'autre transaction, puis recalcule avec nos points
+        summary = db.execute(
+            select(GPSDailySummary)
+            .where(GPSDailySummary.child_id == child_id, GPSDailySummary.day == day)
+            .with_for_update()
+        ).scalar_one()
+        _recompute(db, summary)
+    return summary
+
+
+def record_daily_summaries(db: Session, child_id: int, fixes: list) -> None:
+    """
+    Met à jour les résumés des jours touchés par des positions déjà insérées
+
+    À appeler dans la transaction d'ingestion, après l'INSERT dans gps_history
+    (les lignes doivent être visibles). Points plus anciens que le dernier
+    point connu du jour (lot rejoué en retard) : jour recalculé depuis
+    gps_history.
+
+    Args:
+        fixes: Tuples (timestamp, latitude, longitude, battery[, end_timestamp])
+    """
+    by_day: Dict[date, list] = {}
+    for fix in fixes:
+        ts = _utc(fix[0])
+        by_day.setdefault(ts.date(), []).append((ts,) + tuple(fix[1:]))
+
+    existing = {
+        summary.day: summary for summary in db.execute(
+            select(GPSDailySummary)
+            .where(GPSDailySummary.child_id == child_id, GPSDailySummary.day.in_(list(by_day)))
+            .with_for_update()
+        ).scalars()
+    }
+
+    for day, day_fixes in by_day.items():
+        day_fixes.sort(key=lambda fix: fix[0])
+        summary = existing.get(day)
+        if summary is None:
+            # Créé depuis gps_history, qui contient déjà ces points
+            _get_or_create(db, child_id, day, existing)
+        elif day_fixes[0][0] < _utc(summary.last_fix):
+            _recompute(db, summary)
+        else:
+            _extend(summary, day_fixes)
+
+
+def record_dwell_extension(db: Session, child_id: int, end: datetime, battery: Optional[int]) -> None:
+    """
+    Point d'arrêt existant prolongé (UPDATE de sa ligne, pas de nouveau point)
+
+    Avance la fin du jour et abaisse sa batterie minimale ; position, emprise
+    et distance ne changent pas. À appeler dans la transaction d'ingestion,
+    après record_daily_summaries.
+    """
+    end = _utc(end)
+    summary = db.execute(
+        select(GPSDailySummary)
+        .where(GPSDailySummary.child_id == child_id, GPSDailySummary.day == end.date())
+        .with_for_update()
+    ).scalar_one_or_none()
+    if summary is None:
+        # Créé depuis gps_history, qui contient déjà la ligne prolongée
+        _get_or_create(db, child_id, end.date(), {})
+        return
+
+    if end > _utc(summary.last_fix):
+        summary.last_fix = end
+    if battery is not None and (summary.min_battery is None or battery < summary.min_battery):
+        summary.min_battery = battery
+
+
+def _recompute(db: Session, summary: GPSDailySummary) -> None:
+    fixes = _day_fixes(db, summary.child_id, summary.day)
+    summary.point_count = 0
+    summary.min_battery = None
+    if fixes:
+        _extend(summary, fixes)
+    else:
+        db.delete(summary)
+
+
+def recompute_daily_summary(db: Session, child_id: int, day: date) -> Optional[GPSDailySummary]:
+    """Recalcule le résumé d'un jour depuis gps_history (None si le jour est vide)"""
+    summary = db.execute(
+        select(GPSDailySummary)
+        .where(GPSDailySummary.child_id == child_id, GPSDailySummary.day == day)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if summary is None:
+        summary = _get_or_create(db, child_id, day, {})
+    else:
+        _recompute(db, summary)
+    db.commit()
+    return summary if summary.point_count else None
+
+
+def rebuild_daily_summaries(db: Session, child_id: Optional[int] = None, chunk_size: int = 5000,
+                            days: Optional[Set[date]] = None) -> int:
+    """
+    Reconstruit les résumés depuis gps_history (backfill)
+
+    Un seul parcours de l'historique trié (child_id, timestamp), lu par blocs :
+    mémoire constante quel que soit le volume. Seuls les jours présents dans
+    gps_history sont réécrits : ceux déjà passés dans un palier de rétention
+    gardent leur résumé (calculé en pleine résolution). days : seulement ces
+    jours (import), lecture bornée du premier au dernier.
+
+    Returns:
+        int: Nombre de résumés écrits
+    """
+    query = select(
+        GPSHistory.child_id, GPSHistory.timestamp, GPSHistory.latitude,
+        GPSHistory.longitude, GPSHistory.battery, GPSHistory.end_timestamp
+    ).order_by(GPSHistory.child_id, GPSHistory.timestamp, GPSHistory.id)
+    if child_id is not None:
+        query = query.where(GPSHistory.child_id == child_id)
+    if days:
+        first, last = min(days), max(days) + timedelta(days=1)
+        query = query.where(
+            GPSHistory.timestamp >= datetime(first.year, first.month, first.day, tzinfo=timezone.utc),
+            GPSHistory.timestamp < datetime(last.year, last.month, last.day, tzinfo=timezone.utc)
+        )
+
+    written = 0
+    current: Optional[GPSDailySummary] = None
+    pending: list = []
+
+    def close_day() -> None:
+        nonlocal written
+        if current is None or (days and current.day not in days):
+            return
+        if pending:
+            _extend(current, pending)
+        db.execute(delete(GPSDailySummary).where(
+            GPSDailySummary.child_id == current.child_id, GPSDailySummary.day == current.day
+        ))
+        db.add(current)
+        written += 1
+
+    rows = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+    for row_child_id, ts, lat, lon, battery, end_ts in rows:
+        ts = _utc(ts)
+        if current is None or current.child_id != row_child_id or current.day != ts.date():
+            close_day()
+            current, pending = _new_summary(row_child_id, ts.date()), []
+        pending.append((ts, lat, lon, battery, end_ts and _utc(end_ts)))
+        if len(pending) >= chunk_size:
+            _extend(current, pending)
+            pending = []
+    close_day()
+
+    db.commit()
+    return written
+
+
+def get_daily_summaries(
+    db: Session,
+    child_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> List[GPSDailySummary]:
+    """Résumés d'un enfant, du plus récent au plus ancien, bornes incluses"""
+    query = select(GPSDailySummary).where(GPSDailySummary.child_id == child_id)
+    if start is not None:
+        query = query.where(GPSDailySummary.day >= start)
+    if end is not None:
+        query = query.where(GPSDailySummary.day <= end)
+    return list(db.execute(query.order_by(GPSDailySummary.day.desc())).scalars())
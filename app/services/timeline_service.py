@@ -0,0 +1,304 @@
+"""
+Chronologie d'une journée : arrêts (stays) et trajets (trips)
+Détection de points d'arrêt en flux sur gps_history : un arrêt est une suite
+de points restés à moins de TIMELINE_STAY_RADIUS_M de leur centre pendant au
+moins TIMELINE_STAY_MIN_SECONDS ; les points entre deux arrêts forment un
+trajet. Chaque journée est gardée en mémoire (LRU) et seuls les points
+arrivés depuis le dernier calcul sont traités.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.gps_history import GPSHistory
+from app.services.gps_service import calculate_distance, day_bounds, get_history_version, iter_gps_history
+from app.services.zone_index import get_zone_index
+
+STAY = "stay"
+TRIP = "trip"
+
+
+class _Run:
+    """Suite de points consécutifs : bornes, longueur parcourue, centre"""
+
+    __slots__ = ("start", "end", "count", "distance", "first", "last", "sum_lat", "sum_lon")
+
+    def __init__(self, ts: datetime, lat: float, lon: float, end: Optional[datetime] = None):
+        self.start = ts
+        self.end = end or ts
+        self.count = 1
+        self.distance = 0.0
+        self.first = self.last = (lat, lon)
+        self.sum_lat, self.sum_lon = lat, lon
+
+    @property
+    def centroid(self) -> tuple:
+        return self.sum_lat / self.count, self.sum_lon / self.count
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start).total_seconds()
+
+    def add(self, ts: datetime, lat: float, lon: float, end: Optional[datetime] = None) -> None:
+        self.distance += calculate_distance(*self.last, lat, lon)
+        self.end = end or ts
+        self.count += 1
+        self.last = (lat, lon)
+        self.sum_lat += lat
+        self.sum_lon += lon
+
+    def absorb(self, other: "_Run") -> None:
+        """Ajoute à la suite une suite postérieure"""
+        self.distance += calculate_distance(*self.last, *other.first) + other.distance
+        self.end = other.end
+        self.count += other.count
+        self.last = other.last
+        self.sum_lat += other.sum_lat
+        self.sum_lon += other.sum_lon
+
+
+class TimelineBuilder:
+    """
+    Segmentation incrémentale d'une trace triée par timestamp
+
+    add() consomme les points un par un (end, fixes : fin et nombre de fixes
+    d'un point d'arrêt regroupé à l'ingestion) ; segments() rend les
+    segments terminés plus l'état en cours (arrêt ou trajet non clos) sans
+    le figer. count / fix_count : lignes et fixes consommés.
+    """
+
+    def __init__(self, radius_m: float, min_stay_seconds: float):
+        self.radius_m = radius_m
+        self.min_stay_seconds = min_stay_seconds
+        self.count = 0
+        self.fix_count = 0
+        self._last_fixes = 0
+        self.last_timestamp: Optional[datetime] = None
+        self._segments: List[dict] = []
+        self._previous_stay: Optional[_Run] = None
+        self._trip: Optional[_Run] = None
+        self._candidate: Optional[_Run] = None
+
+    def add(self, ts: datetime, lat: float, lon: float, end: Optional[datetime] = None, fixes: int = 1) -> None:
+        self.count += 1
+        self.fix_count += fixes
+        self._last_fixes = fixes
+        self.last_timestamp = ts
+        candidate = self._candidate
+        if candidate is None:
+            self._candidate = _Run(ts, lat, lon, end)
+            return
+        if calculate_distance(*candidate.centroid, lat, lon) <= self.radius_m:
+            candidate.add(ts, lat, lon, end)
+            return
+
+        # Le point sort du groupe : arrêt s'il a assez duré, sinon trajet
+        if candidate.duration >= self.min_stay_seconds:
+            trip = self._trip_segment(self._trip, candidate)
+            if trip is not None:
+                self._segments.append(trip)
+            self._segments.append(self._stay_segment(candidate, ongoing=False))
+            self._previous_stay, self._trip = candidate, None
+        elif self._trip is None:
+            self._trip = candidate
+        else:
+            self._trip.absorb(candidate)
+        self._candidate = _Run(ts, lat, lon, end)
+
+    def extend_last(self, end: Optional[datetime], fixes: int) -> None:
+        """Le dernier point (point d'arrêt) a été prolongé jusqu'à end, fixes au total"""
+        self.fix_count += fixes - self._last_fixes
+        self._last_fixes = fixes
+        if end is not None and self._candidate is not None and end > self._candidate.end:
+            self._candidate.end = end
+
+    def segments(self) -> List[dict]:
+        segments = list(self._segments)
+        candidate = self._candidate
+        if candidate is None:
+            return segments
+
+        if candidate.duration >= self.min_stay_seconds:
+            trip = self._trip_segment(self._trip, candidate)
+            if trip is not None:
+                segments.append(trip)
+            segments.append(self._stay_segment(candidate, ongoing=True))
+            return segments
+
+        # Groupe trop court pour être un arrêt : fin du trajet en cours
+        trip = candidate
+        if self._trip is not None:
+            trip = copy.copy(self._trip)
+            trip.absorb(candidate)
+        segments.append(self._trip_segment(trip, None))
+        return segments
+
+    @staticmethod
+    def _stay_segment(run: _Run, ongoing: bool) -> dict:
+        latitude, longitude = run.centroid
+        return {
+            "type": STAY,
+            "start": run.start,
+            "end": run.end,
+            "duration_seconds": run.duration,
+            "latitude": latitude,
+            "longitude": longitude,
+            "point_count": run.count,
+            "ongoing": ongoing,
+        }
+
+    def _trip_segment(self, trip: Optional[_Run], next_stay: Optional[_Run]) -> Optional[dict]:
+        """Trajet entre l'arrêt précédent (ou le début du jour) et next_stay (ou la fin)"""
+        previous = self._previous_stay
+        if trip is None and previous is None:
+            # Jour commencé directement par un arrêt
+            return None
+
+        # Trajet raccordé aux centres des arrêts qui l'encadrent
+        distance = 0.0
+        if trip is not None:
+            distance = trip.distance
+            if previous is not None:
+                distance += calculate_distance(*previous.centroid, *trip.first)
+            if next_stay is not None:
+                distance += calculate_distance(*trip.last, *next_stay.centroid)
+        elif next_stay is not None:
+            distance = calculate_distance(*previous.centroid, *next_stay.centroid)
+
+        start = previous.end if previous is not None else trip.start
+        end = next_stay.start if next_stay is not None else trip.end
+        return {
+            "type": TRIP,
+            "start": start,
+            "end": end,
+            "duration_seconds": (end - start).total_seconds(),
+            "distance_m": distance,
+            "point_count": trip.count if trip is not None else 0,
+        }
+
+
+class TimelineCache:
+    """Chronologies en cours de calcul par (enfant, jour), LRU en mémoire"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, version: tuple, builder: TimelineBuilder) -> None:
+        with self._lock:
+            self._entries[key] = (version, builder)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+timeline_cache = TimelineCache(settings.TIMELINE_CACHE_MAX_ENTRIES)
+
+
+def _new_builder() -> TimelineBuilder:
+    return TimelineBuilder(settings.TIMELINE_STAY_RADIUS_M, settings.TIMELINE_STAY_MIN_SECONDS)
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _fixes_since(db: Session, child_id: int, since: datetime, end: datetime):
+    """Lignes de gps_history à partir du dernier point traité (inclus : il a pu être prolongé)"""
+    rows = db.execute(
+        select(GPSHistory.timestamp, GPSHistory.latitude, GPSHistory.longitude,
+               GPSHistory.end_timestamp, GPSHistory.fix_count)
+        .where(
+            GPSHistory.child_id == child_id,
+            GPSHistory.timestamp >= since,
+            GPSHistory.timestamp <= end
+        )
+        .order_by(GPSHistory.timestamp.asc(), GPSHistory.id.asc())
+    )
+    for ts, lat, lon, end_ts, fixes in rows:
+        yield _utc(ts), lat, lon, end_ts and _utc(end_ts), fixes
+
+
+def _builder_for_day(db: Session, child_id: int, day: date) -> TimelineBuilder:
+    """
+    Chronologie du jour à jour de gps_history
+
+    Version inchangée : cache tel quel. Points ajoutés après le dernier point
+    traité (ou dernier point d'arrêt prolongé) : seuls ceux-là sont lus, et
+    gardés si lignes et fixes comptés correspondent à la version (nombre de
+    lignes, somme de fix_count). Sinon (lot rejoué en retard, points
+    supprimés) : recalcul complet du jour.
+    """
+    key = (child_id, day)
+    version = get_history_version(db, child_id, day)
+    start, end = day_bounds(day)
+
+    entry = timeline_cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    if entry is not None and entry[1].count:
+        # Copie : une autre requête peut lire la version en cache en parallèle
+        builder = copy.deepcopy(entry[1])
+        new_fixes = list(_fixes_since(db, child_id, builder.last_timestamp, end))
+        if new_fixes and new_fixes[0][0] == builder.last_timestamp:
+            *_, last_end, last_fixes = new_fixes.pop(0)
+            builder.extend_last(last_end, last_fixes)
+        rows, _, fixes = version[:3]
+        if (builder.count + len(new_fixes) == rows
+                and builder.fix_count + sum(fix[4] for fix in new_fixes) == (fixes or 0)):
+            for fix in new_fixes:
+                builder.add(*fix)
+            timeline_cache.put(key, version, builder)
+            return builder
+
+    builder = _new_builder()
+    # Tous paliers de rétention confondus (jours anciens : trace simplifiée)
+    for p in iter_gps_history(db, child_id, start, start + timedelta(days=1)):
+        builder.add(_utc(p.timestamp), p.latitude, p.longitude, p.end_timestamp and _utc(p.end_timestamp),
+                    p.fix_count)
+    timeline_cache.put(key, version, builder)
+    return builder
+
+
+def get_timeline(db: Session, child_id: int, day: Optional[date] = None) -> List[dict]:
+    """
+    Arrêts et trajets d'un enfant sur une journée, dans l'ordre
+
+    Chaque arrêt est rapproché de la zone de confiance qui contient son centre
+    (zone_id / zone_name, None hors zone) ; le rapprochement est refait à
+    chaque lecture, les zones pouvant changer.
+    """
+    builder = _builder_for_day(db, child_id, day or date.today())
+    index = get_zone_index(db, child_id)
+    timeline = []
+    for segment in builder.segments():
+        if segment["type"] == STAY:
+            zone = index.find(segment["latitude"], segment["longitude"])
+            segment = dict(segment, zone_id=zone.id if zone else None, zone_name=zone.name if zone else None)
+        timeline.append(segment)
+    return timeline
+
+
+def clear_timelines() -> None:
+    timeline_cache.clear()
@@ -0,0 +1,135 @@
+"""
+Service de simplification de traces GPS
+Simplification géométrique (Douglas-Peucker / Visvalingam-Whyatt) vectorisée
+avec NumPy : garde les virages, supprime les points redondants à l'arrêt
+"""
+import numpy as np
+
+from app.services.geo_service import EARTH_RADIUS_M
+
+SIMPLIFY_METHODS = ("dp", "vw")
+
+
+def project_to_meters(lats: np.ndarray, lons: np.ndarray) -> tuple:
+    """
+    Projection équirectangulaire locale (mètres) autour de la latitude moyenne
+
+    Largement suffisant à l'échelle d'une journée de trajets (erreur < 0.1 %
+    sur quelques dizaines de km).
+    """
+    lat0 = np.radians(lats.mean())
+    x = np.radians(lons) * EARTH_RADIUS_M * np.cos(lat0)
+    y = np.radians(lats) * EARTH_RADIUS_M
+    return x, y
+
+
+def douglas_peucker_mask(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker vectorisé : masque des points à garder
+
+    Tous les segments d'une même profondeur de récursion sont traités en une
+    seule passe NumPy (distance de chaque point à la corde de son segment,
+    max par segment avec reduceat) ; seuls les segments encore au-dessus de
+    la tolérance sont repris. Résultat identique à la version récursive.
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    # Points intermédiaires des segments pas encore figés
+    active = np.arange(1, n - 1)
+
+    while len(active):
+        kept = np.flatnonzero(keep)
+        seg = np.searchsorted(kept, active, side="right") - 1
+        first, last = kept[seg], kept[seg + 1]
+
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[active] - x[first]
+        py = y[active] - y[first]
+        chord = np.hypot(dx, dy)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Corde nulle (boucle fermée) : distance au point de départ
+            dist = np.where(chord > 0, np.abs(px * dy - py * dx) / chord, np.hypot(px, py))
+
+        seg_ids, starts = np.unique(seg, return_index=True)
+        seg_max = np.maximum.reduceat(dist, starts)
+        split = seg_max > tolerance
+        if not split.any():
+            break
+
+        # Premier maximum de chaque segment à couper, comme argmax
+        run = np.repeat(np.arange(len(seg_ids)), np.diff(np.append(starts, len(seg))))
+        is_max = (dist == seg_max[run]) & split[run]
+        _, first_max = np.unique(run[is_max], return_index=True)
+        keep[active[np.flatnonzero(is_max)[first_max]]] = True
+
+        # Les segments sous la tolérance sont figés, le point de coupe sort du lot
+        still = split[run] & ~keep[active]
+        active = active[still]
+
+    return keep
+
+
+def visvalingam_mask(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Visvalingam-Whyatt par passes vectorisées : masque des points à garder
+
+    À chaque passe, tous les points dont le triangle effectif a une aire
+    < tolerance² et qui sont un minimum local (pas deux voisins retirés
+    ensemble) sont supprimés, jusqu'à stabilité.
+    """
+    n = len(x)
+    idx = np.arange(n)
+    threshold = tolerance ** 2
+
+    while len(idx) > 2:
+        ax, ay = x[idx[:-2]], y[idx[:-2]]
+        bx, by = x[idx[1:-1]], y[idx[1:-1]]
+        cx, cy = x[idx[2:]], y[idx[2:]]
+        area = np.abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+
+        padded = np.concatenate(([np.inf], area, [np.inf]))
+        removable = (
+            (area < threshold)
+            & (area <= padded[:-2])
+            & (area < padded[2:])
+        )
+        if not removable.any():
+            break
+        idx = np.concatenate(([idx[0]], idx[1:-1][~removable], [idx[-1]]))
+
+    keep = np.zeros(n, dtype=bool)
+    keep[idx] = True
+    return keep
+
+
+def simplify_track(points: list, method: str = "dp", tolerance_m: float = 10.0) -> list:
+    """
+    Simplifie une trace GPS en conservant sa forme
+
+    Args:
+        points: Points ordonnés dans le temps (attributs latitude / longitude)
+        method: "dp" (Douglas-Peucker) ou "vw" (Visvalingam-Whyatt)
+        tolerance_m: Écart maximal toléré en mètres
+
+    Returns:
+        list: Sous-liste des points d'origine (premier et dernier toujours gardés)
+    """
+    if method not in SIMPLIFY_METHODS:
+        raise ValueError(f"Unknown simplification method: {method}")
+    if len(points) < 3:
+        return list(points)
+
+    lats = np.fromiter((p.latitude for p in points), dtype=np.float64, count=len(points))
+    lons = np.fromiter((p.longitude for p in points), dtype=np.float64, count=len(points))
+    x, y = project_to_meters(lats, lons)
+
+    if method == "dp":
+        keep = douglas_peucker_mask(x, y, tolerance_m)
+    else:
+        keep = visvalingam_mask(x, y, tolerance_m)
+
+    return [points[i] for i in np.flatnonzero(keep)]
@@ -0,0 +1,137 @@
+"""
+Index spatial des zones de confiance
+Zones de chaque enfant rangées en mémoire par cellule de grille : un test
+d'appartenance ne calcule la distance qu'aux zones de la cellule du point.
+Invalidé par create_location / update_location / delete_location.
+"""
+import math
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.location import Location
+from app.services.geo_service import EARTH_RADIUS_M, haversine, haversine_matrix
+
+# ~1.1 km de côté en latitude
+CELL_DEGREES = 0.01
+DEFAULT_RADIUS_M = 100
+# Même sphère que haversine : la boîte englobante d'une zone couvre son rayon
+METERS_PER_DEGREE = math.radians(EARTH_RADIUS_M)
+
+Zone = namedtuple("Zone", ["id", "name", "latitude", "longitude", "radius"])
+
+
+def _cell(lat: float, lon: float) -> tuple:
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+class ZoneIndex:
+    """Zones d'un enfant indexées par cellule (chaque zone dans toutes les cellules qu'elle touche)"""
+
+    def __init__(self, zones: List[Zone]):
+        self.zones = zones
+        self._lat = np.array([z.latitude for z in zones], dtype=np.float64)
+        self._lon = np.array([z.longitude for z in zones], dtype=np.float64)
+        self._radius = np.array([z.radius for z in zones], dtype=np.float64)
+
+        cells: Dict[tuple, List[int]] = {}
+        for position, zone in enumerate(zones):
+            dlat = zone.radius / METERS_PER_DEGREE
+            dlon = zone.radius / (METERS_PER_DEGREE * max(math.cos(math.radians(zone.latitude)), 1e-6))
+            lat0, lon0 = _cell(zone.latitude - dlat, zone.longitude - dlon)
+            lat1, lon1 = _cell(zone.latitude + dlat, zone.longitude + dlon)
+            for i in range(lat0, lat1 + 1):
+                for j in range(lon0, lon1 + 1):
+                    cells.setdefault((i, j), []).append(position)
+        # Positions (ordre des ids) des zones de chaque cellule
+        self._cells = {cell: np.array(ids, dtype=np.int64) for cell, ids in cells.items()}
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    @property
+    def radii(self) -> np.ndarray:
+        return self._radius
+
+    def distances(self, lats, lons) -> np.ndarray:
+        """Distances (mètres) de chaque point à chaque zone : tableau (points, zones)"""
+        return haversine_matrix(lats, lons, self._lat, self._lon)
+
+    def candidates(self, lat: float, lon: float) -> List[Zone]:
+        """Zones dont l'emprise touche la cellule du point (ordre des ids)"""
+        return [self.zones[i] for i in self._cells.get(_cell(lat, lon), ())]
+
+    def find(self, lat: float, lon: float) -> Optional[Zone]:
+        """Première zone (par id) qui contient le point, None sinon"""
+        ids = self._cells.get(_cell(lat, lon))
+        if ids is None:
+            return None
+        inside = haversine(lat, lon, self._lat[ids], self._lon[ids]) <= self._radius[ids]
+        if not inside.any():
+            return None
+        return self.zones[ids[np.argmax(inside)]]
+
+    def locate(self, lats, lons, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Zone de chaque point d'une trace en un seul calcul points × zones
+
+        Returns:
+            np.ndarray: Position dans self.zones de la première zone (par id)
+            contenant chaque point, -1 hors zone
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        result = np.full(len(lats), -1, dtype=np.int64)
+        if not self.zones:
+            return result
+
+        # Par blocs : matrice bornée à chunk_size × nombre de zones
+        for start in range(0, len(lats), chunk_size):
+            block = slice(start, start + chunk_size)
+            inside = self.distances(lats[block], lons[block]) <= self._radius
+            first = np.argmax(inside, axis=1)
+            result[block] = np.where(inside.any(axis=1), first, -1)
+        return result
+
+
+_indexes: Dict[int, ZoneIndex] = {}
+# Incrémenté à chaque invalidation : un index lu avant n'est pas mis en cache
+_generations: Dict[int, int] = {}
+_lock = threading.Lock()
+
+
+def get_zone_index(db: Session, child_id: int) -> ZoneIndex:
+    """Index des zones d'un enfant, construit depuis la DB au premier appel"""
+    index = _indexes.get(child_id)
+    if index is not None:
+        return index
+
+    generation = _generations.get(child_id, 0)
+
+    rows = db.query(
+        Location.id, Location.name, Location.latitude, Location.longitude, Location.radius
+    ).filter(Location.child_id == child_id).order_by(Location.id).all()
+    index = ZoneIndex([
+        Zone(row.id, row.name, row.latitude, row.longitude,
+             row.radius if row.radius is not None else DEFAULT_RADIUS_M)
+        for row in rows
+    ])
+    with _lock:
+        if _generations.get(child_id, 0) == generation:
+            _indexes[child_id] = index
+    return index
+
+
+def invalidate_child_zones(child_id: int) -> None:
+    """À appeler après toute modification des zones d'un enfant"""
+    with _lock:
+        _indexes.pop(child_id, None)
+        _generations[child_id] = _generations.get(child_id, 0) + 1
+
+
+def clear_zone_indexes() -> None:
+    with _lock:
+        _indexes.clear()
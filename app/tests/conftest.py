@@ -3,11 +3,19 @@ Configuration pytest - Fixtures communes pour tous les tests
 """
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.database import Base
 from app.models.user import User
 from app.models.child import Child
 from app.core.security import hash_password
+from app.services.zone_index import clear_zone_indexes
+from app.services.geofence_service import clear_geofence_states
+from app.services.gps_service import clear_clock_offsets
+from app.services.position_cache import position_cache
+from app.services.reporting_service import motion_tracker
+from app.services.timeline_service import clear_timelines
 
 # Base de données de test en mémoire (SQLite)
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -18,6 +26,16 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Routes async (get_async_db) : même fichier via aiosqlite ; NullPool car
+# chaque TestClient tourne sur sa propre boucle d'événements
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as session:
+        yield session
+
 
 @pytest.fixture(scope="function")
 def db():
@@ -29,6 +47,13 @@ def db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # Caches en mémoire indexés par id : les ids sont réutilisés d'un test à l'autre
+        clear_zone_indexes()
+        clear_geofence_states()
+        clear_clock_offsets()
+        position_cache.clear()
+        clear_timelines()
+        motion_tracker.clear()
 
 
 @pytest.fixture
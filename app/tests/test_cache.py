@@ -0,0 +1,156 @@
+"""
+Tests unitaires - Cache (app.core.cache) et cache des dernières positions
+"""
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.core.cache import MemoryCache, RedisCache, build_cache
+from app.schemas.gps import GPSResponse, GPSUpdate
+from app.services.child_service import delete_child
+from app.services.gps_service import get_child_last_position, update_child_gps
+from app.services.position_cache import PositionCache, position_cache
+
+
+class LocalRedis:
+    """Bouchon local au protocole Redis (get / set ex= / delete), expiration comprise"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, 0))
+        if value is None or expires_at <= time.monotonic():
+            return None
+        return value.encode()
+
+    def set(self, key, value, ex):
+        self.data[key] = (value, time.monotonic() + ex)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(time, "monotonic", fake)
+    return fake
+
+
+@pytest.mark.parametrize("backend", [MemoryCache, lambda: RedisCache(LocalRedis())])
+def test_cache_ttl(backend, clock):
+    cache = backend()
+    cache.set("k", {"a": 1}, ttl_seconds=10)
+    assert cache.get("k") == {"a": 1}
+
+    clock.now += 11
+    assert cache.get("k") is None
+
+
+@pytest.mark.parametrize("backend", [MemoryCache, lambda: RedisCache(LocalRedis())])
+def test_cache_delete(backend):
+    cache = backend()
+    cache.set("k", [1, 2], ttl_seconds=10)
+    cache.delete("k")
+    assert cache.get("k") is None
+
+
+def test_build_cache():
+    assert isinstance(build_cache("memory"), MemoryCache)
+    with pytest.raises(ValueError):
+        build_cache("memcached")
+
+
+@pytest.mark.parametrize("backend", [MemoryCache, lambda: RedisCache(LocalRedis())])
+def test_position_cache_keeps_newest(backend):
+    """Ingestion plus lente terminée après une plus récente : la position en cache ne recule pas"""
+    cache = PositionCache(backend(), ttl_seconds=60)
+    newest = GPSResponse(child_id=1, latitude=44.9, longitude=-0.57, battery=70,
+                         last_update="2026-03-03T12:05:00Z")
+    older = GPSResponse(child_id=1, latitude=44.8, longitude=-0.57, battery=80,
+                        last_update="2026-03-03T12:00:00")
+
+    cache.put(newest)
+    cache.put(older)
+    assert cache.get(1).latitude == 44.9
+
+    cache.put(GPSResponse(child_id=1, latitude=45.0, longitude=-0.57, battery=69,
+                          last_update="2026-03-03T12:06:00Z"))
+    assert cache.get(1).latitude == 45.0
+
+
+def test_position_cache_redis_roundtrip(db, test_child):
+    cache = PositionCache(RedisCache(LocalRedis()), ttl_seconds=60)
+    response = update_child_gps(db, test_child.id, GPSUpdate(
+        latitude=44.84, longitude=-0.57, battery=80, timestamp="2026-03-03T12:00:00Z"
+    ))
+
+    cache.put(response)
+
+    assert cache.get(test_child.id) == GPSResponse(**response.model_dump(exclude={"reporting"}))
+
+
+# ─── get_child_last_position ────────────────────────────────────────────────
+
+@pytest.fixture
+def queries(db):
+    """Requêtes SQL exécutées pendant le test"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    yield statements
+    event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+def test_last_position_served_from_cache(db, test_child, queries):
+    """Après ingestion (write-through), la lecture ne touche pas la DB"""
+    child_id = test_child.id
+    update_child_gps(db, child_id, GPSUpdate(
+        latitude=44.84, longitude=-0.57, battery=80, timestamp="2026-03-03T12:00:00Z"
+    ))
+    queries.clear()
+
+    position = get_child_last_position(db, child_id)
+
+    assert position.latitude == 44.84
+    assert queries == []
+
+
+def test_last_position_miss_fills_cache(db, test_child):
+    assert position_cache.get(test_child.id) is None
+
+    get_child_last_position(db, test_child.id)
+
+    assert position_cache.get(test_child.id).child_id == test_child.id
+
+
+def test_last_position_expired_reads_db(db, test_child, clock, queries):
+    update_child_gps(db, test_child.id, GPSUpdate(
+        latitude=44.84, longitude=-0.57, battery=80, timestamp="2026-03-03T12:00:00Z"
+    ))
+    clock.now += position_cache.ttl_seconds + 1
+    queries.clear()
+
+    assert get_child_last_position(db, test_child.id).latitude == 44.84
+    assert queries
+
+
+def test_delete_child_invalidates_position(db, test_user, test_child):
+    get_child_last_position(db, test_child.id)
+
+    delete_child(db, test_child.id, test_user.id)
+
+    assert position_cache.get(test_child.id) is None
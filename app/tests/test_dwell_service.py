@@ -0,0 +1,149 @@
+"""
+Tests unitaires - Dwell Service
+Couvre : regroupement des fixes immobiles à l'ingestion, seuils distance /
+         précision / écart, chronologie et version d'historique, ajout des
+         colonnes à une table existante
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.core import database
+from app.core.config import settings
+from app.models.child import Child
+from app.models.gps_history import GPSHistory
+from app.schemas.gps import GPSUpdate
+from app.services.gps_service import (
+    get_gps_history, get_history_days, get_history_version, update_child_gps, update_child_gps_batch
+)
+from app.services.summary_service import get_daily_summaries
+from app.services.timeline_service import get_timeline
+
+HOME = (45.75, 4.85)
+M_PER_DEG = 111194.93
+START = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+
+
+def fix(meters: float, seconds: int, accuracy: float = None) -> GPSUpdate:
+    return GPSUpdate(latitude=HOME[0] + meters / M_PER_DEG, longitude=HOME[1], battery=80,
+                     accuracy=accuracy, timestamp=(START + timedelta(seconds=seconds)).isoformat())
+
+
+def rows(db, child_id):
+    return [
+        (round((row.latitude - HOME[0]) * M_PER_DEG), row.fix_count,
+         row.end_timestamp and row.end_timestamp.replace(tzinfo=None))
+        for row in db.query(GPSHistory).filter(GPSHistory.child_id == child_id).order_by(GPSHistory.timestamp)
+    ]
+
+
+def at(seconds: int) -> datetime:
+    return (START + timedelta(seconds=seconds)).replace(tzinfo=None)
+
+
+def test_stationary_fixes_collapse_into_one_row(db, test_child):
+    # Bruit de quelques mètres autour du premier fix, un fix toutes les 10 s
+    result = update_child_gps_batch(db, test_child.id, [fix(m, 10 * i) for i, m in enumerate([0, 4, -6, 8, 2])])
+
+    assert result.inserted == 5
+    assert rows(db, test_child.id) == [(0, 5, at(40))]
+    child = db.query(Child).filter(Child.id == test_child.id).first()
+    assert child.last_update.replace(tzinfo=None) == at(40)
+
+
+def test_movement_and_gap_start_new_rows(db, test_child):
+    update_child_gps_batch(db, test_child.id, [
+        fix(0, 0), fix(5, 10),
+        fix(100, 20),                              # déplacement : nouvelle ligne
+        fix(105, 30),
+        fix(105, 30 + settings.GPS_DEDUP_MAX_GAP_SECONDS + 1),  # trou : nouvelle ligne
+    ])
+    assert [(m, count) for m, count, _ in rows(db, test_child.id)] == [(0, 2), (100, 2), (105, 1)]
+
+
+def test_reported_accuracy_widens_threshold(db, test_child):
+    # 30 m d'écart : bruit pour un fix à ±40 m de précision, déplacement sinon
+    update_child_gps_batch(db, test_child.id, [fix(0, 0), fix(30, 10, accuracy=40), fix(60, 20, accuracy=100)])
+    # Précision plafonnée à GPS_DEDUP_MAX_DISTANCE_M (50 m)
+    assert [(m, count) for m, count, _ in rows(db, test_child.id)] == [(0, 2), (60, 1)]
+
+
+def test_dwell_extended_across_requests(db, test_child):
+    update_child_gps_batch(db, test_child.id, [fix(0, 0), fix(3, 10)])
+    version = get_history_version(db, test_child.id, date(2026, 3, 3))
+
+    update_child_gps_batch(db, test_child.id, [fix(2, 20), fix(1, 30)])
+
+    assert rows(db, test_child.id) == [(0, 4, at(30))]
+    # Même nombre de lignes, mais la version change (ETag, chronologie)
+    assert get_history_version(db, test_child.id, date(2026, 3, 3)) != version
+
+
+def test_single_updates_collapse(db, test_child):
+    update_child_gps(db, test_child.id, fix(0, 0))
+    update_child_gps(db, test_child.id, fix(3, 10))
+
+    [(_, count, end)] = rows(db, test_child.id)
+    assert count == 2 and end is not None
+
+
+def test_dedup_disabled(db, test_child, monkeypatch):
+    monkeypatch.setattr(settings, "GPS_DEDUP_ENABLED", False)
+    update_child_gps_batch(db, test_child.id, [fix(0, 0), fix(3, 10)])
+    assert len(rows(db, test_child.id)) == 2
+
+
+def test_timeline_uses_dwell_duration(db, test_child):
+    day = date(2026, 3, 3)
+    # 20 min immobile (une seule ligne), puis départ
+    update_child_gps_batch(db, test_child.id, [fix(0, 60 * m) for m in range(11)])
+    assert [s["type"] for s in get_timeline(db, test_child.id, day)] == ["stay"]
+
+    # Arrêt prolongé par un nouvel envoi : chronologie en cache mise à jour
+    update_child_gps_batch(db, test_child.id, [fix(0, 60 * m) for m in range(11, 21)])
+    [stay] = get_timeline(db, test_child.id, day)
+    assert stay["duration_seconds"] == 20 * 60
+
+    update_child_gps_batch(db, test_child.id, [fix(500, 60 * 21), fix(1000, 60 * 22)])
+    assert [s["type"] for s in get_timeline(db, test_child.id, day)] == ["stay", "trip"]
+
+
+def test_dwell_split_at_midnight_and_summaries_follow(db, test_child):
+    # Immobile de 23:50 à 00:19 (UTC), batterie qui baisse d'un point par minute
+    evening = datetime(2026, 3, 3, 23, 50, tzinfo=timezone.utc)
+    stay = [
+        GPSUpdate(latitude=HOME[0], longitude=HOME[1], battery=90 - m,
+                  timestamp=(evening + timedelta(minutes=m)).isoformat())
+        for m in range(30)
+    ]
+    update_child_gps_batch(db, test_child.id, stay[:5])
+    for position in stay[5:]:
+        update_child_gps(db, test_child.id, position)
+
+    assert [(count, end.time().isoformat()) for _, count, end in rows(db, test_child.id)] == [
+        (10, "23:59:00"), (20, "00:19:00")
+    ]
+    assert get_history_days(db, test_child.id) == ["2026-03-04", "2026-03-03"]
+    assert len(get_gps_history(db, test_child.id, date(2026, 3, 4), 0)) == 1
+
+    after, before = get_daily_summaries(db, test_child.id)
+    assert (before.min_battery, before.last_fix.replace(tzinfo=None)) == (81, datetime(2026, 3, 3, 23, 59))
+    assert (after.min_battery, after.last_fix.replace(tzinfo=None)) == (61, datetime(2026, 3, 4, 0, 19))
+    assert db.query(GPSHistory.battery).order_by(GPSHistory.timestamp).all() == [(81,), (61,)]
+
+
+def test_init_db_adds_missing_columns(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE gps_history (id INTEGER PRIMARY KEY, child_id INTEGER NOT NULL, "
+            "latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, battery INTEGER, timestamp DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO gps_history (child_id, latitude, longitude) VALUES (1, 45.0, 4.0)"))
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.init_db()
+
+    assert {"end_timestamp", "fix_count"} <= {c["name"] for c in inspect(engine).get_columns("gps_history")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT fix_count, end_timestamp FROM gps_history")).one() == (1, None)
@@ -0,0 +1,64 @@
+"""
+Tests unitaires - Geo Service
+Couvre : haversine vectorisé (précision vs calculate_distance), matrice, longueur de trace
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.geo_service import haversine, haversine_matrix, path_length
+from app.services.gps_service import calculate_distance
+
+
+def random_points(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [(rng.uniform(-89, 89), rng.uniform(-180, 180)) for _ in range(n)]
+
+
+def test_haversine_matches_scalar():
+    """Mêmes distances que calculate_distance, du mètre aux antipodes"""
+    a = random_points(500, seed=1)
+    b = random_points(500, seed=2)
+    expected = [calculate_distance(p[0], p[1], q[0], q[1]) for p, q in zip(a, b)]
+
+    a, b = np.array(a), np.array(b)
+    result = haversine(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_haversine_short_distances():
+    """Précision sub-millimétrique à l'échelle d'une zone de confiance"""
+    lat, lon = 44.8378, -0.5792
+    offsets = np.linspace(0, 1e-3, 50)
+    expected = [calculate_distance(lat, lon, lat + d, lon + d) for d in offsets]
+    result = haversine(lat, lon, lat + offsets, lon + offsets)
+    np.testing.assert_allclose(result, expected, atol=1e-3)
+
+
+def test_haversine_antipodes():
+    assert haversine(0.0, 0.0, 0.0, 180.0) == pytest.approx(np.pi * 6371000)
+
+
+def test_haversine_matrix_shape_and_values():
+    points = random_points(7)
+    zones = random_points(3, seed=5)
+    matrix = haversine_matrix([p[0] for p in points], [p[1] for p in points],
+                              [z[0] for z in zones], [z[1] for z in zones])
+
+    assert matrix.shape == (7, 3)
+    for i, p in enumerate(points):
+        for j, z in enumerate(zones):
+            assert matrix[i, j] == pytest.approx(calculate_distance(p[0], p[1], z[0], z[1]))
+
+
+def test_path_length():
+    lats = [44.8378, 44.8387, 44.8396]
+    lons = [-0.5792] * 3
+    expected = sum(calculate_distance(lats[i], lons[i], lats[i + 1], lons[i + 1]) for i in range(2))
+    assert path_length(lats, lons) == pytest.approx(expected)
+
+
+def test_path_length_too_short():
+    assert path_length([], []) == 0.0
+    assert path_length([44.8], [-0.57]) == 0.0
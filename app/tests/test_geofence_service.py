@@ -0,0 +1,185 @@
+"""
+Tests unitaires - Geofence Service
+Couvre : détection entrée / sortie avec hystérésis à l'ingestion,
+         rechargement de l'état, état périmé après une ingestion concurrente,
+         lecture par curseur (délai de sécurité, ids commités dans le
+         désordre), fixes en retard ignorés
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.child import Child
+from app.models.geofence_event import GeofenceEvent
+from app.models.location import Location
+from app.schemas.gps import GPSUpdate
+from app.services.geofence_service import (
+    clear_geofence_states,
+    get_geofence_events,
+    get_parent_geofence_events,
+)
+from app.services.gps_service import update_child_gps, update_child_gps_batch
+
+HOME = (45.75, 4.85)
+# Mètres par degré de latitude (R = 6371 km)
+M_PER_DEG = 111194.93
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(monkeypatch):
+    """Événements lus aussitôt détectés (le délai de sécurité a son propre test)"""
+    monkeypatch.setattr(settings, "GEOFENCE_EVENTS_SAFETY_LAG_SECONDS", 0.0)
+
+
+def north(meters: float) -> float:
+    return HOME[0] + meters / M_PER_DEG
+
+
+def fix(meters: float, minute: int = 0) -> GPSUpdate:
+    ts = datetime(2026, 3, 3, 8, minute, tzinfo=timezone.utc)
+    return GPSUpdate(latitude=north(meters), longitude=HOME[1], battery=80, timestamp=ts.isoformat())
+
+
+def add_home(db, child_id, radius=100):
+    zone = Location(name="Maison", latitude=HOME[0], longitude=HOME[1], radius=radius, child_id=child_id)
+    db.add(zone)
+    db.commit()
+    return zone
+
+
+def events(db, child_id):
+    return [
+        (e.event_type, e.zone_name)
+        for e in db.query(GeofenceEvent).filter(GeofenceEvent.child_id == child_id).order_by(GeofenceEvent.id)
+    ]
+
+
+def test_enter_and_exit_with_hysteresis(db, test_child):
+    """Bruit au bord du rayon (100 m, marge 25 m) : pas d'allers-retours"""
+    add_home(db, test_child.id)
+
+    for minute, meters in enumerate((200, 50, 110, 95, 120)):
+        update_child_gps(db, test_child.id, fix(meters, minute))
+    assert events(db, test_child.id) == [("enter", "Maison")]
+
+    for minute, meters in enumerate((130, 110, 105), start=5):
+        update_child_gps(db, test_child.id, fix(meters, minute))
+    assert events(db, test_child.id) == [("enter", "Maison"), ("exit", "Maison")]
+
+    update_child_gps(db, test_child.id, fix(90, 8))
+    assert events(db, test_child.id)[-1] == ("enter", "Maison")
+
+
+def test_late_fixes_do_not_replay_transitions(db, test_child):
+    """Fixes antérieurs à la position courante : enregistrés, mais pas d'entrée / sortie rejouée"""
+    add_home(db, test_child.id)
+    update_child_gps(db, test_child.id, fix(300, 0))
+    update_child_gps(db, test_child.id, fix(300, 10))
+
+    # Passage par la maison entre 08:00 et 08:10, reçu après coup
+    update_child_gps_batch(db, test_child.id, [fix(0, 4), fix(300, 6)])
+
+    assert events(db, test_child.id) == []
+
+
+def test_no_zones_no_events(db, test_child):
+    update_child_gps(db, test_child.id, fix(0))
+    assert events(db, test_child.id) == []
+
+
+def test_batch_uses_chronological_order(db, test_child):
+    """Lot rejoué dans le désordre : transitions dans l'ordre des horodatages"""
+    add_home(db, test_child.id)
+
+    update_child_gps_batch(db, test_child.id, [fix(500, minute=2), fix(0, minute=1), fix(400, minute=0)])
+
+    rows = db.query(GeofenceEvent).order_by(GeofenceEvent.id).all()
+    assert [(e.event_type, e.timestamp.minute) for e in rows] == [("enter", 1), ("exit", 2)]
+
+
+def test_state_reloaded_from_events(db, test_child):
+    """Après redémarrage (état mémoire perdu) : pas de nouvelle entrée en double"""
+    add_home(db, test_child.id)
+    update_child_gps(db, test_child.id, fix(0))
+
+    clear_geofence_states()
+    update_child_gps(db, test_child.id, fix(10, 1))
+    update_child_gps(db, test_child.id, fix(300, 2))
+
+    assert events(db, test_child.id) == [("enter", "Maison"), ("exit", "Maison")]
+
+
+def test_stale_state_after_concurrent_ingest_reloaded(db, test_child, monkeypatch):
+    """Ingestion concurrente commitée, état pas encore retenu ici : pas d'entrée en double"""
+    from app.services import gps_service
+
+    add_home(db, test_child.id)
+    update_child_gps(db, test_child.id, fix(300, 0))
+
+    # Autre ingestion (flush du buffer, autre worker) : l'entrée est commitée
+    # mais l'état en mémoire de ce processus n'est pas mis à jour
+    monkeypatch.setattr(gps_service, "save_geofence_states", lambda states: None)
+    update_child_gps(db, test_child.id, fix(0, 1))
+    monkeypatch.undo()
+
+    update_child_gps(db, test_child.id, fix(10, 2))
+    update_child_gps(db, test_child.id, fix(300, 3))
+
+    assert events(db, test_child.id) == [("enter", "Maison"), ("exit", "Maison")]
+
+
+def test_events_cursor(db, test_child):
+    add_home(db, test_child.id)
+    for minute, meters in enumerate((0, 300, 0, 300, 0)):
+        update_child_gps(db, test_child.id, fix(meters, minute))
+
+    page = get_geofence_events(db, [test_child.id], after=0, limit=3)
+    assert [e.event_type for e in page["events"]] == ["enter", "exit", "enter"]
+    assert page["has_more"] is True
+
+    page = get_geofence_events(db, [test_child.id], after=page["cursor"], limit=3)
+    assert [e.event_type for e in page["events"]] == ["exit", "enter"]
+    assert page["has_more"] is False
+
+    cursor = page["cursor"]
+    page = get_geofence_events(db, [test_child.id], after=cursor)
+    assert page["events"] == []
+    assert page["cursor"] == cursor
+
+
+def test_events_cursor_waits_for_safety_lag(db, test_user, test_child, monkeypatch):
+    """
+    Id plus grand commité avant un id plus petit (deux enfants ingérés en
+    parallèle) : rien n'est servi au-delà d'un événement encore dans le délai
+    """
+    monkeypatch.setattr(settings, "GEOFENCE_EVENTS_SAFETY_LAG_SECONDS", 60.0)
+    sibling = Child(name="Sibling", parent_id=test_user.id)
+    db.add(sibling)
+    db.commit()
+    add_home(db, test_child.id)
+    add_home(db, sibling.id)
+    update_child_gps(db, test_child.id, fix(0))
+    update_child_gps(db, sibling.id, fix(0))
+
+    assert get_parent_geofence_events(db, test_user.id)["events"] == []
+
+    # Le second événement (id plus grand) est sorti du délai, pas encore le premier
+    first, second = db.query(GeofenceEvent).order_by(GeofenceEvent.id).all()
+    second.created_at = datetime.now(timezone.utc) - timedelta(minutes=2)
+    db.commit()
+    page = get_parent_geofence_events(db, test_user.id)
+    assert page["events"] == [] and page["cursor"] == 0
+
+    first.created_at = datetime.now(timezone.utc) - timedelta(minutes=2)
+    db.commit()
+    page = get_parent_geofence_events(db, test_user.id)
+    assert [e.child_id for e in page["events"]] == [test_child.id, sibling.id]
+
+
+def test_parent_events(db, test_user, test_child):
+    add_home(db, test_child.id)
+    update_child_gps(db, test_child.id, fix(0))
+
+    assert len(get_parent_geofence_events(db, test_user.id)["events"]) == 1
+    assert get_parent_geofence_events(db, test_user.id + 1)["events"] == []
@@ -0,0 +1,106 @@
+"""
+Tests unitaires - GPS Async Service
+Couvre : dernière position et 404 en async, moteur async (URL asyncpg /
+         aiosqlite, dépendance get_async_db), lectures lourdes hors de la
+         boucle d'événements (threadpool)
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core import database
+from app.core.database import async_url
+from app.schemas.gps import GPSUpdate
+from app.services import gps_async_service, gps_service
+from app.services.position_cache import position_cache
+from app.tests.conftest import AsyncTestingSessionLocal
+
+
+def run(fn, *args):
+    """Appelle un service async sur sa propre session async"""
+    async def scenario():
+        async with AsyncTestingSessionLocal() as session:
+            return await fn(session, *args)
+    return asyncio.run(scenario())
+
+
+def fix(minute: int, lat: float = 44.84) -> GPSUpdate:
+    return GPSUpdate(latitude=lat, longitude=-0.57, battery=80, timestamp=f"2026-03-03T12:{minute:02d}:00Z")
+
+
+def test_last_position_from_db_then_cache(db, test_child):
+    gps_service.update_child_gps(db, test_child.id, fix(0))
+    position_cache.clear()
+
+    position = run(gps_async_service.get_child_last_position, test_child.id)
+
+    assert (position.latitude, position.battery) == (44.84, 80)
+    assert position_cache.get(test_child.id) == position
+
+
+def test_unknown_child_404(db):
+    with pytest.raises(HTTPException) as exc:
+        run(gps_async_service.get_child_last_position, 999)
+    assert exc.value.status_code == 404
+
+
+def test_history_route_runs_off_the_event_loop(db, test_child, monkeypatch):
+    """Lecture de l'historique exécutée dans le threadpool : aucune boucle sur ce thread"""
+    from fastapi.testclient import TestClient
+    from app.core.database import get_db
+    from app.main import app
+    from app.routes import gps_tracking
+
+    gps_service.update_child_gps_batch(db, test_child.id, [fix(m, 44.80 + m / 100) for m in range(5)])
+    on_loop = []
+
+    def recording_history(*args):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return gps_service.get_gps_history(*args)
+
+    monkeypatch.setattr(gps_tracking, "get_gps_history", recording_history)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = TestClient(app).get(f"/api/gps/children/{test_child.id}/history",
+                                       params={"day": "2026-03-03", "interval_seconds": 0})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert on_loop == [False]
+
+
+def test_async_url_for_asyncpg_and_aiosqlite():
+    url, connect_args = async_url("postgresql://wimc:pw@db.internal:5432/wimc_db?sslmode=require")
+    assert url.render_as_string(hide_password=False) == "postgresql+asyncpg://wimc:pw@db.internal:5432/wimc_db"
+    # asyncpg ne connaît pas sslmode : passé en ssl=
+    assert connect_args == {"ssl": "require"}
+
+    engine = create_async_engine(url, connect_args=connect_args)
+    assert (engine.dialect.name, engine.dialect.driver) == ("postgresql", "asyncpg")
+
+    url, connect_args = async_url("sqlite:///./test.db")
+    assert (url.drivername, connect_args) == ("sqlite+aiosqlite", {})
+
+
+def test_get_async_db_yields_async_session(db, test_child, monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", AsyncTestingSessionLocal)
+    child_id = test_child.id
+
+    async def scenario():
+        dependency = database.get_async_db()
+        session = await dependency.__anext__()
+        try:
+            assert isinstance(session, AsyncSession)
+            return (await gps_async_service.get_child_or_404(session, child_id)).id
+        finally:
+            await dependency.aclose()
+
+    assert asyncio.run(scenario()) == child_id
@@ -0,0 +1,117 @@
+"""
+Tests unitaires - Buffer d'ingestion GPS (write-behind)
+Couvre : GPSIngestBuffer.add, latest, flush, backpressure, lot en échec
+         permanent abandonné, enfant supprimé oublié
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from app.models.child import Child
+from app.models.gps_history import GPSHistory
+from app.schemas.gps import GPSUpdate
+from app.services.gps_buffer import GPSIngestBuffer
+from app.tests.conftest import TestingSessionLocal
+
+
+def make_fix(lat: float, second: int = 0) -> GPSUpdate:
+    return GPSUpdate(latitude=lat, longitude=-0.57, battery=80,
+                     timestamp=f"2026-03-03T12:00:{second:02d}Z")
+
+
+def test_buffer_add_does_not_write(db, test_child):
+    """La position est acquittée sans écriture en DB"""
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    result = buffer.add(test_child.id, make_fix(44.8))
+
+    assert result.latitude == 44.8
+    assert len(buffer) == 1
+    assert db.query(GPSHistory).count() == 0
+
+
+def test_buffer_latest_is_newest(db, test_child):
+    """latest() renvoie la dernière position reçue"""
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    buffer.add(test_child.id, make_fix(44.8, 0))
+    buffer.add(test_child.id, make_fix(44.9, 5))
+
+    assert buffer.latest(test_child.id).latitude == 44.9
+    assert buffer.latest(9999) is None
+
+
+def test_buffer_flush_writes_batch(db, test_child):
+    """flush() écrit tous les points et met à jour l'enfant"""
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    for i in range(10):
+        buffer.add(test_child.id, make_fix(44.80 + i / 100, i))
+
+    assert buffer.flush() == 10
+    assert len(buffer) == 0
+    assert buffer.latest(test_child.id) is None
+    assert db.query(GPSHistory).count() == 10
+    child = db.query(Child).filter(Child.id == test_child.id).first()
+    db.refresh(child)
+    assert child.last_latitude == pytest.approx(44.89)
+
+
+def test_buffer_flush_drops_unknown_child(db, test_child):
+    """Les positions d'un enfant inexistant sont abandonnées sans bloquer les autres"""
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    buffer.add(test_child.id, make_fix(44.8))
+    buffer.add(9999, make_fix(44.8))
+
+    assert buffer.flush() == 1
+    assert len(buffer) == 0
+    assert db.query(GPSHistory).count() == 1
+
+
+def test_buffer_full_returns_429(db, test_child):
+    """Backpressure : 429 quand le buffer est plein"""
+    buffer = GPSIngestBuffer(TestingSessionLocal, max_points=2)
+    buffer.add(test_child.id, make_fix(44.8, 0))
+    buffer.add(test_child.id, make_fix(44.8, 1))
+
+    with pytest.raises(HTTPException) as exc:
+        buffer.add(test_child.id, make_fix(44.8, 2))
+    assert exc.value.status_code == 429
+
+
+def test_buffer_flush_drops_batch_failing_integrity(db, test_child, monkeypatch):
+    """Lot en échec permanent (clé étrangère) : abandonné, les autres enfants sont écrits"""
+    from app.services import gps_service
+    other = Child(name="Other", parent_id=test_child.parent_id)
+    db.add(other)
+    db.commit()
+    failing_id = other.id
+    ingest = gps_service._ingest_batches
+
+    def fake_ingest(session, batches, publish=True):
+        if failing_id in batches:
+            raise IntegrityError("INSERT INTO gps_history", {}, Exception("FOREIGN KEY constraint failed"))
+        return ingest(session, batches, publish)
+
+    monkeypatch.setattr(gps_service, "_ingest_batches", fake_ingest)
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    buffer.add(test_child.id, make_fix(44.8))
+    buffer.add(failing_id, make_fix(44.8))
+    buffer.mark_known(failing_id)
+
+    assert buffer.flush() == 1
+    assert len(buffer) == 0
+    assert buffer.flush() == 0
+    assert not buffer.is_known(failing_id)
+    assert db.query(GPSHistory).count() == 1
+
+
+def test_deleted_child_forgotten(db, test_child):
+    """Suppression d'un enfant : positions en attente abandonnées, plus connu du buffer"""
+    from app.services.child_service import delete_child
+    from app.services.gps_buffer import gps_buffer
+    child_id = test_child.id
+    gps_buffer.mark_known(child_id)
+    gps_buffer.add(child_id, make_fix(44.8))
+
+    delete_child(db, child_id, test_child.parent_id)
+
+    assert not gps_buffer.is_known(child_id)
+    assert gps_buffer.latest(child_id) is None
+    assert len(gps_buffer) == 0
@@ -1,20 +1,25 @@
 """
 Tests unitaires - GPS Service
 Couvre : update_child_gps, get_child_last_position,
+         update_child_gps_batch, update_children_gps_batch,
          calculate_distance, is_child_in_safe_zone,
-         get_history_days, get_gps_history
+         get_history_days, get_gps_history, ingestion idempotente
+         (renvois, lots rejoués, fixes en retard, horloge de l'émetteur en
+         avance, horodatage illisible)
 """
 import pytest
 from datetime import datetime, timezone, date
 from app.services.gps_service import (
     update_child_gps,
+    update_child_gps_batch,
+    update_children_gps_batch,
     get_child_last_position,
     calculate_distance,
     is_child_in_safe_zone,
     get_history_days,
     get_gps_history
 )
-from app.schemas.gps import GPSUpdate
+from app.schemas.gps import GPSUpdate, ChildGPSBatch
 from app.models.location import Location
 
 
@@ -53,6 +58,63 @@ def test_update_child_gps_saves_history(db, test_child):
     assert history[0].latitude == 44.8378
 
 
+# ─── update_child_gps_batch ─────────────────────────────────────────────────
+
+def test_update_child_gps_batch_inserts_all(db, test_child):
+    """Un lot insère tous les points avec l'horodatage de l'émetteur"""
+    from app.models.gps_history import GPSHistory
+    fixes = [
+        GPSUpdate(latitude=44.80 + i / 1000, longitude=-0.57, battery=90 - i,
+                  timestamp=f"2026-03-03T12:00:{i:02d}Z")
+        for i in range(20)
+    ]
+    result = update_child_gps_batch(db, test_child.id, fixes)
+
+    assert result.inserted == 20
+    history = db.query(GPSHistory).filter(
+        GPSHistory.child_id == test_child.id
+    ).order_by(GPSHistory.timestamp.asc()).all()
+    assert len(history) == 20
+    assert history[0].timestamp.replace(tzinfo=None) == datetime(2026, 3, 3, 12, 0, 0)
+
+
+def test_update_child_gps_batch_uses_newest_fix(db, test_child):
+    """children.last_* vient du point le plus récent, même si le lot est désordonné"""
+    fixes = [
+        GPSUpdate(latitude=44.9, longitude=-0.5, battery=50, timestamp="2026-03-03T12:05:00Z"),
+        GPSUpdate(latitude=44.1, longitude=-0.1, battery=70, timestamp="2026-03-03T12:00:00Z"),
+    ]
+    result = update_child_gps_batch(db, test_child.id, fixes)
+
+    assert result.last_position.latitude == 44.9
+    assert result.last_position.battery == 50
+    position = get_child_last_position(db, test_child.id)
+    assert position.latitude == 44.9
+
+
+def test_update_child_gps_batch_not_found(db):
+    """Erreur 404 si enfant introuvable"""
+    from fastapi import HTTPException
+    fixes = [GPSUpdate(latitude=44.8, longitude=-0.5, battery=50, timestamp="2026-03-03T12:00:00Z")]
+    with pytest.raises(HTTPException) as exc:
+        update_child_gps_batch(db, 9999, fixes)
+    assert exc.value.status_code == 404
+
+
+def test_update_children_gps_batch_is_atomic(db, test_child):
+    """Un enfant inconnu dans le lot multi-enfants → rien n'est écrit"""
+    from fastapi import HTTPException
+    from app.models.gps_history import GPSHistory
+    fix = GPSUpdate(latitude=44.8, longitude=-0.5, battery=50, timestamp="2026-03-03T12:00:00Z")
+    batches = [
+        ChildGPSBatch(child_id=test_child.id, fixes=[fix]),
+        ChildGPSBatch(child_id=9999, fixes=[fix]),
+    ]
+    with pytest.raises(HTTPException):
+        update_children_gps_batch(db, batches)
+    assert db.query(GPSHistory).count() == 0
+
+
 # ─── get_child_last_position ────────────────────────────────────────────────
 
 def test_get_last_position_success(db, test_child):
@@ -150,7 +212,8 @@ def test_get_history_days_after_update(db, test_child):
 
     result = get_history_days(db, test_child.id)
     assert len(result) == 1
-    assert str(date.today()) in result[0]
+    # Jour de l'horodatage émetteur, pas du jour de réception
+    assert "2026-03-03" in result[0]
 
 
 # ─── get_gps_history ────────────────────────────────────────────────────────
@@ -166,7 +229,319 @@ def test_get_gps_history_returns_points(db, test_child):
     gps_data = GPSUpdate(latitude=44.843, longitude=-0.555, battery=65, timestamp="2026-03-03T12:00:00Z")
     update_child_gps(db, test_child.id, gps_data)
 
-    result = get_gps_history(db, test_child.id, date.today())
+    result = get_gps_history(db, test_child.id, date(2026, 3, 3))
     assert len(result) >= 1
     assert result[0].latitude == 44.843
 
+
+
+def test_get_gps_history_sampling_matches_reference(db, test_child):
+    """Sous-échantillonnage identique à l'algorithme glouton historique"""
+    from datetime import timedelta
+    from app.models.gps_history import GPSHistory
+    start = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+    offsets = [0, 4, 9, 31, 33, 60, 61, 95, 130, 131, 160, 200, 229, 260]
+    db.add_all([
+        GPSHistory(child_id=test_child.id, latitude=44.8 + i / 1000, longitude=-0.5,
+                   battery=80, timestamp=start + timedelta(seconds=s))
+        for i, s in enumerate(offsets)
+    ])
+    db.commit()
+
+    result = get_gps_history(db, test_child.id, date(2026, 3, 3), 30)
+
+    kept = [0]
+    for s in offsets[1:]:
+        if s - kept[-1] >= 30:
+            kept.append(s)
+    assert [
+        (p.timestamp.replace(tzinfo=None) - start.replace(tzinfo=None)).total_seconds()
+        for p in result
+    ] == kept
+    assert set(result[0]._fields) == {"latitude", "longitude", "timestamp"}
+
+
+# ─── export_gps_history ─────────────────────────────────────────────────────
+
+def _add_points_over_days(db, child_id, days=3, per_day=5):
+    from datetime import timedelta
+    from app.models.gps_history import GPSHistory
+    start = datetime(2026, 3, 1, 10, 0, tzinfo=timezone.utc)
+    db.add_all([
+        GPSHistory(child_id=child_id, latitude=44.8, longitude=-0.5, battery=50,
+                   timestamp=start + timedelta(days=d, minutes=m))
+        for d in range(days) for m in range(per_day)
+    ])
+    db.commit()
+
+
+def test_export_gps_history_ndjson(db, test_child):
+    """Export NDJSON d'une période : une ligne par point, bornes respectées"""
+    import json
+    from app.services.gps_service import export_gps_history
+    _add_points_over_days(db, test_child.id)
+    start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 3, tzinfo=timezone.utc)
+
+    chunks = list(export_gps_history(db, test_child.id, start, end, "ndjson", chunk_size=4))
+    lines = "".join(chunks).splitlines()
+
+    assert len(chunks) == 3
+    assert len(lines) == 10
+    assert json.loads(lines[0])["latitude"] == 44.8
+
+
+def test_export_gps_history_csv(db, test_child):
+    """Export CSV avec en-tête"""
+    from app.services.gps_service import export_gps_history
+    _add_points_over_days(db, test_child.id, days=1)
+    start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+    lines = "".join(export_gps_history(db, test_child.id, start, end, "csv")).splitlines()
+
+    assert lines[0] == "child_id,timestamp,latitude,longitude,battery,end_timestamp,fix_count"
+    assert len(lines) == 6
+    assert lines[1].endswith(",44.8,-0.5,50,,1")
+
+
+def test_export_round_trips_through_import(db, test_child):
+    """Export puis import : mêmes lignes, durée des points d'arrêt comprise"""
+    import io
+    from app.models.gps_history import GPSHistory
+    from app.services.gps_service import export_gps_history
+    from app.services.import_service import import_gps_history, read_fixes
+    update_child_gps_batch(db, test_child.id, [
+        GPSUpdate(latitude=44.8, longitude=-0.5, battery=90 - s, timestamp=f"2026-03-03T08:00:{s:02d}Z")
+        for s in range(0, 50, 10)
+    ])
+    start = datetime(2026, 3, 3, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 4, tzinfo=timezone.utc)
+
+    def stored():
+        return [
+            (row.timestamp.replace(tzinfo=None), row.end_timestamp.replace(tzinfo=None), row.fix_count, row.battery)
+            for row in db.query(GPSHistory).order_by(GPSHistory.timestamp)
+        ]
+
+    for fmt in ("csv", "ndjson"):
+        before = stored()
+        exported = "".join(export_gps_history(db, test_child.id, start, end, fmt))
+        db.query(GPSHistory).delete()
+        db.commit()
+
+        stats = import_gps_history(db, read_fixes(io.StringIO(exported), fmt))
+
+        assert stats["inserted"] == 1
+        assert stored() == before == [(datetime(2026, 3, 3, 8), datetime(2026, 3, 3, 8, 0, 40), 5, 50)]
+
+
+# ─── get_history_distance / get_history_zones ───────────────────────────────
+
+def _add_walk(db, child_id):
+    """Marche vers le nord : 0.0009° de latitude (~100 m) toutes les minutes"""
+    from datetime import timedelta
+    from app.models.gps_history import GPSHistory
+    start = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+    db.add_all([
+        GPSHistory(child_id=child_id, latitude=44.8378 + i * 0.0009, longitude=-0.5792,
+                   battery=80, timestamp=start + timedelta(minutes=i))
+        for i in range(10)
+    ])
+    db.commit()
+
+
+def test_get_history_distance(db, test_child):
+    from app.services.gps_service import get_history_distance
+    _add_walk(db, test_child.id)
+
+    result = get_history_distance(db, test_child.id, date(2026, 3, 3))
+
+    expected = calculate_distance(44.8378, -0.5792, 44.8378 + 9 * 0.0009, -0.5792)
+    assert result["points"] == 10
+    assert result["distance_m"] == pytest.approx(expected, abs=0.1)
+
+
+def test_get_history_zones(db, test_child):
+    """Points de la journée rattachés aux zones traversées"""
+    from app.services.gps_service import get_history_zones
+    _add_walk(db, test_child.id)
+    db.add_all([
+        Location(name="Maison", latitude=44.8378, longitude=-0.5792, radius=150, child_id=test_child.id),
+        Location(name="École", latitude=44.8378 + 9 * 0.0009, longitude=-0.5792, radius=50, child_id=test_child.id),
+        Location(name="Parc", latitude=45.5, longitude=1.0, radius=500, child_id=test_child.id),
+    ])
+    db.commit()
+
+    visits = get_history_zones(db, test_child.id, date(2026, 3, 3))
+
+    assert [(v["zone_name"], v["points"]) for v in visits] == [("Maison", 2), ("École", 1)]
+    assert visits[0]["last_seen"].minute == 1
+
+
+# ─── get_parent_positions ───────────────────────────────────────────────────
+
+def test_get_parent_positions(db, test_user, test_child):
+    """Tous les enfants du parent, statut de zone compris, en une requête"""
+    from sqlalchemy import event
+    from app.models.child import Child
+    from app.services.gps_service import get_parent_positions
+
+    sibling = Child(name="Sibling", parent_id=test_user.id)
+    stranger = Child(name="Stranger", parent_id=test_user.id + 1)
+    db.add_all([sibling, stranger])
+    db.add_all([
+        Location(name="École", latitude=44.8378, longitude=-0.5792, radius=200, child_id=test_child.id),
+        Location(name="Parc", latitude=45.0, longitude=1.0, radius=200, child_id=test_child.id),
+    ])
+    db.commit()
+    update_child_gps(db, test_child.id, GPSUpdate(
+        latitude=44.8379, longitude=-0.5793, battery=90, timestamp="2026-03-03T12:00:00Z"
+    ))
+
+    parent_id = test_user.id
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        positions = get_parent_positions(db, parent_id)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert [(p.name, p.in_safe_zone, p.zone_name) for p in positions] == [
+        ("Test Child", True, "École"),
+        ("Sibling", False, None),
+    ]
+    assert positions[0].battery == 90
+    assert positions[1].latitude is None
+
+
+def test_get_parent_positions_no_children(db, test_user):
+    from app.services.gps_service import get_parent_positions
+    assert get_parent_positions(db, test_user.id) == []
+
+
+# ─── ingestion idempotente (horodatage émetteur) ───────────────────────────
+
+def _fix(minute: int, lat: float = 44.84, second: int = 0) -> GPSUpdate:
+    return GPSUpdate(latitude=lat, longitude=-0.57, battery=80,
+                     timestamp=f"2026-03-03T12:{minute:02d}:{second:02d}Z")
+
+
+def test_retried_fix_written_once(db, test_child):
+    from app.models.gps_history import GPSHistory
+    from app.services.summary_service import get_daily_summaries
+
+    first = update_child_gps_batch(db, test_child.id, [_fix(0), _fix(0)])
+    retry = update_child_gps_batch(db, test_child.id, [_fix(0)])
+    update_child_gps(db, test_child.id, _fix(0))
+
+    assert (first.inserted, retry.inserted) == (1, 0)
+    [row] = db.query(GPSHistory).all()
+    assert (row.fix_count, row.end_timestamp) == (1, None)
+    assert [s.point_count for s in get_daily_summaries(db, test_child.id)] == [1]
+
+
+def test_replayed_dwell_not_counted_twice(db, test_child):
+    from app.models.gps_history import GPSHistory
+
+    batch = [_fix(0, second=10 * i) for i in range(4)]
+    update_child_gps_batch(db, test_child.id, batch)
+    assert update_child_gps_batch(db, test_child.id, batch[1:3]).inserted == 0
+
+    [row] = db.query(GPSHistory).all()
+    assert row.fix_count == 4
+
+
+def test_late_fix_stored_without_moving_position_back(db, test_child):
+    from app.models.gps_history import GPSHistory
+
+    update_child_gps_batch(db, test_child.id, [_fix(0, 44.80), _fix(10, 44.90)])
+    late = update_child_gps(db, test_child.id, _fix(5, 44.85))
+
+    assert late.latitude == 44.90
+    assert late.last_update.replace(tzinfo=None) == datetime(2026, 3, 3, 12, 10)
+    latitudes = [
+        row.latitude for row in
+        db.query(GPSHistory).filter(GPSHistory.child_id == test_child.id).order_by(GPSHistory.timestamp)
+    ]
+    assert latitudes == [44.80, 44.85, 44.90]
+    assert get_child_last_position(db, test_child.id).latitude == 44.90
+
+
+def test_future_device_timestamps_recaled_stably(db, test_child):
+    """Horloge en avance d'un jour : fixes recalés de l'avance, renvois sur le même horodatage"""
+    from datetime import timedelta
+    from app.models.gps_history import GPSHistory
+    from app.services.gps_service import parse_fix_timestamp
+
+    ahead = datetime.now(timezone.utc) + timedelta(days=1)
+    fixes = [
+        GPSUpdate(latitude=44.84 + i / 100, longitude=-0.57, battery=80,
+                  timestamp=(ahead + timedelta(seconds=10 * i)).isoformat())
+        for i in range(3)
+    ]
+    first = parse_fix_timestamp(fixes[0], test_child.id)
+    assert first < ahead - timedelta(hours=23)
+
+    update_child_gps_batch(db, test_child.id, fixes)
+    # Lot renvoyé (réponse perdue) : rien de nouveau
+    results = update_child_gps_batch(db, test_child.id, fixes)
+
+    assert results.inserted == 0
+    stamps = [row.timestamp.replace(tzinfo=timezone.utc) for row in
+              db.query(GPSHistory).filter(GPSHistory.child_id == test_child.id).order_by(GPSHistory.timestamp)]
+    assert stamps == [first + timedelta(seconds=10 * i) for i in range(3)]
+
+
+def test_unreadable_timestamp_rejected(db, test_child):
+    from fastapi import HTTPException
+    from pydantic import ValidationError
+    from app.services.gps_service import parse_fix_timestamp
+
+    with pytest.raises(ValidationError):
+        GPSUpdate(latitude=44.84, longitude=-0.57, battery=80, timestamp="yesterday")
+    with pytest.raises(HTTPException) as exc:
+        parse_fix_timestamp(GPSUpdate.model_construct(timestamp="yesterday"), test_child.id)
+    assert exc.value.status_code == 422
+
+
+def test_buffer_keeps_newest_position(db, test_child):
+    from app.services.gps_buffer import GPSIngestBuffer
+    from app.tests.conftest import TestingSessionLocal
+
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    buffer.add(test_child.id, _fix(10, 44.90))
+    response = buffer.add(test_child.id, _fix(5, 44.85))
+
+    assert response.latitude == 44.90
+    assert buffer.latest(test_child.id).latitude == 44.90
+    assert buffer.flush() == 2
+
+
+def test_init_db_dedupes_before_unique_index(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+    from app.core import database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE gps_history (id INTEGER PRIMARY KEY, child_id INTEGER NOT NULL, "
+            "latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, battery INTEGER, timestamp DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_gps_history_child_id_timestamp ON gps_history (child_id, timestamp)"))
+        conn.execute(text(
+            "INSERT INTO gps_history (child_id, latitude, longitude, timestamp) VALUES "
+            "(1, 45.0, 4.0, '2026-03-03 12:00:00'), (1, 45.1, 4.0, '2026-03-03 12:00:00'), "
+            "(1, 45.2, 4.0, '2026-03-03 12:01:00')"
+        ))
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.init_db()
+
+    indexes = {i["name"]: i["unique"] for i in inspect(engine).get_indexes("gps_history")}
+    assert indexes.get("uq_gps_history_child_id_timestamp")
+    assert "ix_gps_history_child_id_timestamp" not in indexes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT latitude FROM gps_history ORDER BY id")).scalars().all() == [45.0, 45.2]
@@ -0,0 +1,54 @@
+"""
+Tests unitaires - Encodage compact de l'historique
+Couvre : encode_polyline, to_polyline, to_msgpack
+"""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services.history_format_service import (
+    decode_deltas,
+    decode_polyline,
+    encode_polyline,
+    from_msgpack,
+    to_msgpack,
+    to_polyline,
+)
+
+
+def test_encode_polyline_reference_example():
+    """Exemple de la documentation Google"""
+    encoded = encode_polyline([38.5, 40.7, 43.252], [-120.2, -120.95, -126.453])
+    assert encoded == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_polyline_roundtrip():
+    lats = [44.837812, 44.83791, 44.8401]
+    lons = [-0.579211, -0.5791, -0.5702]
+    decoded = decode_polyline(encode_polyline(lats, lons))
+    for (lat, lon), exp_lat, exp_lon in zip(decoded, lats, lons):
+        assert lat == pytest.approx(exp_lat, abs=1e-5)
+        assert lon == pytest.approx(exp_lon, abs=1e-5)
+
+
+def test_to_polyline_delta_encodes_timestamps():
+    start = datetime(2026, 3, 3, 12, 0, tzinfo=timezone.utc)
+    timestamps = [start + timedelta(seconds=s) for s in (0, 30, 61, 95)]
+    payload = to_polyline([44.8] * 4, [-0.5] * 4, timestamps)
+
+    assert payload["start"] == int(start.timestamp())
+    assert [t[0] for t in decode_deltas(payload["timestamps"])] == [0, 30, 61, 95]
+
+
+def test_to_polyline_without_timestamps():
+    payload = to_polyline([44.8], [-0.5])
+    assert payload["timestamps"] is None
+
+
+def test_msgpack_roundtrip():
+    start = datetime(2026, 3, 3, 12, 0)
+    timestamps = [start + timedelta(seconds=s) for s in (0, 5, 10)]
+    data = to_msgpack([44.8, 44.81, 44.82], [-0.5, -0.51, -0.52], timestamps)
+    decoded = from_msgpack(data)
+
+    assert decoded["lat"].tolist() == pytest.approx([44.8, 44.81, 44.82], abs=1e-5)
+    assert decoded["dt"].tolist() == [0, 5, 10]
+    assert decoded["start"] == int(start.replace(tzinfo=timezone.utc).timestamp())
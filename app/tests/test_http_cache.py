@@ -0,0 +1,162 @@
+"""
+Tests - Requêtes conditionnelles (ETag / If-None-Match → 304)
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.core.database import get_async_db, get_db
+from app.core.http_cache import (
+    REVALIDATE_CACHE_CONTROL,
+    conditional_json,
+    etag_matches,
+    make_etag,
+)
+from app.core.security import create_access_token
+from app.models.gps_history import GPSHistory
+from app.schemas.gps import GPSUpdate
+from app.services.gps_service import update_child_gps
+from app.tests.conftest import override_get_async_db
+
+
+def request_with(if_none_match=None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_make_etag_is_strong_and_stable():
+    etag = make_etag(1, "2026-03-03", 42)
+    assert etag == make_etag(1, "2026-03-03", 42)
+    assert etag != make_etag(1, "2026-03-03", 43)
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('"xyz", "abc"', True),
+    ('W/"abc"', True),
+    ("*", True),
+    ('"xyz"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(request_with(header), '"abc"') is expected
+
+
+def test_conditional_json_body_etag():
+    first = conditional_json(request_with(), {"a": 1})
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+    second = conditional_json(request_with(first.headers["ETag"]), {"a": 1})
+    assert second.status_code == 304
+    assert second.body == b""
+
+    changed = conditional_json(request_with(first.headers["ETag"]), {"a": 2})
+    assert changed.status_code == 200
+
+
+# ─── Routes ─────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(db):
+    from app.main import app
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_db, None)
+
+
+def auth(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id), 'email': user.email})}"}
+
+
+def test_last_position_not_modified(db, test_child, client):
+    update_child_gps(db, test_child.id, GPSUpdate(
+        latitude=44.84, longitude=-0.57, battery=80, timestamp="2026-03-03T12:00:00Z"
+    ))
+    url = f"/api/gps/children/{test_child.id}/last-position"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.json()["latitude"] == 44.84
+
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    update_child_gps(db, test_child.id, GPSUpdate(
+        latitude=44.85, longitude=-0.57, battery=79, timestamp="2026-03-03T12:00:05Z"
+    ))
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+
+
+def test_past_day_history_revalidated_across_retention(db, test_child, client):
+    """Jour passé : revalidé (304), nouvel ETag quand la rétention réécrit le jour"""
+    from app.services.retention_service import apply_retention
+
+    day = date.today() - timedelta(days=40)
+    start = datetime(day.year, day.month, day.day, 8, tzinfo=timezone.utc)
+    db.add_all([
+        GPSHistory(child_id=test_child.id, latitude=44.8 + i / 1000, longitude=-0.5 + (i % 2) / 1000,
+                   battery=50, timestamp=start + timedelta(minutes=i))
+        for i in range(5)
+    ])
+    db.commit()
+    url = f"/api/gps/children/{test_child.id}/history?day={day}&interval_seconds=0"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert len(first.json()) == 5
+    assert first.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    # Autres paramètres = autre représentation
+    other = client.get(url + "&format=polyline", headers={"If-None-Match": first.headers["ETag"]})
+    assert other.status_code == 200
+
+    # Passage en trace simplifiée, puis point en retard refondu dedans : nouvel ETag à chaque fois
+    apply_retention(db)
+    rolled = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert rolled.status_code == 200
+    assert client.get(url, headers={"If-None-Match": rolled.headers["ETag"]}).status_code == 304
+
+    db.add(GPSHistory(child_id=test_child.id, latitude=44.9, longitude=-0.4, battery=50,
+                      timestamp=start + timedelta(hours=2)))
+    db.commit()
+    apply_retention(db)
+    merged = client.get(url, headers={"If-None-Match": rolled.headers["ETag"]})
+    assert merged.status_code == 200
+    assert merged.json()[-1]["latitude"] == 44.9
+
+
+def test_history_etag_changes_with_late_points(db, test_child, client):
+    """Lot rejoué en retard sur un jour récent : nouvel ETag"""
+    day = date.today() - timedelta(days=1)
+    ts = datetime(day.year, day.month, day.day, 8, tzinfo=timezone.utc)
+    db.add(GPSHistory(child_id=test_child.id, latitude=44.8, longitude=-0.5, battery=50, timestamp=ts))
+    db.commit()
+    url = f"/api/gps/children/{test_child.id}/history?day={day}"
+
+    first = client.get(url)
+    assert first.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+    db.add(GPSHistory(child_id=test_child.id, latitude=44.9, longitude=-0.5, battery=50,
+                      timestamp=ts + timedelta(minutes=5)))
+    db.commit()
+
+    second = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert len(second.json()) == 2
+
+
+def test_children_and_places_not_modified(db, test_user, test_child, client):
+    for url in ("/children/", f"/children/{test_child.id}", "/places/"):
+        first = client.get(url, headers=auth(test_user))
+        assert first.status_code == 200
+        headers = {**auth(test_user), "If-None-Match": first.headers["ETag"]}
+        assert client.get(url, headers=headers).status_code == 304
@@ -0,0 +1,164 @@
+"""
+Tests unitaires - Import Service
+Couvre : lecture CSV / NDJSON, import par blocs, doublons et enfants
+         inconnus ignorés, position courante et résumés recalculés (jours
+         importés seulement), chemin COPY PostgreSQL, CLI
+"""
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app import cli
+from app.models.child import Child
+from app.models.gps_history import GPSHistory
+from app.services import import_service
+from app.services.import_service import import_gps_history, read_fixes
+from app.services.summary_service import get_daily_summaries
+
+CSV = """child_id,latitude,longitude,battery,timestamp
+{child},44.80,-0.57,90,2026-03-03T08:00:00Z
+{child},44.81,-0.57,89,2026-03-03T08:01:00Z
+{child},44.82,-0.57,,2026-03-04T08:00:00Z
+999,44.80,-0.57,90,2026-03-03T08:00:00Z
+"""
+
+
+def test_read_csv_and_ndjson():
+    [fix] = read_fixes(io.StringIO("child_id,latitude,longitude,timestamp\n1,44.8,-0.5,2026-03-03T08:00:00\n"), "csv")
+    assert fix == (1, 44.8, -0.5, None, datetime(2026, 3, 3, 8, tzinfo=timezone.utc), None, 1)
+
+    line = json.dumps({"child_id": 1, "latitude": 44.8, "longitude": -0.5, "battery": 70,
+                       "timestamp": "2026-03-03T10:00:00+02:00", "end_timestamp": "2026-03-03T10:05:00+02:00",
+                       "fix_count": 6})
+    [fix] = read_fixes(io.StringIO(line + "\n\n"), "ndjson")
+    assert fix[4:] == (datetime(2026, 3, 3, 8, tzinfo=timezone.utc),
+                       datetime(2026, 3, 3, 8, 5, tzinfo=timezone.utc), 6)
+
+
+def test_read_rejects_bad_rows():
+    with pytest.raises(ValueError, match="ligne 2"):
+        list(read_fixes(io.StringIO("child_id,latitude,longitude\n1,44.8,-0.5\n"), "csv"))
+    with pytest.raises(ValueError, match="Format inconnu"):
+        list(read_fixes(io.StringIO(""), "xml"))
+
+
+def test_import_in_chunks(db, test_child):
+    fixes = read_fixes(io.StringIO(CSV.format(child=test_child.id)), "csv")
+    stats = import_gps_history(db, fixes, chunk_size=2)
+
+    assert (stats["rows"], stats["inserted"], stats["skipped"], stats["children"]) == (4, 3, 1, 1)
+    assert stats["rows_per_second"] > 0
+    assert db.query(GPSHistory).count() == 3
+
+    child = db.query(Child).filter(Child.id == test_child.id).first()
+    assert (child.last_latitude, child.last_update.replace(tzinfo=None)) == (44.82, datetime(2026, 3, 4, 8))
+    assert [s.point_count for s in get_daily_summaries(db, test_child.id)] == [1, 2]
+
+
+def test_reimport_is_noop_and_keeps_newer_position(db, test_child):
+    child = db.query(Child).filter(Child.id == test_child.id).first()
+    child.last_latitude, child.last_update = 45.0, datetime(2026, 6, 1)
+    db.commit()
+
+    csv_data = CSV.format(child=test_child.id)
+    import_gps_history(db, read_fixes(io.StringIO(csv_data), "csv"))
+    stats = import_gps_history(db, read_fixes(io.StringIO(csv_data), "csv"))
+
+    assert (stats["inserted"], stats["skipped"]) == (0, 4)
+    assert db.query(GPSHistory).count() == 3
+    db.expire_all()
+    assert db.query(Child).filter(Child.id == test_child.id).first().last_latitude == 45.0
+
+
+def test_import_rebuilds_only_imported_days(db, test_child):
+    csv_data = CSV.format(child=test_child.id)
+    import_gps_history(db, read_fixes(io.StringIO(csv_data), "csv"))
+    # Résumé d'un jour non importé : ne doit pas être réécrit
+    march_3 = get_daily_summaries(db, test_child.id)[1]
+    march_3.distance_m = 1234.0
+    db.commit()
+
+    late = "child_id,latitude,longitude,timestamp\n{child},44.83,-0.57,2026-03-04T09:00:00Z\n"
+    import_gps_history(db, read_fixes(io.StringIO(late.format(child=test_child.id)), "csv"))
+
+    db.expire_all()
+    march_4, march_3 = get_daily_summaries(db, test_child.id)
+    assert (march_4.point_count, march_3.distance_m) == (2, 1234.0)
+
+
+class FakeCursor:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, stream):
+        self.calls.append((sql, stream.read()))
+
+
+class FakePostgresSession:
+    """Session PostgreSQL factice : SQL exécuté et flux COPY enregistrés"""
+    def __init__(self, rowcount):
+        self.calls = []
+        self.rowcount = rowcount
+        # db.connection().connection.dbapi_connection : connexion psycopg2
+        self.dbapi_connection = self
+
+    def connection(self):
+        return type("Connection", (), {"connection": self})()
+
+    def cursor(self):
+        return FakeCursor(self.calls)
+
+    def execute(self, statement):
+        self.calls.append((str(statement), None))
+        return type("Result", (), {"rowcount": self.rowcount})()
+
+
+def test_copy_chunk_payload_and_sql():
+    """Chemin PostgreSQL : table temporaire, COPY csv (NULL, timestamptz), INSERT ... SELECT"""
+    session = FakePostgresSession(rowcount=1)
+    fixes = list(read_fixes(io.StringIO(
+        "child_id,latitude,longitude,timestamp,end_timestamp\n"
+        "7,44.8,-0.5,2026-03-03T08:00:00Z,2026-03-03T08:05:00Z\n"
+        "7,44.9,-0.5,2026-03-03T09:00:00+02:00,\n"
+    ), "csv"))
+
+    assert import_service._copy_chunk(session, fixes) == 1
+
+    (create, _), (copy, payload), (insert, _) = session.calls
+    assert create.startswith("CREATE TEMP TABLE IF NOT EXISTS gps_history_import")
+    assert "ON COMMIT DELETE ROWS" in create
+    assert copy == ('COPY gps_history_import ("child_id", "latitude", "longitude", "battery", "timestamp", '
+                    '"end_timestamp", "fix_count") FROM STDIN WITH (FORMAT csv)')
+    # Champ vide non quoté = NULL pour COPY csv ; horodatages en UTC avec décalage
+    assert payload.splitlines() == [
+        "7,44.8,-0.5,,2026-03-03T08:00:00+00:00,2026-03-03T08:05:00+00:00,1",
+        "7,44.9,-0.5,,2026-03-03T07:00:00+00:00,,1",
+    ]
+    assert "JOIN children c ON c.id = s.child_id" in insert
+    assert insert.endswith('ON CONFLICT (child_id, "timestamp") DO NOTHING')
+
+
+def test_cli_import(db, test_child, tmp_path, monkeypatch, capsys):
+    from app.tests.conftest import TestingSessionLocal
+
+    path = tmp_path / "fixes.ndjson"
+    path.write_text("\n".join(
+        json.dumps({"child_id": test_child.id, "latitude": 44.8, "longitude": -0.57,
+                    "timestamp": f"2026-03-03T08:0{minute}:00Z"})
+        for minute in range(3)
+    ))
+    monkeypatch.setattr(cli, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(cli, "init_db", lambda: None)
+
+    cli.main(["import-gps", str(path)])
+
+    assert "3 fixes read, 3 inserted" in capsys.readouterr().out
+    assert db.query(GPSHistory).count() == 3
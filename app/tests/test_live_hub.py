@@ -0,0 +1,125 @@
+"""
+Tests - Diffusion en direct des positions (LiveHub, WebSocket /api/gps/ws)
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.security import create_access_token
+from app.schemas.gps import GPSResponse, GPSUpdate
+from app.services.gps_service import update_child_gps
+from app.services.live_hub import LiveHub, live_hub
+
+
+def position(child_id: int, latitude: float = 44.84) -> GPSResponse:
+    return GPSResponse(child_id=child_id, latitude=latitude, longitude=-0.57,
+                       last_update=datetime(2026, 3, 3, 12, 0, tzinfo=timezone.utc), battery=80)
+
+
+def test_publish_only_to_subscribed_children():
+    async def scenario():
+        hub = LiveHub()
+        mine = hub.subscribe([1, 2])
+        other = hub.subscribe([3])
+
+        hub.publish(position(2))
+        hub.publish(position(3, latitude=45.0))
+        await asyncio.sleep(0)
+
+        assert (await mine.get())["child_id"] == 2
+        assert mine.queue.empty()
+        assert (await other.get())["latitude"] == 45.0
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_another_thread():
+    """Ingestion dans le threadpool : livraison dans la boucle de l'abonné"""
+    async def scenario():
+        hub = LiveHub()
+        sub = hub.subscribe([1])
+        thread = threading.Thread(target=hub.publish, args=(position(1),))
+        thread.start()
+        message = await asyncio.wait_for(sub.get(), timeout=5)
+        thread.join()
+        return message
+
+    assert asyncio.run(scenario())["child_id"] == 1
+
+
+def test_slow_consumer_dropped():
+    """File pleine : l'abonné est abandonné et reçoit None"""
+    async def scenario():
+        hub = LiveHub(max_queue=3)
+        slow = hub.subscribe([1])
+        for i in range(5):
+            hub.publish(position(1, latitude=44 + i))
+        await asyncio.sleep(0)
+
+        assert slow.dropped
+        assert await slow.get() is None
+        hub.unsubscribe(slow)
+        assert len(hub) == 0
+
+    asyncio.run(scenario())
+
+
+def test_unsubscribe_stops_delivery():
+    async def scenario():
+        hub = LiveHub()
+        sub = hub.subscribe([1])
+        hub.unsubscribe(sub)
+        hub.publish(position(1))
+        await asyncio.sleep(0)
+        assert sub.queue.empty()
+
+    asyncio.run(scenario())
+
+
+# ─── WebSocket ──────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(monkeypatch):
+    from app.main import app
+    from app.routes import live
+    from app.tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(live, "SessionLocal", TestingSessionLocal)
+    return TestClient(app)
+
+
+def token_for(user) -> str:
+    return create_access_token(data={"sub": str(user.id), "email": user.email})
+
+
+def test_websocket_snapshot_then_push(db, test_user, test_child, client):
+    with client.websocket_connect(f"/api/gps/ws?token={token_for(test_user)}") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["child_id"] == test_child.id
+        assert snapshot["latitude"] is None
+
+        update_child_gps(db, test_child.id, GPSUpdate(
+            latitude=44.85, longitude=-0.56, battery=70, timestamp="2026-03-03T12:00:00Z"
+        ))
+        pushed = ws.receive_json()
+
+    assert pushed["latitude"] == 44.85
+    assert len(live_hub) == 0
+
+
+def test_websocket_requires_token(client):
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/api/gps/ws") as ws:
+            ws.receive_json()
+    assert exc_info.value.code == 1008
+
+
+def test_websocket_other_parents_child(db, test_user, test_child, client):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(
+            f"/api/gps/ws?token={token_for(test_user)}&child_id={test_child.id + 1}"
+        ) as ws:
+            ws.receive_json()
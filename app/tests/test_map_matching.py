@@ -0,0 +1,113 @@
+"""
+Tests unitaires - Map-matching local
+Couvre : load_osm_graph, RoadGraph.candidates, MapMatcher.match,
+         get_map_matcher (chargement unique sous appels concurrents)
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services import map_matching
+from app.services.map_matching import MapMatcher, RoadGraph, load_osm_graph
+
+Point = namedtuple("Point", ["latitude", "longitude"])
+
+LAT0, LON0 = 44.8378, -0.5792
+# ~100 m en latitude / longitude à Bordeaux
+DLAT, DLON = 0.0009, 0.00127
+
+
+def grid_osm(size: int = 5) -> str:
+    """Quadrillage de rues de `size` x `size` intersections espacées de ~100 m"""
+    nodes, ways = [], []
+    node_id = lambda i, j: i * size + j + 1
+    for i in range(size):
+        for j in range(size):
+            nodes.append(f'<node id="{node_id(i, j)}" lat="{LAT0 + i * DLAT}" lon="{LON0 + j * DLON}"/>')
+    way_id = 1000
+    for i in range(size):
+        for line in ([node_id(i, j) for j in range(size)], [node_id(j, i) for j in range(size)]):
+            refs = "".join(f'<nd ref="{n}"/>' for n in line)
+            ways.append(f'<way id="{way_id}">{refs}<tag k="highway" v="residential"/></way>')
+            way_id += 1
+    # Bâtiment : ignoré
+    ways.append('<way id="1"><nd ref="1"/><nd ref="7"/><tag k="building" v="yes"/></way>')
+    return f'<?xml version="1.0"?><osm version="0.6">{"".join(nodes)}{"".join(ways)}</osm>'
+
+
+@pytest.fixture
+def graph(tmp_path):
+    path = tmp_path / "grid.osm"
+    path.write_text(grid_osm())
+    return load_osm_graph(str(path))
+
+
+def test_load_osm_graph_keeps_highways_only(graph):
+    """5 rues x 4 tronçons x 2 directions, le bâtiment est ignoré"""
+    assert len(graph) == 40
+    assert len(graph.x) == 25
+
+
+def test_candidates_nearest_road_first(graph):
+    x, y = graph.to_xy(LAT0 + 0.00005, LON0 + DLON / 2)
+    candidates = graph.candidates(float(x), float(y), 50.0)
+    assert candidates
+    assert candidates[0][0] == pytest.approx(5.6, abs=0.5)
+
+
+def test_match_snaps_noisy_track_onto_street(graph):
+    """Trace bruitée (~±6 m) le long de la première rue : snappée sur la rue"""
+    noise = [0.00005, -0.00004, 0.00003, -0.00005, 0.00002]
+    track = [Point(LAT0 + noise[k % 5], LON0 + DLON / 8 + k * DLON / 4) for k in range(12)]
+    result = MapMatcher(graph).match(track)
+
+    assert len(result) >= len(track)
+    for p in result:
+        assert p["latitude"] == pytest.approx(LAT0, abs=1e-6)
+
+
+def test_match_interpolates_through_intersection(graph):
+    """Virage à une intersection : l'intersection est ajoutée entre les deux points"""
+    track = [
+        Point(LAT0 + 0.00003, LON0 + DLON * 0.6),
+        Point(LAT0 + DLAT * 0.4, LON0 + DLON + 0.00003),
+    ]
+    result = MapMatcher(graph).match(track)
+
+    assert len(result) == 3
+    assert result[1]["latitude"] == pytest.approx(LAT0, abs=1e-6)
+    assert result[1]["longitude"] == pytest.approx(LON0 + DLON, abs=1e-6)
+
+
+def test_match_far_point_stays_raw(graph):
+    """Point à plus de search_radius de toute route : gardé tel quel"""
+    far = Point(LAT0 + DLAT / 2, LON0 + DLON / 2)
+    result = MapMatcher(graph, search_radius=20.0).match([far])
+    assert result == [{"latitude": far.latitude, "longitude": far.longitude}]
+
+
+def test_road_graph_empty():
+    graph = RoadGraph({}, [])
+    assert len(graph) == 0
+    assert graph.candidates(0.0, 0.0, 50.0) == []
+
+
+def test_get_map_matcher_loads_graph_once(tmp_path, monkeypatch):
+    """Premiers appels concurrents (threadpool) : un seul chargement du graphe"""
+    from app.core.config import settings
+    path = tmp_path / "grid.osm"
+    path.write_text(grid_osm())
+    loads = []
+
+    def counting_load(graph_path):
+        loads.append(graph_path)
+        return load_osm_graph(graph_path)
+
+    monkeypatch.setattr(settings, "OSM_GRAPH_PATH", str(path))
+    monkeypatch.setattr(map_matching, "load_osm_graph", counting_load)
+    monkeypatch.setattr(map_matching, "_matcher", None)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        matchers = list(pool.map(lambda _: map_matching.get_map_matcher(), range(8)))
+
+    assert len(loads) == 1
+    assert all(matcher is matchers[0] for matcher in matchers)
@@ -0,0 +1,44 @@
+"""
+Tests unitaires - Partitioning
+Couvre : partitions des mois à venir créées à l'avance (catalogue relu,
+         mois déjà partitionnés ignorés), commande create-partitions
+"""
+from sqlalchemy import create_engine
+
+from app import cli
+from app.core import partitioning
+
+
+class FrozenDatetime(partitioning.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 11, 20, tzinfo=tz)
+
+
+def test_create_upcoming_partitions(monkeypatch, tmp_path):
+    created = []
+    monkeypatch.setattr(partitioning, "datetime", FrozenDatetime)
+    monkeypatch.setattr(partitioning, "partitioning_enabled", lambda engine: True)
+    monkeypatch.setattr(partitioning, "_partition_names",
+                        lambda conn: ["gps_history_default", "gps_history_y2026m11"])
+    monkeypatch.setattr(partitioning, "_known_partitions", set())
+
+    def create(engine, timestamps):
+        months = {(ts.year, ts.month) for ts in timestamps} - partitioning._known_partitions
+        created.extend(sorted(months))
+    monkeypatch.setattr(partitioning, "ensure_gps_history_partitions", create)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}")
+    months = partitioning.create_upcoming_partitions(engine, 3)
+
+    assert months == [(2026, 11), (2026, 12), (2027, 1), (2027, 2)]
+    # Novembre existe déjà : pas de CREATE (ni de verrou) pour ce mois
+    assert created == [(2026, 12), (2027, 1), (2027, 2)]
+
+
+def test_cli_create_partitions_disabled(monkeypatch, capsys):
+    monkeypatch.setattr(cli, "init_db", lambda: None)
+
+    cli.main(["create-partitions"])
+
+    assert "partitioning disabled" in capsys.readouterr().out
@@ -0,0 +1,88 @@
+"""
+Tests unitaires - Reporting Service
+Couvre : vitesse lissée (bruit GPS ignoré), choix de la consigne,
+         consignes renvoyées par /update, les lots et le buffer
+"""
+from datetime import datetime, timedelta, timezone
+
+from app.models.location import Location
+from app.schemas.gps import GPSUpdate
+from app.services.gps_buffer import GPSIngestBuffer
+from app.services.gps_service import _ingest_batches, update_child_gps, update_child_gps_batch
+from app.services.reporting_service import (
+    MOVING,
+    SAFE_ZONE,
+    STATIONARY,
+    MotionTracker,
+    compute_hint,
+)
+from app.tests.conftest import TestingSessionLocal
+
+HOME = (45.75, 4.85)
+M_PER_DEG = 111194.93
+START = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+
+
+def fix(meters: float, seconds: int, battery: int = 80) -> GPSUpdate:
+    return GPSUpdate(latitude=HOME[0] + meters / M_PER_DEG, longitude=HOME[1], battery=battery,
+                     timestamp=(START + timedelta(seconds=seconds)).isoformat())
+
+
+def test_tracker_ignores_gps_jitter():
+    tracker = MotionTracker()
+    assert tracker.update(1, START, *HOME) is None
+    # 10 m d'écart toutes les 10 s : bruit à l'arrêt, pas 1 m/s
+    for i, meters in enumerate([10, 0, 10, 0], start=1):
+        speed = tracker.update(1, START + timedelta(seconds=10 * i), HOME[0] + meters / M_PER_DEG, HOME[1])
+    assert speed == 0
+
+
+def test_tracker_smooths_speed_and_skips_replayed_points():
+    tracker = MotionTracker(smoothing=0.5)
+    tracker.update(1, START, *HOME)
+    first = tracker.update(1, START + timedelta(seconds=10), HOME[0] + 215 / M_PER_DEG, HOME[1])
+    assert abs(first - 20) < 0.1
+
+    # Point plus ancien (lot rejoué) : vitesse inchangée
+    assert tracker.update(1, START + timedelta(seconds=5), *HOME) == first
+    # Arrêt : la vitesse lissée décroît de moitié
+    second = tracker.update(1, START + timedelta(seconds=20), HOME[0] + 215 / M_PER_DEG, HOME[1])
+    assert abs(second - first / 2) < 0.1
+
+
+def test_compute_hint_modes():
+    assert compute_hint(None, True, 80).mode == MOVING
+    assert compute_hint(3.0, True, 80).mode == MOVING
+
+    stationary = compute_hint(0.0, False, 80)
+    assert (stationary.mode, stationary.next_report_seconds, stationary.min_distance_m) == (STATIONARY, 60, 30)
+
+    home = compute_hint(0.0, True, 80)
+    assert (home.mode, home.next_report_seconds, home.min_distance_m) == (SAFE_ZONE, 300, 100)
+
+    low = compute_hint(0.0, True, 15)
+    assert low.low_battery and low.next_report_seconds == 600
+
+
+def test_update_hint_follows_motion_and_zone(db, test_child):
+    db.add(Location(name="Maison", latitude=HOME[0], longitude=HOME[1], radius=100, child_id=test_child.id))
+    db.commit()
+
+    # Premier point : vitesse inconnue, cadence pleine
+    assert update_child_gps(db, test_child.id, fix(0, 0)).reporting.mode == MOVING
+    # Immobile dans la zone (entrée commitée au point précédent)
+    assert update_child_gps(db, test_child.id, fix(5, 60)).reporting.mode == SAFE_ZONE
+    # Départ en voiture
+    assert update_child_gps(db, test_child.id, fix(600, 90)).reporting.mode == MOVING
+
+
+def test_batch_and_buffer_responses_carry_hints(db, test_child):
+    result = update_child_gps_batch(db, test_child.id, [fix(0, 0), fix(3, 60), fix(6, 120)])
+    assert result.reporting.mode == STATIONARY
+
+    buffer = GPSIngestBuffer(TestingSessionLocal)
+    assert buffer.add(test_child.id, fix(8, 180)).reporting.mode == STATIONARY
+
+    # Flush du buffer : personne à qui renvoyer une consigne
+    [flushed] = _ingest_batches(db, {test_child.id: [fix(8, 180)]}, publish=False)
+    assert flushed.reporting is None
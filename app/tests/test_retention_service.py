@@ -0,0 +1,190 @@
+"""
+Tests unitaires - Retention Service
+Couvre : passage en trace simplifiée puis en archive, lectures par palier,
+         résumés conservés, relance sans effet, jour archivé deux fois dans
+         le même job, points en retard fusionnés dans la trace simplifiée,
+         point validé pendant le job conservé, traces snap-to-roads en cache
+         purgées
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.gps_history import GPSHistory
+from app.models.gps_history_tier import GPSHistoryArchive, GPSHistoryRollup
+from app.models.snapped_track import SnappedTrack
+from app.schemas.gps import GPSUpdate
+from app.services.gps_service import (
+    get_gps_history,
+    get_history_distance,
+    iter_gps_history,
+    update_child_gps_batch,
+)
+from app.services.retention_service import ARCHIVE, FULL, ROLLUP, apply_retention, history_tier
+from app.services.summary_service import get_daily_summaries, rebuild_daily_summaries
+
+TODAY = datetime.now(timezone.utc).date()
+RECENT = TODAY - timedelta(days=2)
+ROLLED = TODAY - timedelta(days=40)
+ARCHIVED = TODAY - timedelta(days=400)
+
+
+def corner_track(day: date) -> list:
+    """Une heure, un point par minute : 30 min vers le nord puis 30 min vers l'est"""
+    start = datetime(day.year, day.month, day.day, 8, 0, tzinfo=timezone.utc)
+    fixes = []
+    for minute in range(61):
+        north, east = min(minute, 30), max(minute - 30, 0)
+        fixes.append(GPSUpdate(
+            latitude=44.8 + north * 0.001, longitude=-0.57 + east * 0.0014, battery=80,
+            timestamp=(start + timedelta(minutes=minute)).isoformat()
+        ))
+    return fixes
+
+
+@pytest.fixture
+def three_tiers(db, test_child):
+    for day in (ARCHIVED, ROLLED, RECENT):
+        update_child_gps_batch(db, test_child.id, corner_track(day))
+    return test_child
+
+
+def test_history_tier_by_age():
+    assert history_tier(TODAY) == FULL
+    assert history_tier(TODAY - timedelta(days=30)) == FULL
+    assert history_tier(TODAY - timedelta(days=31)) == ROLLUP
+    assert history_tier(TODAY - timedelta(days=366)) == ARCHIVE
+
+
+def test_retention_moves_days_down_tiers(db, three_tiers):
+    child_id = three_tiers.id
+    before = {day: get_gps_history(db, child_id, day, 0) for day in (ARCHIVED, ROLLED, RECENT)}
+
+    stats = apply_retention(db)
+    assert stats["rolled_up_days"] == 1
+    assert stats["archived_days"] == 1
+    assert stats["deleted_points"] == 122
+
+    assert db.query(GPSHistory).count() == 61
+    # Ligne droite puis virage : départ, coin, arrivée
+    assert db.query(GPSHistoryRollup).count() == 3
+    [archive] = db.query(GPSHistoryArchive).all()
+    assert (archive.day, archive.point_count) == (ARCHIVED, 3)
+
+    # Lectures transparentes : mêmes extrémités, horodatages conservés
+    for day in (ARCHIVED, ROLLED):
+        points = get_gps_history(db, child_id, day, 0)
+        assert [p.timestamp.replace(tzinfo=None) for p in points] == [
+            before[day][i].timestamp.replace(tzinfo=None) for i in (0, 30, 60)
+        ]
+        assert points[1].latitude == pytest.approx(before[day][30].latitude, abs=1e-5)
+    assert len(get_gps_history(db, child_id, RECENT, 0)) == 61
+
+
+def test_summaries_kept_after_retention(db, three_tiers):
+    expected = get_history_distance(db, three_tiers.id, ROLLED)
+    apply_retention(db)
+
+    assert [s.point_count for s in get_daily_summaries(db, three_tiers.id)] == [61, 61, 61]
+    assert get_history_distance(db, three_tiers.id, ROLLED) == expected
+
+    # Le backfill ne réécrit que les jours encore présents dans gps_history
+    assert rebuild_daily_summaries(db, three_tiers.id) == 1
+    db.expire_all()
+    assert len(get_daily_summaries(db, three_tiers.id)) == 3
+
+
+def test_retention_rerun_and_later_archive(db, three_tiers):
+    apply_retention(db)
+    assert apply_retention(db) == {
+        "rolled_up_days": 0, "archived_days": 0, "deleted_points": 0, "dropped_partitions": []
+    }
+
+    # 340 jours plus tard : la trace simplifiée passe en archive, le jour récent en trace simplifiée
+    stats = apply_retention(db, today=TODAY + timedelta(days=340))
+    assert (stats["rolled_up_days"], stats["archived_days"]) == (1, 1)
+    assert db.query(GPSHistoryArchive).count() == 2
+    assert db.query(GPSHistoryRollup).count() == 3
+
+
+def test_late_points_and_rollup_archived_in_same_run(db, three_tiers):
+    apply_retention(db)
+    # Points en retard (import, lot rejoué) d'un jour déjà passé en trace simplifiée
+    late = corner_track(ROLLED)[:1]
+    late[0].timestamp = f"{ROLLED.isoformat()}T18:00:00+00:00"
+    update_child_gps_batch(db, three_tiers.id, late)
+
+    later = TODAY + timedelta(days=340)
+    for _ in range(2):
+        apply_retention(db, today=later)
+
+    archives = db.query(GPSHistoryArchive).filter(GPSHistoryArchive.day == ROLLED).all()
+    assert [a.point_count for a in archives] == [4]
+
+
+def test_late_points_merged_into_existing_rollup(db, three_tiers):
+    apply_retention(db)
+    rollup = [(r.latitude, r.longitude) for r in
+              db.query(GPSHistoryRollup).order_by(GPSHistoryRollup.timestamp).all()]
+    # Points en retard dans la ligne droite (supprimés par la simplification) et un fix rejoué
+    late = [fix for i, fix in enumerate(corner_track(ROLLED)) if i in (10, 20, 60)]
+    update_child_gps_batch(db, three_tiers.id, late)
+
+    stats = apply_retention(db)
+
+    assert stats["rolled_up_days"] == 1
+    rows = db.query(GPSHistoryRollup).order_by(GPSHistoryRollup.timestamp).all()
+    assert [(r.latitude, r.longitude) for r in rows] == rollup
+    timestamps = [r.timestamp for r in rows]
+    assert len(set(timestamps)) == len(timestamps) == 3
+
+
+def test_point_committed_during_run_is_kept(db, three_tiers, monkeypatch):
+    """Point en retard validé après la lecture du job : pas recopié, donc pas supprimé"""
+    from app.services import retention_service
+
+    write_rollup = retention_service._write_rollup
+    late_ts = datetime(ROLLED.year, ROLLED.month, ROLLED.day, 18, 0, tzinfo=timezone.utc)
+
+    def rollup_with_concurrent_insert(db, child_id, day, points):
+        # Lot du buffer ou import validé pendant que la rétention recopie
+        db.execute(insert(GPSHistory).values(child_id=child_id, latitude=44.9, longitude=-0.5,
+                                             timestamp=late_ts))
+        write_rollup(db, child_id, day, points)
+
+    monkeypatch.setattr(retention_service, "_write_rollup", rollup_with_concurrent_insert)
+    stats = apply_retention(db)
+    monkeypatch.undo()
+
+    assert stats["deleted_points"] == 122
+    kept = db.query(GPSHistory.latitude).filter(GPSHistory.timestamp < datetime.combine(
+        RECENT, datetime.min.time(), tzinfo=timezone.utc)).all()
+    assert [lat for lat, in kept] == [44.9]
+
+    # Passage suivant : le point rejoint la trace simplifiée du jour
+    apply_retention(db)
+    assert db.query(GPSHistory).count() == 61
+    assert db.query(GPSHistoryRollup).count() == 4
+
+
+def test_retention_purges_snapped_tracks_of_moved_days(db, three_tiers):
+    db.add_all([
+        SnappedTrack(cache_key=f"{three_tiers.id}:{day}", child_id=three_tiers.id, day=day, points="[]")
+        for day in (ROLLED, RECENT)
+    ])
+    db.commit()
+
+    apply_retention(db)
+
+    assert [t.day for t in db.query(SnappedTrack).all()] == [RECENT]
+
+
+def test_export_reads_all_tiers_in_order(db, three_tiers):
+    apply_retention(db)
+    start = datetime(ARCHIVED.year, ARCHIVED.month, ARCHIVED.day, tzinfo=timezone.utc)
+    end = datetime(TODAY.year, TODAY.month, TODAY.day, tzinfo=timezone.utc)
+
+    timestamps = [p.timestamp.replace(tzinfo=None) for p in iter_gps_history(db, three_tiers.id, start, end)]
+    assert len(timestamps) == 3 + 3 + 61
+    assert timestamps == sorted(timestamps)
@@ -0,0 +1,118 @@
+"""
+Tests unitaires - Client Roads API
+Couvre : RoadsClient.snap (tranches parallèles, raccords, retry), contre un
+serveur bouchon qui imite snapToRoads (httpx.MockTransport)
+"""
+import asyncio
+from collections import namedtuple
+import httpx
+import pytest
+from app.services.roads_service import RoadsClient
+
+Point = namedtuple("Point", ["latitude", "longitude"])
+POINTS = [Point(44.8 + i / 10000, -0.57 + i / 10000) for i in range(250)]
+
+
+def expected_snap(points: list) -> list:
+    """Trace snappée d'un seul tenant : chaque point + un point interpolé entre deux"""
+    result = []
+    for i, p in enumerate(points):
+        if i > 0:
+            prev = points[i - 1]
+            result.append({"latitude": (prev.latitude + p.latitude) / 2,
+                           "longitude": (prev.longitude + p.longitude) / 2})
+        result.append({"latitude": p.latitude, "longitude": p.longitude})
+    return result
+
+
+class RoadsStub:
+    """Serveur bouchon snapToRoads : renvoie les points tels quels + milieux interpolés"""
+
+    def __init__(self, failures: int = 0, status: int = 503):
+        self.failures = failures
+        self.status = status
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures > 0:
+                self.failures -= 1
+                return httpx.Response(self.status)
+
+            coords = [tuple(map(float, pair.split(",")))
+                      for pair in request.url.params["path"].split("|")]
+            snapped = []
+            for i, (lat, lon) in enumerate(coords):
+                if i > 0:
+                    plat, plon = coords[i - 1]
+                    snapped.append({"location": {"latitude": (plat + lat) / 2,
+                                                 "longitude": (plon + lon) / 2}})
+                snapped.append({"location": {"latitude": lat, "longitude": lon},
+                                "originalIndex": i})
+            return httpx.Response(200, json={"snappedPoints": snapped})
+        finally:
+            self.in_flight -= 1
+
+
+def snap(client: RoadsClient, points: list) -> tuple:
+    async def run():
+        try:
+            return await client.snap(points, "test-key")
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def test_snap_reassembles_chunks_seamlessly():
+    """Tranches chevauchantes réassemblées = trace snappée d'un seul tenant"""
+    stub = RoadsStub()
+    client = RoadsClient(base_url="http://roads.test/v1/snapToRoads",
+                         transport=httpx.MockTransport(stub))
+    result, degraded = snap(client, POINTS)
+
+    assert result == pytest.approx(expected_snap(POINTS))
+    assert not degraded
+    assert stub.requests == len(client.chunk_bounds(len(POINTS))) == 3
+
+
+def test_snap_bounded_concurrency():
+    """Les tranches partent en parallèle sans dépasser max_concurrency"""
+    stub = RoadsStub()
+    client = RoadsClient(base_url="http://roads.test/v1/snapToRoads", chunk_size=20,
+                         overlap=2, max_concurrency=3,
+                         transport=httpx.MockTransport(stub))
+    result, degraded = snap(client, POINTS)
+
+    assert result == pytest.approx(expected_snap(POINTS))
+    assert not degraded
+    assert stub.max_in_flight == 3
+
+
+def test_snap_retries_transient_errors():
+    """503 transitoires : nouvelle tentative avec backoff"""
+    stub = RoadsStub(failures=2)
+    client = RoadsClient(base_url="http://roads.test/v1/snapToRoads", backoff_seconds=0,
+                         transport=httpx.MockTransport(stub))
+    result, degraded = snap(client, POINTS[:50])
+
+    assert result == pytest.approx(expected_snap(POINTS[:50]))
+    assert not degraded
+    assert stub.requests == 3
+
+
+def test_snap_failed_chunk_falls_back_to_raw_points():
+    """Tranche définitivement en échec : points bruts, pas de trou, trace dégradée"""
+    stub = RoadsStub(failures=10, status=400)
+    client = RoadsClient(base_url="http://roads.test/v1/snapToRoads", backoff_seconds=0,
+                         transport=httpx.MockTransport(stub))
+    result, degraded = snap(client, POINTS[:50])
+
+    assert result == [{"latitude": p.latitude, "longitude": p.longitude} for p in POINTS[:50]]
+    assert degraded
+    assert stub.requests == 1
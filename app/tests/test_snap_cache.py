@@ -0,0 +1,142 @@
+"""
+Tests unitaires - Cache snap-to-roads
+Couvre : snap_history, SnapCache (mémoire LRU + table snapped_tracks),
+         clé par moteur, purge, traces dégradées non mises en cache
+"""
+import asyncio
+from collections import namedtuple
+from datetime import date, timedelta
+import httpx
+import pytest
+from app.models.snapped_track import SnappedTrack
+from app.services import gps_service, roads_service
+from app.services.snap_cache import SnapCache, snap_cache, snap_cache_key
+from app.tests.conftest import TestingSessionLocal
+
+Point = namedtuple("Point", ["latitude", "longitude"])
+POINTS = [Point(44.8 + i / 1000, -0.57) for i in range(5)]
+SNAPPED = [{"latitude": 44.8, "longitude": -0.57}]
+SNAP_TO_ROADS = gps_service.snap_to_roads
+
+
+@pytest.fixture
+def fake_roads(monkeypatch):
+    """Remplace l'appel Google Roads et compte les appels"""
+    calls = []
+
+    async def fake_snap_to_roads(points):
+        calls.append(points)
+        return SNAPPED, False
+
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test-key")
+    monkeypatch.setattr(gps_service, "snap_to_roads", fake_snap_to_roads)
+    snap_cache.clear()
+    yield calls
+    snap_cache.clear()
+
+
+def snap_history(child_id, day, points):
+    """snap_history (route async) sur sa propre session"""
+    session = TestingSessionLocal()
+    try:
+        return asyncio.run(gps_service.snap_history(session, child_id, day, 30, points))
+    finally:
+        session.close()
+
+
+def test_snap_history_past_day_cached_in_db(db, test_child, fake_roads):
+    """Jour passé : un seul appel externe, puis servi depuis la DB même après vidage mémoire"""
+    yesterday = date.today() - timedelta(days=1)
+    first = snap_history(test_child.id, yesterday, POINTS)
+    snap_cache.clear()
+    second = snap_history(test_child.id, yesterday, POINTS)
+
+    assert first == second == (SNAPPED, False)
+    assert len(fake_roads) == 1
+    assert db.query(SnappedTrack).count() == 1
+
+
+def test_snap_history_today_memory_only(db, test_child, fake_roads):
+    """Aujourd'hui : cache mémoire seulement, et nouvelle clé si les points changent"""
+    snap_history(test_child.id, date.today(), POINTS)
+    snap_history(test_child.id, date.today(), POINTS)
+    snap_history(test_child.id, date.today(), POINTS[:3])
+
+    assert len(fake_roads) == 2
+    assert db.query(SnappedTrack).count() == 0
+
+
+def test_snap_history_no_api_key_not_cached(db, test_child, fake_roads, monkeypatch):
+    """Sans clé API (points bruts), rien n'est mis en cache"""
+    monkeypatch.delenv("GOOGLE_MAPS_API_KEY")
+    monkeypatch.setattr(gps_service, "snap_to_roads", SNAP_TO_ROADS)
+    yesterday = date.today() - timedelta(days=1)
+    snapped, degraded = snap_history(test_child.id, yesterday, POINTS)
+
+    assert degraded
+    assert snapped == [{"latitude": p.latitude, "longitude": p.longitude} for p in POINTS]
+
+    assert len(snap_cache) == 0
+    assert db.query(SnappedTrack).count() == 0
+
+
+def test_snap_cache_lru_eviction(db):
+    """Au-delà de max_entries, l'entrée la moins récemment lue est évincée"""
+    cache = SnapCache(max_entries=2)
+    day = date.today()
+    keys = [snap_cache_key(1, day, 30, POINTS[:i], "google") for i in range(1, 4)]
+    cache.put(db, keys[0], 1, day, SNAPPED, persist=False)
+    cache.put(db, keys[1], 1, day, SNAPPED, persist=False)
+    cache.get(db, keys[0])
+    cache.put(db, keys[2], 1, day, SNAPPED, persist=False)
+
+    assert cache.get(db, keys[0]) == SNAPPED
+    assert cache.get(db, keys[1]) is None
+
+
+def test_snap_history_backend_switch_not_served_from_cache(db, test_child, fake_roads, monkeypatch):
+    """Changement de moteur (ou de version) : nouvelle clé, la trace de l'ancien n'est pas resservie"""
+    from app.core.config import settings
+    yesterday = date.today() - timedelta(days=1)
+    snap_history(test_child.id, yesterday, POINTS)
+
+    monkeypatch.setattr(settings, "SNAP_BACKEND", "local")
+    monkeypatch.setattr(settings, "OSM_GRAPH_PATH", "/data/bordeaux.osm")
+    snap_history(test_child.id, yesterday, POINTS)
+    monkeypatch.setattr(settings, "MAP_MATCHING_SIGMA_M", 5.0)
+    snap_history(test_child.id, yesterday, POINTS)
+
+    assert len(fake_roads) == 3
+    assert db.query(SnappedTrack).count() == 3
+
+
+def test_snap_cache_purge(db, test_child):
+    cache = SnapCache()
+    yesterday, before = date.today() - timedelta(days=1), date.today() - timedelta(days=2)
+    keys = {day: snap_cache_key(test_child.id, day, 30, POINTS, "google") for day in (yesterday, before)}
+    for day, key in keys.items():
+        cache.put(db, key, test_child.id, day, SNAPPED, persist=True)
+
+    cache.purge(db, {(test_child.id, before)})
+    db.commit()
+
+    assert cache.get(db, keys[before]) is None
+    assert cache.get(db, keys[yesterday]) == SNAPPED
+    assert [t.day for t in db.query(SnappedTrack).all()] == [yesterday]
+
+
+def test_snap_history_failed_roads_not_cached(db, test_child, monkeypatch):
+    """Roads API en panne (503 à chaque tentative) : points bruts, ni LRU ni snapped_tracks"""
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test-key")
+    monkeypatch.setattr(roads_service, "roads_client", roads_service.RoadsClient(
+        base_url="http://roads.test/v1/snapToRoads", backoff_seconds=0,
+        transport=httpx.MockTransport(lambda request: httpx.Response(503)),
+    ))
+    snap_cache.clear()
+    yesterday = date.today() - timedelta(days=1)
+    snapped, degraded = snap_history(test_child.id, yesterday, POINTS)
+
+    assert degraded
+    assert snapped == [{"latitude": p.latitude, "longitude": p.longitude} for p in POINTS]
+    assert len(snap_cache) == 0
+    assert db.query(SnappedTrack).count() == 0
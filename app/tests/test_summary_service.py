@@ -0,0 +1,106 @@
+"""
+Tests unitaires - Summary Service
+Couvre : résumés journaliers tenus à l'ingestion, rejeu en retard, backfill
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.gps_daily_summary import GPSDailySummary
+from app.models.gps_history import GPSHistory
+from app.schemas.gps import GPSUpdate
+from app.services.gps_service import calculate_distance, get_history_days, update_child_gps_batch
+from app.services.summary_service import (
+    get_daily_summaries,
+    rebuild_daily_summaries,
+    recompute_daily_summary,
+)
+
+START = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+
+
+def fix(i: int, minutes: int = None, battery: int = None) -> GPSUpdate:
+    ts = START + timedelta(minutes=i if minutes is None else minutes)
+    return GPSUpdate(latitude=44.8 + i * 0.001, longitude=-0.57 - i * 0.0005,
+                     battery=90 - i if battery is None else battery, timestamp=ts.isoformat())
+
+
+def expected_distance(n: int) -> float:
+    return sum(
+        calculate_distance(44.8 + i * 0.001, -0.57 - i * 0.0005, 44.8 + (i + 1) * 0.001, -0.57 - (i + 1) * 0.0005)
+        for i in range(n - 1)
+    )
+
+
+def summary_fields(summary: GPSDailySummary) -> tuple:
+    return (summary.day, summary.point_count, summary.first_fix.replace(tzinfo=None),
+            summary.last_fix.replace(tzinfo=None), round(summary.distance_m, 3), summary.min_battery,
+            summary.min_latitude, summary.max_latitude, summary.min_longitude, summary.max_longitude)
+
+
+def test_summary_maintained_incrementally(db, test_child):
+    update_child_gps_batch(db, test_child.id, [fix(i) for i in range(5)])
+    update_child_gps_batch(db, test_child.id, [fix(i) for i in range(5, 10)])
+
+    [summary] = get_daily_summaries(db, test_child.id)
+    assert summary.day == date(2026, 3, 3)
+    assert summary.point_count == 10
+    assert summary.distance_m == pytest.approx(expected_distance(10))
+    assert summary.min_battery == 81
+    assert summary.min_latitude == pytest.approx(44.8)
+    assert summary.max_latitude == pytest.approx(44.809)
+    assert summary.last_fix.replace(tzinfo=None) == (START + timedelta(minutes=9)).replace(tzinfo=None)
+
+
+def test_late_replay_recomputes_day(db, test_child):
+    """Points plus anciens que le dernier connu : distance recalculée dans l'ordre"""
+    update_child_gps_batch(db, test_child.id, [fix(i) for i in (0, 1, 4, 5)])
+    update_child_gps_batch(db, test_child.id, [fix(2), fix(3)])
+
+    [summary] = get_daily_summaries(db, test_child.id)
+    assert summary.point_count == 6
+    assert summary.distance_m == pytest.approx(expected_distance(6))
+
+
+def test_batch_spanning_midnight(db, test_child):
+    update_child_gps_batch(db, test_child.id, [fix(0, minutes=60 * 15 + i) for i in range(3)]
+                           + [fix(0, minutes=60 * 17)])
+
+    days = get_history_days(db, test_child.id)
+    assert days == ["2026-03-04", "2026-03-03"]
+
+
+def test_rebuild_matches_incremental(db, test_child):
+    update_child_gps_batch(db, test_child.id, [fix(i) for i in range(7)])
+    update_child_gps_batch(db, test_child.id, [fix(i, minutes=60 * 24 + i) for i in range(3)])
+    incremental = [summary_fields(s) for s in get_daily_summaries(db, test_child.id)]
+
+    # Blocs plus petits qu'une journée : distance raccordée entre les blocs
+    assert rebuild_daily_summaries(db, chunk_size=2) == 2
+    db.expire_all()
+
+    assert [summary_fields(s) for s in get_daily_summaries(db, test_child.id)] == incremental
+
+
+def test_rebuild_backfills_existing_history(db, test_child):
+    db.add_all([
+        GPSHistory(child_id=test_child.id, latitude=44.8, longitude=-0.57, battery=50,
+                   timestamp=START + timedelta(days=d))
+        for d in range(3)
+    ])
+    db.commit()
+    assert get_history_days(db, test_child.id) == []
+
+    assert rebuild_daily_summaries(db, test_child.id) == 3
+
+    assert get_history_days(db, test_child.id) == ["2026-03-05", "2026-03-04", "2026-03-03"]
+    assert len(get_daily_summaries(db, test_child.id, date(2026, 3, 4), date(2026, 3, 5))) == 2
+
+
+def test_recompute_empty_day_removes_summary(db, test_child):
+    update_child_gps_batch(db, test_child.id, [fix(0)])
+    db.query(GPSHistory).delete()
+    db.commit()
+
+    assert recompute_daily_summary(db, test_child.id, date(2026, 3, 3)) is None
+    assert get_history_days(db, test_child.id) == []
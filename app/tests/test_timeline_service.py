@@ -0,0 +1,162 @@
+"""
+Tests unitaires - Timeline Service
+Couvre : segmentation arrêts / trajets, rapprochement des zones,
+         mise à jour incrémentale du cache, rejeu en retard, lignes et
+         fixes comptés contre la version, route
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import get_async_db, get_db
+from app.main import app
+from app.models.gps_history import GPSHistory
+from app.models.location import Location
+from app.schemas.gps import GPSUpdate
+from app.services.gps_service import get_history_version, update_child_gps_batch
+from app.services.timeline_service import (
+    TimelineBuilder,
+    clear_timelines,
+    get_timeline,
+    timeline_cache,
+)
+from app.tests.conftest import override_get_async_db
+
+HOME = (45.75, 4.85)
+M_PER_DEG = 111194.93
+START = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+
+
+def north(meters: float) -> float:
+    return HOME[0] + meters / M_PER_DEG
+
+
+def position(minute: int) -> float:
+    """Maison (min 0-20, bruit ±20 m), trajet de 2 km (21-29), école (30+)"""
+    if minute <= 20:
+        return 20 if minute % 2 else -20
+    if minute < 30:
+        return 200 * (minute - 20)
+    return 2000 + (15 if minute % 2 else -15)
+
+
+def fixes(minutes):
+    return [
+        GPSUpdate(latitude=north(position(m)), longitude=HOME[1], battery=80,
+                  timestamp=(START + timedelta(minutes=m)).isoformat())
+        for m in minutes
+    ]
+
+
+def summarize(segments):
+    return [(s["type"], s["start"].minute, s["end"].minute, s["point_count"]) for s in segments]
+
+
+def test_builder_segments_stays_and_trips():
+    builder = TimelineBuilder(radius_m=100, min_stay_seconds=300)
+    for m in range(61):
+        builder.add(START + timedelta(minutes=m), north(position(m)), HOME[1])
+
+    segments = builder.segments()
+    assert summarize(segments) == [("stay", 0, 20, 21), ("trip", 20, 30, 9), ("stay", 30, 0, 31)]
+    home, trip, school = segments
+    assert home["ongoing"] is False and school["ongoing"] is True
+    assert home["latitude"] == pytest.approx(north(0), abs=1e-4)
+    assert trip["distance_m"] == pytest.approx(2000, rel=0.01)
+
+
+def test_builder_short_stop_is_part_of_trip():
+    """Arrêt plus court que la durée minimale : compté dans le trajet"""
+    builder = TimelineBuilder(radius_m=100, min_stay_seconds=300)
+    for m, meters in enumerate([0, 500, 1000, 1000, 1000, 1500]):
+        builder.add(START + timedelta(minutes=m), north(meters), HOME[1])
+
+    [trip] = builder.segments()
+    assert trip["type"] == "trip"
+    assert trip["point_count"] == 6
+    assert trip["distance_m"] == pytest.approx(1500, rel=0.01)
+
+
+def test_stays_matched_to_zones(db, test_child):
+    db.add(Location(name="Maison", latitude=HOME[0], longitude=HOME[1], radius=100, child_id=test_child.id))
+    db.commit()
+    update_child_gps_batch(db, test_child.id, fixes(range(61)))
+
+    segments = get_timeline(db, test_child.id, date(2026, 3, 3))
+    assert [(s["type"], s.get("zone_name")) for s in segments] == [
+        ("stay", "Maison"), ("trip", None), ("stay", None)
+    ]
+
+
+def test_timeline_updated_incrementally(db, test_child):
+    day = date(2026, 3, 3)
+    update_child_gps_batch(db, test_child.id, fixes(range(25)))
+    assert summarize(get_timeline(db, test_child.id, day)) == [("stay", 0, 20, 21), ("trip", 20, 24, 4)]
+    version, builder = timeline_cache.get((test_child.id, day))
+
+    update_child_gps_batch(db, test_child.id, fixes(range(25, 61)))
+    incremental = get_timeline(db, test_child.id, day)
+    _, updated = timeline_cache.get((test_child.id, day))
+    # Nouveaux points ajoutés à une copie, la version en cache n'est pas modifiée
+    assert updated is not builder and builder.count == 25 and updated.count == 61
+
+    clear_timelines()
+    assert incremental == get_timeline(db, test_child.id, day)
+
+
+def test_late_replay_rebuilds_day(db, test_child):
+    day = date(2026, 3, 3)
+    update_child_gps_batch(db, test_child.id, fixes([m for m in range(61) if m not in (23, 24)]))
+    get_timeline(db, test_child.id, day)
+
+    update_child_gps_batch(db, test_child.id, fixes([23, 24]))
+    replayed = get_timeline(db, test_child.id, day)
+    assert summarize(replayed)[1] == ("trip", 20, 30, 9)
+
+    clear_timelines()
+    assert replayed == get_timeline(db, test_child.id, day)
+
+
+def test_fix_count_checked_against_version(db, test_child):
+    day = date(2026, 3, 3)
+    stay = [GPSUpdate(latitude=HOME[0], longitude=HOME[1], battery=80,
+                      timestamp=(START + timedelta(minutes=m)).isoformat()) for m in range(10)]
+    update_child_gps_batch(db, test_child.id, stay[:5])
+    get_timeline(db, test_child.id, day)
+
+    # Point d'arrêt prolongé (même ligne) : mise à jour incrémentale
+    update_child_gps_batch(db, test_child.id, stay[5:])
+    [segment] = get_timeline(db, test_child.id, day)
+    version, builder = timeline_cache.get((test_child.id, day))
+    assert (builder.count, builder.fix_count) == (1, 10) == (version[0], version[2])
+    assert segment["duration_seconds"] == 9 * 60
+
+    # Même nombre de lignes, fixes différents (ligne réécrite) : recalcul complet
+    row = db.query(GPSHistory).filter(GPSHistory.child_id == test_child.id).one()
+    row.fix_count, row.end_timestamp = 12, START + timedelta(minutes=11)
+    db.commit()
+    [segment] = get_timeline(db, test_child.id, day)
+    _, rebuilt = timeline_cache.get((test_child.id, day))
+    assert rebuilt.fix_count == get_history_version(db, test_child.id, day)[2] == 12
+    assert segment["duration_seconds"] == 11 * 60
+
+
+def test_timeline_route(db, test_child):
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        client = TestClient(app)
+        update_child_gps_batch(db, test_child.id, fixes(range(61)))
+
+        response = client.get(f"/api/gps/children/{test_child.id}/timeline", params={"day": "2026-03-03"})
+        assert response.status_code == 200
+        assert [s["type"] for s in response.json()] == ["stay", "trip", "stay"]
+
+        cached = client.get(f"/api/gps/children/{test_child.id}/timeline", params={"day": "2026-03-03"},
+                            headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+        assert client.get("/api/gps/children/999/timeline").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_async_db, None)
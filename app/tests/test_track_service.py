@@ -0,0 +1,59 @@
+"""
+Tests unitaires - Track Service
+Couvre : simplify_track (Douglas-Peucker, Visvalingam-Whyatt)
+"""
+import pytest
+from collections import namedtuple
+from app.services.track_service import simplify_track
+
+Point = namedtuple("Point", ["latitude", "longitude"])
+
+# ~1.1 m par 1e-5 degré de latitude
+STEP = 1e-5
+
+
+def straight_line(n: int) -> list:
+    return [Point(44.8 + i * STEP * 10, -0.57) for i in range(n)]
+
+
+def l_shape() -> list:
+    """100 points vers le nord puis 100 vers l'est : un seul virage"""
+    north = [Point(44.8 + i * STEP * 10, -0.57) for i in range(100)]
+    corner = north[-1]
+    east = [Point(corner.latitude, corner.longitude + i * STEP * 10) for i in range(1, 101)]
+    return north + east
+
+
+@pytest.mark.parametrize("method", ["dp", "vw"])
+def test_simplify_straight_line_keeps_endpoints(method):
+    """Une ligne droite se réduit à ses deux extrémités"""
+    points = straight_line(500)
+    result = simplify_track(points, method, 5.0)
+    assert result == [points[0], points[-1]]
+
+
+@pytest.mark.parametrize("method", ["dp", "vw"])
+def test_simplify_keeps_corner(method):
+    """Le virage est conservé"""
+    points = l_shape()
+    result = simplify_track(points, method, 5.0)
+    assert points[99] in result
+    assert len(result) <= 5
+
+
+@pytest.mark.parametrize("method", ["dp", "vw"])
+def test_simplify_collapses_stationary_jitter(method):
+    """Un enfant immobile (bruit < 2 m) ne laisse que quelques points"""
+    jitter = [Point(44.8 + (i % 3) * STEP, -0.57 + (i % 2) * STEP) for i in range(1000)]
+    result = simplify_track(jitter, method, 10.0)
+    assert len(result) <= 3
+
+
+def test_simplify_short_track_unchanged():
+    points = straight_line(2)
+    assert simplify_track(points, "dp", 10.0) == points
+
+
+def test_simplify_unknown_method():
+    with pytest.raises(ValueError):
+        simplify_track(straight_line(10), "foo", 10.0)
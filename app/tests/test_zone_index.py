@@ -0,0 +1,93 @@
+"""
+Tests pour zone_index.py
+"""
+import numpy as np
+
+from app.models.location import Location
+from app.schemas.gps import GPSUpdate
+from app.schemas.location import LocationCreate, LocationUpdate
+from app.services.gps_service import update_child_gps, is_child_in_safe_zone
+from app.services.location_service import create_location, update_location, delete_location
+from app.services.zone_index import ZoneIndex, Zone, CELL_DEGREES, get_zone_index
+
+
+def _zone(db, test_user, test_child, name, lat, lon, radius=200):
+    return create_location(db, LocationCreate(
+        name=name, latitude=lat, longitude=lon, radius=radius, child_id=test_child.id
+    ), test_user.id)
+
+
+def test_zone_index_finds_containing_zone():
+    index = ZoneIndex([
+        Zone(1, "Maison", 45.75, 4.85, 200),
+        Zone(2, "École", 45.80, 4.90, 200),
+    ])
+    assert index.find(45.7505, 4.8505).name == "Maison"
+    assert index.find(45.8001, 4.9001).name == "École"
+    assert index.find(45.0, 4.0) is None
+
+
+def test_zone_index_zone_across_cells():
+    """Test : Zone centrée près d'un bord de cellule → trouvée depuis la cellule voisine"""
+    edge = 45 + 0.5 * CELL_DEGREES
+    index = ZoneIndex([Zone(1, "Parc", edge - 0.0001, 4.855, 300)])
+    point_lat = edge + 0.001
+    assert index.candidates(point_lat, 4.855)
+    assert index.find(point_lat, 4.855).name == "Parc"
+
+
+def test_zone_index_overlapping_zones_lowest_id_first():
+    index = ZoneIndex([
+        Zone(1, "Maison", 45.75, 4.85, 500),
+        Zone(2, "Jardin", 45.7501, 4.8501, 500),
+    ])
+    assert index.find(45.7501, 4.8501).name == "Maison"
+
+
+def test_zone_index_default_radius(db, test_child):
+    """Test : Zone sans rayon → rayon par défaut"""
+    db.add(Location(name="Maison", latitude=45.75, longitude=4.85,
+                    radius=None, child_id=test_child.id))
+    db.commit()
+
+    index = get_zone_index(db, test_child.id)
+    assert index.find(45.7505, 4.85).name == "Maison"
+
+
+def test_safe_zone_follows_location_changes(db, test_user, test_child):
+    """Test : Index invalidé après création / modification / suppression"""
+    update_child_gps(db, test_child.id, GPSUpdate(latitude=45.75, longitude=4.85, battery=90, timestamp="2026-03-03T12:00:00Z"))
+    assert is_child_in_safe_zone(db, test_child.id)["in_safe_zone"] is False
+
+    location = _zone(db, test_user, test_child, "Maison", 45.75, 4.85)
+    assert is_child_in_safe_zone(db, test_child.id)["zone_name"] == "Maison"
+
+    update_location(db, location.id, test_user.id, LocationUpdate(latitude=46.0, longitude=5.0))
+    assert is_child_in_safe_zone(db, test_child.id)["in_safe_zone"] is False
+
+    update_location(db, location.id, test_user.id, LocationUpdate(latitude=45.75, longitude=4.85))
+    assert is_child_in_safe_zone(db, test_child.id)["in_safe_zone"] is True
+
+    delete_location(db, location.id, test_user.id)
+    assert is_child_in_safe_zone(db, test_child.id)["in_safe_zone"] is False
+
+
+def test_zone_index_locate_matches_find():
+    """Test : Évaluation vectorisée d'une trace = find point par point"""
+    index = ZoneIndex([
+        Zone(1, "Maison", 45.75, 4.85, 200),
+        Zone(2, "École", 45.752, 4.852, 300),
+        Zone(3, "Parc", 45.80, 4.90, 150),
+    ])
+    lats = np.linspace(45.74, 45.81, 2000)
+    lons = np.linspace(4.84, 4.91, 2000)
+
+    located = index.locate(lats, lons, chunk_size=256)
+    for lat, lon, position in zip(lats, lons, located):
+        zone = index.find(lat, lon)
+        assert (zone.id if zone else None) == (index.zones[position].id if position >= 0 else None)
+    assert set(located.tolist()) == {-1, 0, 1, 2}
+
+
+def test_zone_index_locate_without_zones():
+    assert ZoneIndex([]).locate([45.75], [4.85]).tolist() == [-1]
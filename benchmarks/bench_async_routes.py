@@ -0,0 +1,161 @@
+"""
+Benchmark charge concurrente : route async bloquante (session synchrone dans
+async def, chemin d'avant), session async + run_sync (requêtes async, mais
+le service tourne sur la boucle) et session synchrone dans le threadpool
+(chemin des routes de lecture)
+
+Des clients concurrents lisent l'historique d'une journée pendant qu'une
+sonde appelle /ping toutes les 10 ms : la latence de la sonde mesure le
+blocage de la boucle d'événements (un seul worker, comme sur la VM Fly).
+
+Usage :
+    python -m benchmarks.bench_async_routes [--points 2000] [--clients 20] [--requests 10]
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_async_routes
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base, async_url
+from app.models import User, Child, GPSHistory
+from app.services import gps_service
+
+DAY = date(2026, 3, 3)
+
+
+def fill(engine, points: int) -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="bench@wimc.fr", username="bench", hashed_password="x")
+    db.add(user)
+    db.commit()
+    child = Child(name="Bench", parent_id=user.id)
+    db.add(child)
+    db.commit()
+    start = datetime(DAY.year, DAY.month, DAY.day, tzinfo=timezone.utc)
+    db.execute(insert(GPSHistory), [
+        {"child_id": child.id, "latitude": 44.8 + i * 1e-4, "longitude": -0.57, "battery": 80,
+         "timestamp": start + timedelta(seconds=86400 * i // points)}
+        for i in range(points)
+    ])
+    db.commit()
+    child_id = child.id
+    db.close()
+    return child_id
+
+
+def build_apps(url: str, clients: int):
+    # Pool à la taille de la charge : sinon, en mode bloquant, une attente de
+    # connexion gèle la boucle qui doit justement libérer les autres
+    engine = create_engine(url, pool_size=clients, max_overflow=clients)
+    SyncSession = sessionmaker(bind=engine, autoflush=False)
+    async_db_url, connect_args = async_url(url)
+    # aiosqlite : NullPool, une connexion par session
+    pool = {"pool_size": clients, "max_overflow": clients} if engine.dialect.name == "postgresql" else {}
+    async_engine = create_async_engine(async_db_url, connect_args=connect_args, **pool)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    blocking = FastAPI()
+
+    @blocking.get("/history/{child_id}")
+    async def blocking_history(child_id: int, db: Session = Depends(sync_db)):
+        return len(gps_service.get_gps_history(db, child_id, DAY, 0))
+
+    run_sync = FastAPI()
+
+    @run_sync.get("/history/{child_id}")
+    async def run_sync_history(child_id: int, db: AsyncSession = Depends(async_db)):
+        return len(await db.run_sync(gps_service.get_gps_history, child_id, DAY, 0))
+
+    threadpool = FastAPI()
+
+    @threadpool.get("/history/{child_id}")
+    async def threadpool_history(child_id: int, db: Session = Depends(sync_db)):
+        return len(await run_in_threadpool(gps_service.get_gps_history, db, child_id, DAY, 0))
+
+    for app in (blocking, run_sync, threadpool):
+        app.add_api_route("/ping", lambda: {"ping": "ok"})
+    return engine, async_engine, {
+        "session synchrone": blocking,
+        "async + run_sync": run_sync,
+        "threadpool": threadpool,
+    }
+
+
+async def load(app, child_id: int, clients: int, requests: int) -> tuple:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(f"/history/{child_id}")  # connexions, caches
+        done = asyncio.Event()
+        pings = []
+
+        async def probe():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/ping")
+                pings.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+
+        async def worker():
+            for _ in range(requests):
+                response = await client.get(f"/history/{child_id}")
+                response.raise_for_status()
+
+        prober = asyncio.create_task(probe())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await prober
+    return elapsed, pings
+
+
+def run(url: str, points: int, clients: int, requests: int) -> None:
+    engine, async_engine, apps = build_apps(url, clients)
+    child_id = fill(engine, points)
+    total = clients * requests
+
+    print(f"{total} lectures d'historique ({points} points), {clients} clients — {engine.dialect.name}")
+    for label, app in apps.items():
+        elapsed, pings = asyncio.run(load(app, child_id, clients, requests))
+        pings.sort()
+        print(
+            f"  {label:<18}: {elapsed:7.2f}s {total / elapsed:8.1f} req/s   "
+            f"/ping p50 {statistics.median(pings) * 1000:7.1f} ms  "
+            f"p95 {pings[int(len(pings) * 0.95)] * 1000:7.1f} ms  max {pings[-1] * 1000:7.1f} ms"
+        )
+        asyncio.run(async_engine.dispose())
+
+    Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+    url = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db")
+    run(url, args.points, args.clients, args.requests)
@@ -0,0 +1,95 @@
+"""
+Benchmark ingestion GPS : chemin point par point vs lot en une transaction
+vs import en masse (COPY sur PostgreSQL, cf. app.services.import_service)
+
+Usage :
+    python -m benchmarks.bench_gps_ingest [--fixes 2000] [--batch-size 500]
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_gps_ingest
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import User, Child, GPSHistory
+from app.schemas.gps import GPSUpdate
+from app.services.gps_service import parse_fix_timestamp, update_child_gps, update_child_gps_batch
+from app.services.import_service import import_gps_history
+
+
+def make_fixes(n: int) -> list:
+    start = datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+    return [
+        GPSUpdate(
+            # ~150 m entre deux fixes : pas de regroupement en point d'arrêt
+            latitude=44.8378 + i * 1e-3,
+            longitude=-0.5792 + i * 1e-3,
+            battery=100 - i % 100,
+            timestamp=(start + timedelta(seconds=5 * i)).isoformat(),
+        )
+        for i in range(n)
+    ]
+
+
+def setup(url: str):
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    user = User(email="bench@wimc.fr", username="bench", hashed_password="x")
+    db.add(user)
+    db.commit()
+    child = Child(name="Bench", parent_id=user.id)
+    db.add(child)
+    db.commit()
+    return engine, db, child.id
+
+
+def run(url: str, n: int, batch_size: int) -> None:
+    fixes = make_fixes(n)
+
+    engine, db, child_id = setup(url)
+    t0 = time.perf_counter()
+    for fix in fixes:
+        update_child_gps(db, child_id, fix)
+    per_point = time.perf_counter() - t0
+    db.close()
+
+    engine, db, child_id = setup(url)
+    t0 = time.perf_counter()
+    for i in range(0, n, batch_size):
+        update_child_gps_batch(db, child_id, fixes[i:i + batch_size])
+    batched = time.perf_counter() - t0
+    assert db.query(GPSHistory).count() == n
+    db.close()
+
+    engine, db, child_id = setup(url)
+    rows = [
+        (child_id, fix.latitude, fix.longitude, fix.battery, parse_fix_timestamp(fix), None, 1)
+        for fix in fixes
+    ]
+    stats = import_gps_history(db, rows)
+    imported = stats["seconds"]
+    assert db.query(GPSHistory).count() == n
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+    print(f"{n} fixes — {engine.dialect.name}")
+    print(f"  point par point : {per_point:8.3f}s  {n / per_point:10.0f} fixes/s")
+    print(f"  lots de {batch_size:<6}: {batched:8.3f}s  {n / batched:10.0f} fixes/s")
+    print(f"  import en masse : {imported:8.3f}s  {stats['rows_per_second']:10.0f} fixes/s")
+    print(f"  gain (lots)     : x{per_point / batched:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixes", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    url = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db")
+    run(url, args.fixes, args.batch_size)
@@ -0,0 +1,71 @@
+"""
+Benchmark haversine : calculate_distance (scalaire) vs kernel NumPy
+
+Une journée de 20 000 points évaluée contre 20 zones de confiance
+(matrice points × zones), plus la longueur totale de la trace.
+
+Usage :
+    python -m benchmarks.bench_haversine [--points 20000] [--zones 20]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.geo_service import haversine_matrix, path_length
+from app.services.gps_service import calculate_distance
+from app.services.zone_index import Zone, ZoneIndex
+from benchmarks.bench_track_simplification import synthetic_day
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n: int, m: int) -> None:
+    points = synthetic_day(n)
+    rng = random.Random(2)
+    zones = [
+        Zone(i, f"zone {i}", points[rng.randrange(n)].latitude, points[rng.randrange(n)].longitude, 200)
+        for i in range(m)
+    ]
+    lats = np.array([p.latitude for p in points])
+    lons = np.array([p.longitude for p in points])
+    zone_lats = [z.latitude for z in zones]
+    zone_lons = [z.longitude for z in zones]
+
+    scalar = best_of(lambda: [
+        [calculate_distance(p.latitude, p.longitude, z.latitude, z.longitude) for z in zones]
+        for p in points
+    ], repeat=1)
+    vector = best_of(lambda: haversine_matrix(lats, lons, zone_lats, zone_lons))
+    print(f"matrice {n} x {m} : scalaire {scalar * 1000:.1f} ms, NumPy {vector * 1000:.1f} ms "
+          f"(x{scalar / vector:.0f})")
+
+    index = ZoneIndex(zones)
+    scalar = best_of(lambda: [index.find(p.latitude, p.longitude) for p in points], repeat=1)
+    vector = best_of(lambda: index.locate(lats, lons))
+    print(f"zones de la journée : find par point {scalar * 1000:.1f} ms, "
+          f"locate {vector * 1000:.1f} ms (x{scalar / vector:.0f})")
+
+    scalar = best_of(lambda: sum(
+        calculate_distance(a.latitude, a.longitude, b.latitude, b.longitude)
+        for a, b in zip(points, points[1:])
+    ))
+    vector = best_of(lambda: path_length(lats, lons))
+    print(f"longueur de trace : scalaire {scalar * 1000:.1f} ms, NumPy {vector * 1000:.1f} ms "
+          f"(x{scalar / vector:.0f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--zones", type=int, default=20)
+    args = parser.parse_args()
+    run(args.points, args.zones)
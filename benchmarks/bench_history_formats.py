@@ -0,0 +1,73 @@
+"""
+Benchmark formats de réponse de l'historique : taille et temps de sérialisation
+
+Compare le JSON actuel (liste de dicts, floats pleine précision, ISO 8601)
+aux formats polyline et msgpack float32, sur une journée sous-échantillonnée.
+
+Usage :
+    python -m benchmarks.bench_history_formats [--points 2880]
+"""
+import argparse
+import gzip
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.services.history_format_service import to_msgpack, to_polyline
+from benchmarks.bench_track_simplification import synthetic_day
+
+Point = namedtuple("Point", ["latitude", "longitude", "timestamp"])
+
+
+def day_points(n: int) -> list:
+    start = datetime(2026, 3, 3, tzinfo=timezone.utc)
+    return [
+        Point(p.latitude, p.longitude, start + timedelta(seconds=30 * i))
+        for i, p in enumerate(synthetic_day(n))
+    ]
+
+
+def encode_json(points):
+    return json.dumps(jsonable_encoder([
+        {"latitude": p.latitude, "longitude": p.longitude, "timestamp": p.timestamp}
+        for p in points
+    ])).encode()
+
+
+def encode_polyline(points):
+    return json.dumps(to_polyline(
+        [p.latitude for p in points],
+        [p.longitude for p in points],
+        [p.timestamp for p in points],
+    )).encode()
+
+
+def encode_msgpack(points):
+    return to_msgpack(
+        [p.latitude for p in points],
+        [p.longitude for p in points],
+        [p.timestamp for p in points],
+    )
+
+
+def run(n: int) -> None:
+    points = day_points(n)
+    print(f"{n} points")
+    print(f"  {'format':<9} {'octets':>9} {'gzip':>9} {'sérialisation':>14}")
+    for name, encode in (("json", encode_json), ("polyline", encode_polyline), ("msgpack", encode_msgpack)):
+        best = float("inf")
+        for _ in range(5):
+            t0 = time.perf_counter()
+            body = encode(points)
+            best = min(best, time.perf_counter() - t0)
+        print(f"  {name:<9} {len(body):>9} {len(gzip.compress(body)):>9} {best * 1000:>11.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=2880)
+    args = parser.parse_args()
+    run(args.points)
@@ -0,0 +1,143 @@
+"""
+Benchmark lectures d'historique sur une grosse table gps_history synthétique
+
+Mesure get_gps_history (un jour) et get_history_days pour un enfant, sans
+puis avec l'index composite (child_id, timestamp).
+
+Usage :
+    python -m benchmarks.bench_history_index [--rows 2000000] [--children 50]
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_history_index
+    BENCH_DATABASE_URL=postgresql://... GPS_HISTORY_PARTITIONING=true \\
+        python -m benchmarks.bench_history_index   # table partitionnée par mois
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from app.core.database import Base
+from app.core.partitioning import (
+    create_partitioned_gps_history,
+    ensure_gps_history_partitions,
+    partitioning_enabled,
+)
+from app.models import User, Child, GPSHistory
+from app.services.gps_service import get_gps_history, get_history_days
+
+DAYS = 180
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def fill(engine, rows: int, children: int) -> None:
+    """Remplit gps_history : `rows` points répartis sur `children` enfants et DAYS jours"""
+    per_child = rows // children
+    step = DAYS * 86400 // per_child
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO gps_history (child_id, latitude, longitude, battery, "timestamp")
+                SELECT c, 44.8 + random() / 100, -0.57 + random() / 100, 80,
+                       :start + make_interval(secs => s * :step)
+                FROM generate_series(1, :children) AS c,
+                     generate_series(0, :per_child - 1) AS s
+            """), {"start": START, "step": step, "children": children, "per_child": per_child})
+        return
+
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for child_id in range(1, children + 1):
+            conn.execute(insert(GPSHistory), [
+                {
+                    "child_id": child_id,
+                    "latitude": 44.8 + rng.random() / 100,
+                    "longitude": -0.57 + rng.random() / 100,
+                    "battery": 80,
+                    "timestamp": START + timedelta(seconds=s * step),
+                }
+                for s in range(per_child)
+            ])
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(url: str, rows: int, children: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS gps_history CASCADE")
+                     if engine.dialect.name == "postgresql"
+                     else text("DROP TABLE IF EXISTS gps_history"))
+
+    Base.metadata.tables["users"].create(bind=engine)
+    Base.metadata.tables["children"].create(bind=engine)
+    if partitioning_enabled(engine):
+        create_partitioned_gps_history(engine)
+        ensure_gps_history_partitions(
+            engine, [START + timedelta(days=d) for d in range(0, DAYS + 31, 28)]
+        )
+    Base.metadata.create_all(bind=engine)
+
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    user = User(email="bench@wimc.fr", username="bench", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.add_all([Child(name=f"Bench {i}", parent_id=user.id) for i in range(children)])
+    db.commit()
+
+    composite = next(
+        i for i in GPSHistory.__table__.indexes
+        if i.name == "uq_gps_history_child_id_timestamp"
+    )
+    with engine.begin() as conn:
+        conn.execute(DropIndex(composite, if_exists=True))
+
+    t0 = time.perf_counter()
+    fill(engine, rows, children)
+    print(f"{rows} lignes insérées en {time.perf_counter() - t0:.1f}s ({engine.dialect.name})")
+
+    day = (START + timedelta(days=DAYS // 2)).date()
+    child_id = children // 2
+
+    def history():
+        db.expunge_all()
+        return get_gps_history(db, child_id, day, 30)
+
+    def days():
+        return get_history_days(db, child_id)
+
+    results = {}
+    for label in ("sans index", "avec index"):
+        if label == "avec index":
+            with engine.begin() as conn:
+                conn.execute(CreateIndex(composite, if_not_exists=True))
+                if engine.dialect.name == "postgresql":
+                    conn.execute(text("ANALYZE gps_history"))
+        results[label] = (timed(history), timed(days))
+
+    for label, (h, d) in results.items():
+        print(f"  {label:<11}: history(jour) {h * 1000:9.2f} ms   history/days {d * 1000:9.2f} ms")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--children", type=int, default=50)
+    args = parser.parse_args()
+    url = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db")
+    run(url, args.rows, args.children)
@@ -0,0 +1,109 @@
+"""
+Benchmark map-matching local (HMM/Viterbi)
+
+Par défaut : ville en damier synthétique et trace simulée (marche le long
+des rues, un point toutes les 10 s, bruit GPS gaussien). Avec --osm et
+--track, rejoue une trace enregistrée (CSV de /history/stream) sur un
+extrait OpenStreetMap réel.
+
+Usage :
+    python -m benchmarks.bench_map_matching [--points 3000] [--noise 8]
+    python -m benchmarks.bench_map_matching --osm bordeaux.osm --track child_1.csv
+"""
+import argparse
+import csv
+import random
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from app.services.map_matching import MapMatcher, RoadGraph, load_osm_graph
+
+Point = namedtuple("Point", ["latitude", "longitude"])
+
+LAT0, LON0 = 44.8378, -0.5792
+DLAT, DLON = 0.0009, 0.00127  # ~100 m
+
+
+def grid_city(size: int) -> RoadGraph:
+    nodes = {
+        i * size + j: (LAT0 + i * DLAT, LON0 + j * DLON)
+        for i in range(size) for j in range(size)
+    }
+    edges = []
+    for i in range(size):
+        for j in range(size - 1):
+            edges.append((i * size + j, i * size + j + 1))
+            edges.append((j * size + i, (j + 1) * size + i))
+    return RoadGraph(nodes, edges)
+
+
+def simulated_walk(size: int, n: int, noise_m: float, seed: int = 7) -> tuple:
+    """Marche aléatoire d'intersection en intersection, ~14 m entre deux points"""
+    rng = random.Random(seed)
+    i = j = size // 2
+    truth = []
+    while len(truth) < n:
+        di, dj = rng.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+        if not (0 <= i + di < size and 0 <= j + dj < size):
+            continue
+        for step in range(7):
+            f = step / 7
+            truth.append(Point(LAT0 + (i + di * f) * DLAT, LON0 + (j + dj * f) * DLON))
+        i, j = i + di, j + dj
+    truth = truth[:n]
+    sigma_lat, sigma_lon = noise_m / 111_000, noise_m / 78_500
+    noisy = [Point(p.latitude + rng.gauss(0, sigma_lat), p.longitude + rng.gauss(0, sigma_lon))
+             for p in truth]
+    return truth, noisy
+
+
+def read_track(path: str) -> list:
+    with open(path) as f:
+        return [Point(float(row["latitude"]), float(row["longitude"])) for row in csv.DictReader(f)]
+
+
+def error_m(graph: RoadGraph, truth: list, matched: list) -> np.ndarray:
+    """Distance de chaque point réel au point de sortie le plus proche"""
+    tx, ty = graph.to_xy(np.array([p.latitude for p in truth]), np.array([p.longitude for p in truth]))
+    mx, my = graph.to_xy(np.array([p["latitude"] for p in matched]),
+                         np.array([p["longitude"] for p in matched]))
+    errors = []
+    for k in range(0, len(tx), 500):
+        d = np.hypot(tx[k:k + 500, None] - mx[None, :], ty[k:k + 500, None] - my[None, :])
+        errors.append(d.min(axis=1))
+    return np.concatenate(errors)
+
+
+def run(args) -> None:
+    t0 = time.perf_counter()
+    if args.osm:
+        graph = load_osm_graph(args.osm)
+        truth, track = None, read_track(args.track)
+    else:
+        graph = grid_city(args.size)
+        truth, track = simulated_walk(args.size, args.points, args.noise)
+    print(f"graphe : {len(graph.x)} nœuds, {len(graph)} arêtes en {time.perf_counter() - t0:.2f}s")
+
+    matcher = MapMatcher(graph)
+    t0 = time.perf_counter()
+    matched = matcher.match(track)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(track)} points appariés en {elapsed * 1000:.0f} ms "
+          f"({elapsed / len(track) * 1e6:.0f} µs/point), {len(matched)} points en sortie")
+
+    if truth:
+        raw = error_m(graph, truth, [{"latitude": p.latitude, "longitude": p.longitude} for p in track])
+        snapped = error_m(graph, truth, matched)
+        print(f"erreur médiane : brute {np.median(raw):.1f} m -> appariée {np.median(snapped):.1f} m")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=3000)
+    parser.add_argument("--size", type=int, default=60, help="intersections par côté du damier")
+    parser.add_argument("--noise", type=float, default=8.0, help="bruit GPS (m)")
+    parser.add_argument("--osm", help="extrait OpenStreetMap .osm")
+    parser.add_argument("--track", help="trace CSV (timestamp,latitude,longitude,battery)")
+    run(parser.parse_args())
@@ -0,0 +1,54 @@
+"""
+Benchmark simplification de trace : une journée de 20 000 points
+
+Trace synthétique : arrêts longs (bruit GPS ~3 m) entrecoupés de trajets
+avec virages, comme un enfant qui émet toutes les 5 secondes.
+
+Usage :
+    python -m benchmarks.bench_track_simplification [--points 20000] [--tolerance 10]
+"""
+import argparse
+import math
+import random
+import time
+from collections import namedtuple
+
+from app.services.track_service import simplify_track
+
+Point = namedtuple("Point", ["latitude", "longitude"])
+
+
+def synthetic_day(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    lat, lon = 44.8378, -0.5792
+    heading = 0.0
+    points = []
+    moving = False
+    while len(points) < n:
+        moving = not moving
+        for _ in range(rng.randint(200, 1500)):
+            if moving:
+                heading += rng.gauss(0, 0.15)
+                lat += 8e-5 * math.cos(heading)
+                lon += 8e-5 * math.sin(heading)
+            points.append(Point(lat + rng.gauss(0, 3e-5), lon + rng.gauss(0, 3e-5)))
+    return points[:n]
+
+
+def run(n: int, tolerance: float) -> None:
+    points = synthetic_day(n)
+    for method in ("dp", "vw"):
+        best = float("inf")
+        for _ in range(5):
+            t0 = time.perf_counter()
+            result = simplify_track(points, method, tolerance)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{method}: {n} -> {len(result)} points ({len(result) / n:.1%}) en {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--tolerance", type=float, default=10.0)
+    args = parser.parse_args()
+    run(args.points, args.tolerance)
@@ -107,12 +107,8 @@ export const createChild = async (name : string) => {
   return response.data;
 };
 
+// Positions, batterie et statut de zone de tous les enfants en un seul appel
 export const getAllChildrenGPSPositions = async () => {
-  const children = await getChildren();
-  const positions = await Promise.all(
-    children.map(child => 
-      getChildGPSPosition(child.id).catch(() => null)
-    )
-  );
-  return positions.filter(p => p !== null);
+  const response = await axios.get(`${API_BASE_URL}/api/gps/me/positions?t=${Date.now()}`);
+  return response.data;
 };
@@ -8,10 +8,35 @@ import { useKeepAwake } from 'expo-keep-awake';
 
 let GLOBAL_CHILD_ID = null;
 let GLOBAL_LAST_LOCATION = null;
+let GLOBAL_REPORTING = null;
 
 const API_URL = `${process.env.EXPO_PUBLIC_API_URL}/api/gps`;
 const LOCATION_TASK_NAME = 'background-location-task';
 
+// Cadence par défaut (10s), puis celle renvoyée par le serveur dans `reporting`
+const locationOptions = (hint) => ({
+  accuracy: !hint || hint.mode === 'moving' ? Location.Accuracy.High : Location.Accuracy.Balanced,
+  timeInterval: hint ? hint.next_report_seconds * 1000 : 10000,
+  distanceInterval: hint ? hint.min_distance_m : 0,
+  pausesUpdatesAutomatically: false,
+  activityType: Location.ActivityType.Other,
+  showsBackgroundLocationIndicator: true,
+});
+
+// Relance le suivi seulement si la consigne du serveur a changé
+const applyReportingHint = async (hint) => {
+  if (!hint) return;
+  const current = GLOBAL_REPORTING;
+  if (current
+    && current.next_report_seconds === hint.next_report_seconds
+    && current.min_distance_m === hint.min_distance_m
+    && current.mode === hint.mode) {
+    return;
+  }
+  GLOBAL_REPORTING = hint;
+  await Location.startLocationUpdatesAsync(LOCATION_TASK_NAME, locationOptions(hint));
+};
+
 TaskManager.defineTask(LOCATION_TASK_NAME, async ({ data, error }) => {
   if (error) {
     console.error('❌ Background task error:', error);
@@ -25,14 +50,16 @@ TaskManager.defineTask(LOCATION_TASK_NAME, async ({ data, error }) => {
       const batteryPercent = Math.round(batteryLevel * 100);
       const childId = GLOBAL_CHILD_ID;
       if (!childId) return;
-      await axios.post(`${API_URL}/children/${childId}/update`, {
+      const { data: position } = await axios.post(`${API_URL}/children/${childId}/update`, {
         latitude: coords.latitude,
         longitude: coords.longitude,
         timestamp: new Date().toISOString(),
-        battery: batteryPercent
+        battery: batteryPercent,
+        accuracy: coords.accuracy
       });
       GLOBAL_LAST_LOCATION = { latitude: coords.latitude, longitude: coords.longitude };
       console.log('✅ Background position envoyée');
+      await applyReportingHint(position.reporting);
     } catch (err) {
       console.error('❌ Erreur envoi background:', err.message);
     }
@@ -44,6 +71,7 @@ export default function App() {
   const [location, setLocation] = useState(null);
   const [childId, setChildId] = useState(null);
   const [inputId, setInputId] = useState('');
+  const [reporting, setReporting] = useState(null);
   useKeepAwake();
 
   useEffect(() => {
@@ -66,6 +94,7 @@ export default function App() {
       if (GLOBAL_LAST_LOCATION) {
         setLocation(GLOBAL_LAST_LOCATION);
       }
+      setReporting(GLOBAL_REPORTING);
     }, 5000);
     return () => clearInterval(interval);
   }, []);
@@ -79,14 +108,8 @@ export default function App() {
         await Location.stopLocationUpdatesAsync(LOCATION_TASK_NAME);
       }
 
-      await Location.startLocationUpdatesAsync(LOCATION_TASK_NAME, {
-        accuracy: Location.Accuracy.High,
-        timeInterval: 10000,
-        distanceInterval: 0,
-        pausesUpdatesAutomatically: false,
-        activityType: Location.ActivityType.Other,
-        showsBackgroundLocationIndicator: true,
-      });
+      GLOBAL_REPORTING = null;
+      await Location.startLocationUpdatesAsync(LOCATION_TASK_NAME, locationOptions(null));
       setIsTracking(true);
       Alert.alert('Démarré', 'Émission GPS active 📡');
     } catch (error) {
@@ -151,7 +174,7 @@ export default function App() {
       </TouchableOpacity>
 
       <Text style={styles.status}>
-        {isTracking ? '🟢 Émission active (10s)' : '🔴 Arrêté'}
+        {isTracking ? `🟢 Émission active (${reporting ? reporting.next_report_seconds : 10}s)` : '🔴 Arrêté'}
       </Text>
 
       <TouchableOpacity onPress={() => { stopTracking(); setChildId(null); }}>